@@ -1,10 +1,18 @@
 import os
 import json
+import heapq
 import logging
 from datetime import datetime
 import time
+import numpy as np
+import scoring
+from arbitrage import ExchangeGraph
+from item_index import ItemIndex, diff_snapshot
+from analyzer_executor import AnalyzerExecutor
+from serialized_payload import SerializedPayload
+from strategy_catalog import load_strategy_catalogs, SCARAB_CATALOG, FRAGMENT_CATALOG, DIV_CARD_CATALOG
 from config import (
-    CURRENT_LEAGUES, PRIMARY_LEAGUE, HISTORICAL_LEAGUE,
+    CURRENT_LEAGUES, PRIMARY_LEAGUE, HISTORICAL_LEAGUE, INCREMENTAL_ANALYSIS,
     OUTPUT_DIR, get_platform_path, ensure_dir_exists
 )
 
@@ -12,6 +20,17 @@ from config import (
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Opportunity lists produced by a full analysis run
+OPPORTUNITY_TYPES = ['flipping', 'farming', 'crafting', 'investment']
+
+# Market data categories each farming analyzer reads
+FARMING_CATEGORIES = {
+    'scarabs': 'analyze_scarab_farming',
+    'fragments': 'analyze_fragment_farming',
+    'oils': 'analyze_oil_farming',
+    'divination_cards': 'analyze_div_card_farming',
+}
+
 class AnalysisEngine:
     """Class for analyzing market data and identifying profit opportunities"""
     
@@ -25,36 +44,98 @@ class AnalysisEngine:
             'timestamp': None
         }
         self.last_analysis = None
+        self._item_index = None
+        
+        # Opportunities serialized and compressed once per refresh for the API
+        self.payload = None
+        
+        # Wall time and status of each analyzer in the latest analysis, kept out
+        # of the opportunities so unchanged opportunities keep their ETag
+        self.analyzer_timings = {}
+        
+        # Direct bulk exchange rates between currency pairs, keyed by (have, want) trade ids,
+        # and live buy/sell rates against chaos, keyed by trade id; both are
+        # replaced rather than modified, as a rate sweep thread may set them
+        self.cross_rates = {}
+        self.trade_rates = {}
+        self._rates_changed = False
+        
+        # Fingerprints of the last analyzed snapshot and per-analyzer results
+        # computed from it, used by incremental analysis
+        self._previous_fingerprints = None
+        self._analysis_cache = {}
+        
+        # Runs the independent analyzers concurrently
+        self.executor = AnalyzerExecutor()
+        
+        # Farming strategy catalogs from the reference data, loaded once
+        self.strategy_catalogs = load_strategy_catalogs()
     
-    def analyze_all_opportunities(self, market_data):
+    def analyze_all_opportunities(self, market_data, incremental=INCREMENTAL_ANALYSIS):
         """Analyze all profit opportunities"""
         logger.info("Analyzing profit opportunities...")
         
         try:
+            # Index the snapshot once for all analyzers
+            item_index = self.get_item_index(market_data)
+            
+            # Diff against the previous snapshot so analyzers only recompute items that moved
+            if incremental and self._previous_fingerprints is not None:
+                item_index.diff = diff_snapshot(self._previous_fingerprints, item_index)
+                item_index.diff_basis = self._previous_fingerprints
+                diff = item_index.diff
+                logger.info(f"Snapshot diff: {len(diff.added)} added, {len(diff.removed)} removed, {len(diff.changed)} changed")
+                
+                if diff.is_empty() and not self._rates_changed and self.opportunities['timestamp'] is not None:
+                    logger.info("No prices moved since the last analysis, keeping current opportunities")
+                    return self.opportunities
+            
+            # Compute fingerprints up front so analyzers never build them concurrently
+            item_index.fingerprints()
+            
+            # New trade rates can open cycles even where no poe.ninja price moved
+            if self._rates_changed:
+                self._analysis_cache.pop('multi_step_flips', None)
+                self._rates_changed = False
+            
+            # Analyze flipping, farming, crafting and investment opportunities concurrently;
+            # an analyzer that fails or times out keeps its previous opportunities
+            results, timings = self.executor.run(
+                {
+                    'flipping': lambda: self.analyze_flipping_opportunities(market_data),
+                    'farming': lambda: self.analyze_farming_opportunities(market_data),
+                    'crafting': lambda: self.analyze_crafting_opportunities(market_data),
+                    'investment': lambda: self.analyze_investment_opportunities(market_data),
+                },
+                fallbacks={name: self.opportunities[name] for name in OPPORTUNITY_TYPES}
+            )
+            
             # Initialize opportunities structure
-            self.opportunities = {
-                'flipping': [],
-                'farming': [],
-                'crafting': [],
-                'investment': [],
+            opportunities = {
+                'flipping': results['flipping'],
+                'farming': results['farming'],
+                'crafting': results['crafting'],
+                'investment': results['investment'],
                 'timestamp': datetime.now().isoformat()
             }
             
-            # Analyze flipping opportunities
-            self.opportunities['flipping'] = self.analyze_flipping_opportunities(market_data)
-            logger.info(f"Identified {len(self.opportunities['flipping'])} flipping opportunities")
+            self.analyzer_timings = timings
+            for name in OPPORTUNITY_TYPES:
+                logger.info(f"Identified {len(opportunities[name])} {name} opportunities in {timings[name]['seconds']:.3f}s ({timings[name]['status']})")
             
-            # Analyze farming opportunities
-            self.opportunities['farming'] = self.analyze_farming_opportunities(market_data)
-            logger.info(f"Identified {len(self.opportunities['farming'])} farming opportunities")
+            self._previous_fingerprints = item_index.fingerprints()
             
-            # Analyze crafting opportunities
-            self.opportunities['crafting'] = self.analyze_crafting_opportunities(market_data)
-            logger.info(f"Identified {len(self.opportunities['crafting'])} crafting opportunities")
+            # Moved prices that did not change any list keep the current opportunities,
+            # so the saved file and the served payload (and its ETag) stay as they are
+            unchanged = self.opportunities['timestamp'] is not None and all(
+                opportunities[name] == self.opportunities[name] for name in OPPORTUNITY_TYPES
+            )
+            if unchanged:
+                logger.info("Opportunities unchanged, skipping save")
+                return self.opportunities
             
-            # Analyze investment opportunities
-            self.opportunities['investment'] = self.analyze_investment_opportunities(market_data)
-            logger.info(f"Identified {len(self.opportunities['investment'])} investment opportunities")
+            self.opportunities = opportunities
+            self.payload = SerializedPayload(self.opportunities)
             
             # Save opportunities to file
             opportunities_file = get_platform_path(os.path.join(OUTPUT_DIR, 'data', 'profit_opportunities.json'))
@@ -71,123 +152,226 @@ class AnalysisEngine:
             # Initialize timestamp if it's None to prevent NoneType errors
             if self.opportunities['timestamp'] is None:
                 self.opportunities['timestamp'] = datetime.now().isoformat()
+                self.payload = None
             return self.opportunities
     
+    def set_cross_rates(self, pair_rates):
+        """
+        Set direct exchange rates between currency pairs (POETradeAPI.get_pair_rates results)
+        
+        Returns:
+            bool: Whether the rates changed, so the next analysis reruns the cycle search
+        """
+        pair_rates = dict(pair_rates)
+        if pair_rates == self.cross_rates:
+            return False
+        
+        self.cross_rates = pair_rates
+        self._rates_changed = True
+        return True
+    
+    def set_trade_rates(self, currency, rates):
+        """
+        Set the live exchange rates of one currency against chaos
+        
+        Used as the POETradeAPI.sweep_currency_rates callback, so the next
+        analysis uses every currency swept so far.
+        
+        Args:
+            currency (str): Trade currency id
+            rates (dict): 'buy_rate' and 'sell_rate' as from the sweep
+        """
+        if self.trade_rates.get(currency) == rates:
+            return
+        
+        self.trade_rates = {**self.trade_rates, currency: rates}
+        self._rates_changed = True
+    
+    def has_pending_rates(self):
+        """Check whether trade rates changed since the last analysis"""
+        return self._rates_changed
+    
+    def get_item_index(self, market_data):
+        """Get the category-tagged item index for a snapshot, building it once per snapshot"""
+        if self._item_index is None or self._item_index.market_data is not market_data:
+            self._item_index = ItemIndex(market_data)
+        return self._item_index
+    
+    def _cache_is_current(self, name, item_index):
+        """Check whether a cached analyzer result was computed from the snapshot the index was diffed against"""
+        cached = self._analysis_cache.get(name)
+        return (item_index.diff is not None and cached is not None
+                and cached['basis'] is item_index.diff_basis)
+    
+    def _refresh_item_results(self, name, item_index, items, compute):
+        """
+        Get per-item analyzer results, recomputing only items that moved since the last snapshot
+        
+        Args:
+            name (str): Cache name of the analyzer
+            item_index (ItemIndex): Index of the current snapshot
+            items (list): Items to analyze, in snapshot order
+            compute (callable): Maps a list of items to a list of results (None for no result)
+        
+        Returns:
+            list: Results in snapshot order, without None
+        """
+        keys = [item_index.item_key(item) for item in items]
+        
+        # Items sharing a key cannot be told apart between snapshots
+        if len(set(keys)) != len(keys):
+            self._analysis_cache.pop(name, None)
+            return [result for result in compute(items) if result is not None]
+        
+        previous = self._analysis_cache[name]['results'] if self._cache_is_current(name, item_index) else None
+        
+        if previous is None:
+            dirty = list(range(len(items)))
+        else:
+            diff = item_index.diff
+            dirty = [i for i, key in enumerate(keys) if key not in previous or diff.is_dirty(key)]
+        
+        computed = dict(zip(dirty, compute([items[i] for i in dirty])))
+        
+        results = {}
+        for i, key in enumerate(keys):
+            results[key] = computed[i] if i in computed else previous[key]
+        
+        self._analysis_cache[name] = {'basis': item_index.fingerprints(), 'results': results}
+        logger.debug(f"{name}: recomputed {len(dirty)} of {len(items)} items")
+        
+        return [result for result in results.values() if result is not None]
+    
+    def _refresh_result(self, name, item_index, categories, compute):
+        """Get an analyzer result, reusing the previous one if none of its categories moved"""
+        if self._cache_is_current(name, item_index) and not item_index.diff.touches(*categories):
+            result = self._analysis_cache[name]['result']
+        else:
+            result = compute()
+        
+        self._analysis_cache[name] = {'basis': item_index.fingerprints(), 'result': result}
+        return result
+    
     def get_opportunities(self):
         """Get the analyzed opportunities"""
         # Ensure timestamp is not None to prevent NoneType errors
         if self.opportunities['timestamp'] is None:
             self.opportunities['timestamp'] = datetime.now().isoformat()
+            self.payload = None
             
         return self.opportunities
     
+    def get_payload(self):
+        """Get the opportunities as a pre-serialized, pre-compressed response body"""
+        if self.payload is None:
+            self.payload = SerializedPayload(self.get_opportunities())
+        return self.payload
+    
     def analyze_flipping_opportunities(self, market_data):
         """Analyze currency flipping opportunities"""
-        flipping_opportunities = []
-        
         try:
             # Get all currencies and fragments
-            currencies = market_data.get('currencies', [])
-            fragments = market_data.get('fragments', [])
-            all_currencies = currencies + fragments
+            item_index = self.get_item_index(market_data)
+            all_currencies = item_index.items_in('currencies', 'fragments')
             
             # Create a dictionary of currency names to chaos values
             currency_values = {item['name']: item['chaos_value'] for item in all_currencies if 'chaos_value' in item}
             
-            # Find direct flipping opportunities (single-step)
-            for currency in all_currencies:
-                if 'chaos_value' not in currency or 'receive_change' not in currency:
-                    continue
-                
-                # Calculate volatility and potential profit
-                volatility = abs(currency.get('receive_change', 0)) / 100 if currency.get('receive_change') is not None else 0
-                potential_profit = volatility * currency.get('chaos_value', 0) * 0.1  # Estimate 10% of value as potential profit
-                
-                # Only include currencies with significant volatility and value
-                if volatility > 0.05 and currency.get('chaos_value', 0) > 5:
-                    opportunity = {
-                        'type': 'single-step',
-                        'currency': currency['name'],
-                        'chaos_value': currency.get('chaos_value', 0),
-                        'volatility': volatility,
-                        'potential_profit': potential_profit,
-                        'strategy': f"Buy {currency['name']} when price drops, sell when price rises. Current price: {currency.get('chaos_value', 0)} chaos.",
-                        'opportunity_score': self.calculate_opportunity_score(potential_profit / currency.get('chaos_value', 1), volatility, currency.get('trade_volume', 0)),
-                        'league': currency.get('league', PRIMARY_LEAGUE)
-                    }
-                    flipping_opportunities.append(opportunity)
-            
-            # Find multi-step flipping opportunities
-            multi_step_opportunities = self.find_multi_step_flips(all_currencies, currency_values)
-            flipping_opportunities.extend(multi_step_opportunities)
+            # Find direct flipping opportunities (single-step), only for currencies that moved
+            flipping_opportunities = self._refresh_item_results(
+                'single_step_flips', item_index, all_currencies, self.find_single_step_flips
+            )
             
-            # Sort opportunities by opportunity score
-            flipping_opportunities.sort(key=lambda x: x.get('opportunity_score', 0), reverse=True)
+            # Find multi-step flipping opportunities; cycles span all currencies, so any move reruns the search
+            multi_step_opportunities = self._refresh_result(
+                'multi_step_flips', item_index, ('currencies', 'fragments'),
+                lambda: self.find_multi_step_flips(all_currencies, currency_values)
+            )
+            flipping_opportunities.extend(multi_step_opportunities)
             
-            # Limit to top 20 opportunities
-            return flipping_opportunities[:20]
+            # Keep the top 20 opportunities by score; ties keep snapshot order like a stable sort
+            return heapq.nlargest(20, flipping_opportunities, key=lambda x: x.get('opportunity_score', 0))
             
         except Exception as e:
             logger.error(f"Error analyzing flipping opportunities: {e}")
             return []
     
+    def find_single_step_flips(self, currencies):
+        """Find single-step flipping opportunities, returning one entry (or None) per currency"""
+        opportunities = [None] * len(currencies)
+        
+        # Only currencies with a price and a price change can be flipped
+        candidates = [i for i, c in enumerate(currencies) if 'chaos_value' in c and 'receive_change' in c]
+        
+        # Calculate volatility and potential profit for all candidates at once
+        chaos_values = np.array([currencies[i].get('chaos_value', 0) for i in candidates], dtype=float)
+        volatilities = np.array([abs(currencies[i]['receive_change']) / 100 if currencies[i].get('receive_change') is not None else 0 for i in candidates], dtype=float)
+        potential_profits = volatilities * chaos_values * 0.1  # Estimate 10% of value as potential profit
+        
+        # Only include currencies with significant volatility and value
+        selected = np.nonzero((volatilities > 0.05) & (chaos_values > 5))[0]
+        scores = self.calculate_opportunity_scores(
+            potential_profits[selected] / chaos_values[selected],
+            volatilities[selected],
+            [currencies[candidates[i]].get('trade_volume', 0) for i in selected]
+        )
+        
+        for i, score in zip(selected.tolist(), scores.tolist()):
+            currency = currencies[candidates[i]]
+            opportunities[candidates[i]] = {
+                'type': 'single-step',
+                'currency': currency['name'],
+                'chaos_value': currency.get('chaos_value', 0),
+                'volatility': volatilities[i].item(),
+                'potential_profit': potential_profits[i].item(),
+                'strategy': f"Buy {currency['name']} when price drops, sell when price rises. Current price: {currency.get('chaos_value', 0)} chaos.",
+                'opportunity_score': score,
+                'league': currency.get('league', PRIMARY_LEAGUE)
+            }
+        
+        return opportunities
+    
     def find_multi_step_flips(self, currencies, currency_values):
         """Find multi-step flipping opportunities"""
         multi_step_opportunities = []
         
         try:
-            # Create a list of high-volume currencies to consider for multi-step flips
-            high_volume_currencies = [c for c in currencies if c.get('trade_volume', 0) > 50]
-            
-            # For each high-volume currency, find potential paths
-            for start_currency in high_volume_currencies[:10]:  # Limit to top 10 to avoid excessive computation
-                start_name = start_currency.get('name')
-                start_value = start_currency.get('chaos_value', 0)
+            # Build a directed exchange graph from the buy/sell rates against chaos,
+            # plus direct quotes between currencies so cycles are not limited to chaos -> X -> chaos
+            graph = ExchangeGraph()
+            graph.add_market_rows(currencies)
+            graph.add_trade_rates(self.trade_rates)
+            graph.add_pair_rates(self.cross_rates)
+            
+            # Find profitable cycles of any length (at least 2% profit)
+            cycles = graph.find_cycles(min_profit_percent=2, max_cycles=10)
+            
+            leagues = {c.get('name'): c.get('league', PRIMARY_LEAGUE) for c in currencies}
+            
+            for cycle in cycles:
+                path = cycle['path']
+                start_name = path[0]
+                profit_percent = cycle['profit_percent']
                 
-                if start_value < 5:  # Skip low-value currencies
-                    continue
+                # Express the profit for one unit of the most valuable currency traded
+                trade_value = max(currency_values.get(name, 1) or 1 for name in path)
+                profit = trade_value * profit_percent / 100
                 
-                # Find potential second step currencies
-                for mid_currency in high_volume_currencies:
-                    mid_name = mid_currency.get('name')
-                    mid_value = mid_currency.get('chaos_value', 0)
-                    
-                    if mid_name == start_name or mid_value < 5:
-                        continue
-                    
-                    # Find potential third step currencies
-                    for end_currency in high_volume_currencies:
-                        end_name = end_currency.get('name')
-                        end_value = end_currency.get('chaos_value', 0)
-                        
-                        if end_name == start_name or end_name == mid_name or end_value < 5:
-                            continue
-                        
-                        # Calculate potential profit
-                        # Assume 1% loss per trade due to spread
-                        step1_value = start_value * 0.99
-                        step2_value = (step1_value / mid_value) * mid_value * 0.99
-                        step3_value = (step2_value / end_value) * end_value * 0.99
-                        final_value = (step3_value / start_value) * start_value
-                        
-                        profit = final_value - start_value
-                        profit_percent = (profit / start_value) * 100
-                        
-                        # Only include profitable paths
-                        if profit_percent > 2:  # At least 2% profit
-                            opportunity = {
-                                'type': 'multi-step',
-                                'path': f"{start_name} -> {mid_name} -> {end_name} -> {start_name}",
-                                'start_currency': start_name,
-                                'mid_currency': mid_name,
-                                'end_currency': end_name,
-                                'profit_percent': profit_percent,
-                                'potential_profit': profit,
-                                'strategy': f"Convert {start_name} to {mid_name}, then to {end_name}, then back to {start_name}. Expected profit: {profit_percent:.2f}%",
-                                'opportunity_score': profit_percent * 2,  # Weight multi-step higher
-                                'league': start_currency.get('league', PRIMARY_LEAGUE)
-                            }
-                            multi_step_opportunities.append(opportunity)
+                conversions = ', then to '.join(path[1:-1])
+                opportunity = {
+                    'type': 'multi-step',
+                    'path': ' -> '.join(path),
+                    'start_currency': start_name,
+                    'steps': path,
+                    'chaos_value': currency_values.get(start_name, 1),
+                    'profit_percent': profit_percent,
+                    'potential_profit': profit,
+                    'min_volume': cycle['min_volume'],
+                    'strategy': f"Convert {start_name} to {conversions}, then back to {start_name}. Expected profit: {profit_percent:.2f}%",
+                    'opportunity_score': profit_percent * 2,  # Weight multi-step higher
+                    'league': next((leagues[name] for name in path if name in leagues), PRIMARY_LEAGUE)
+                }
+                multi_step_opportunities.append(opportunity)
             
             # Sort by profit percent
             multi_step_opportunities.sort(key=lambda x: x.get('profit_percent', 0), reverse=True)
@@ -204,33 +388,20 @@ class AnalysisEngine:
         farming_opportunities = []
         
         try:
-            # Get all relevant item types
-            scarabs = market_data.get('scarabs', [])
-            fragments = market_data.get('fragments', [])
-            oils = market_data.get('oils', [])
-            div_cards = market_data.get('divination_cards', [])
-            
-            # Analyze scarab farming opportunities
-            scarab_opportunities = self.analyze_scarab_farming(scarabs)
-            farming_opportunities.extend(scarab_opportunities)
-            
-            # Analyze fragment farming opportunities
-            fragment_opportunities = self.analyze_fragment_farming(fragments)
-            farming_opportunities.extend(fragment_opportunities)
+            item_index = self.get_item_index(market_data)
             
-            # Analyze oil farming opportunities
-            oil_opportunities = self.analyze_oil_farming(oils)
-            farming_opportunities.extend(oil_opportunities)
+            # Analyze scarab, fragment, oil and divination card farming, rerunning
+            # an analyzer only when its category moved
+            for category, analyzer in FARMING_CATEGORIES.items():
+                items = market_data.get(category, [])
+                category_opportunities = self._refresh_result(
+                    f"farming:{category}", item_index, (category,),
+                    lambda: getattr(self, analyzer)(items)
+                )
+                farming_opportunities.extend(category_opportunities)
             
-            # Analyze divination card farming opportunities
-            div_card_opportunities = self.analyze_div_card_farming(div_cards)
-            farming_opportunities.extend(div_card_opportunities)
-            
-            # Sort opportunities by opportunity score
-            farming_opportunities.sort(key=lambda x: x.get('opportunity_score', 0), reverse=True)
-            
-            # Limit to top 20 opportunities
-            return farming_opportunities[:20]
+            # Keep the top 20 opportunities by score
+            return heapq.nlargest(20, farming_opportunities, key=lambda x: x.get('opportunity_score', 0))
             
         except Exception as e:
             logger.error(f"Error analyzing farming opportunities: {e}")
@@ -263,7 +434,7 @@ class AnalysisEngine:
                     'item': name,
                     'chaos_value': chaos_value,
                     'farming_method': farming_strategy['method'],
-                    'locations': farming_strategy['locations'],
+                    'locations': list(farming_strategy['locations']),
                     'strategy': farming_strategy['strategy'],
                     'opportunity_score': chaos_value * 0.8,  # Weight based on value
                     'league': scarab.get('league', PRIMARY_LEAGUE)
@@ -278,67 +449,7 @@ class AnalysisEngine:
     
     def get_scarab_farming_strategy(self, scarab_type):
         """Get farming strategy for a specific scarab type"""
-        strategies = {
-            'Cartography': {
-                'method': 'Atlas Passive Tree + Map Farming',
-                'locations': ['Maps with Cartography Scarab passives'],
-                'strategy': 'Spec into Cartography Scarab nodes on Atlas Passive Tree. Run maps with "Additional Cartographer\'s Strongboxes" sextant. Use Ambush scarabs to increase strongbox quantity.'
-            },
-            'Reliquary': {
-                'method': 'Heist Blueprint Farming',
-                'locations': ['Heist Blueprints', 'Smuggler\'s Caches'],
-                'strategy': 'Run Heist Blueprints with Unusual Gems or Replicas. Focus on Smuggler\'s Caches in maps. Spec into Heist nodes on Atlas Passive Tree.'
-            },
-            'Bestiary': {
-                'method': 'Einhar Mission Farming',
-                'locations': ['Maps with Einhar missions'],
-                'strategy': 'Spec into Bestiary nodes on Atlas Passive Tree. Use Einhar master missions on high-tier maps. Use sextants with "Area contains additional Bestiary monsters".'
-            },
-            'Harbinger': {
-                'method': 'Harbinger Farming',
-                'locations': ['Maps with Harbinger passives'],
-                'strategy': 'Spec into Harbinger nodes on Atlas Passive Tree. Use "Area contains additional Harbingers" sextant. Run maps with Harbinger scarabs.'
-            },
-            'Legion': {
-                'method': 'Legion Farming',
-                'locations': ['Maps with Legion passives'],
-                'strategy': 'Spec into Legion nodes on Atlas Passive Tree. Use "Area contains additional Legion" sextant. Run maps with Legion scarabs.'
-            },
-            'Breach': {
-                'method': 'Breach Farming',
-                'locations': ['Maps with Breach passives'],
-                'strategy': 'Spec into Breach nodes on Atlas Passive Tree. Use "Area contains additional Breaches" sextant. Run maps with Breach scarabs.'
-            },
-            'Expedition': {
-                'method': 'Expedition Farming',
-                'locations': ['Maps with Expedition passives'],
-                'strategy': 'Spec into Expedition nodes on Atlas Passive Tree. Use "Area contains additional Expedition" sextant. Run maps with Expedition scarabs.'
-            },
-            'Blight': {
-                'method': 'Blight Farming',
-                'locations': ['Maps with Blight passives'],
-                'strategy': 'Spec into Blight nodes on Atlas Passive Tree. Use "Area contains additional Blight" sextant. Run maps with Blight scarabs.'
-            },
-            'Metamorph': {
-                'method': 'Metamorph Farming',
-                'locations': ['Maps with Metamorph passives'],
-                'strategy': 'Spec into Metamorph nodes on Atlas Passive Tree. Use "Area contains additional Metamorph samples" sextant. Run maps with Metamorph scarabs.'
-            },
-            'Divination': {
-                'method': 'Divination Card Farming',
-                'locations': ['Maps with Divination Card passives'],
-                'strategy': 'Spec into Divination Card nodes on Atlas Passive Tree. Use "Area contains additional Divination Cards" sextant. Run maps with Divination scarabs.'
-            }
-        }
-        
-        # Default strategy if scarab type not found
-        default_strategy = {
-            'method': 'General Scarab Farming',
-            'locations': ['Delirium Maps', 'Blight Maps', 'Legion Encounters'],
-            'strategy': 'Run high-tier maps with Delirium Orbs. Focus on Legion, Blight, and Metamorph encounters. Spec into Scarab nodes on Atlas Passive Tree.'
-        }
-        
-        return strategies.get(scarab_type, default_strategy)
+        return self.strategy_catalogs[SCARAB_CATALOG].lookup(scarab_type)
     
     def analyze_fragment_farming(self, fragments):
         """Analyze fragment farming opportunities"""
@@ -366,7 +477,7 @@ class AnalysisEngine:
                     'item': name,
                     'chaos_value': chaos_value,
                     'farming_method': farming_strategy['method'],
-                    'locations': farming_strategy['locations'],
+                    'locations': list(farming_strategy['locations']),
                     'strategy': farming_strategy['strategy'],
                     'opportunity_score': chaos_value * 0.9,  # Weight based on value
                     'league': fragment.get('league', PRIMARY_LEAGUE)
@@ -381,62 +492,8 @@ class AnalysisEngine:
     
     def get_fragment_farming_strategy(self, fragment_name):
         """Get farming strategy for a specific fragment"""
-        strategies = {
-            'Maven\'s Invitation': {
-                'method': 'Maven Witness Farming',
-                'locations': ['Maps witnessed by Maven'],
-                'strategy': 'Run maps with Maven witness active. Focus on completing 10 different maps in a region to spawn Maven\'s Invitation. Spec into Maven nodes on Atlas Passive Tree.'
-            },
-            'Forgotten': {
-                'method': 'Shaper Guardian Maps',
-                'locations': ['Shaper Guardian Maps'],
-                'strategy': 'Run Shaper Guardian Maps (Chimera, Hydra, Minotaur, Phoenix). Use "Area contains additional Shaper Guardian" sextant. Spec into Shaper nodes on Atlas Passive Tree.'
-            },
-            'Formed': {
-                'method': 'Elder Guardian Maps',
-                'locations': ['Elder Guardian Maps'],
-                'strategy': 'Run Elder Guardian Maps. Use "Area contains additional Elder Guardian" sextant. Spec into Elder nodes on Atlas Passive Tree.'
-            },
-            'Twisted': {
-                'method': 'Breachlord Domains',
-                'locations': ['Breach Domains'],
-                'strategy': 'Run Breach Domains (Chayula, Uul-Netol, Tul, Esh, Xoph). Spec into Breach nodes on Atlas Passive Tree. Use Breach scarabs.'
-            },
-            'Mortal': {
-                'method': 'Atziri Farming',
-                'locations': ['Vaal Side Areas', 'Sacrifice Fragments'],
-                'strategy': 'Run Vaal Side Areas in maps. Use Sacrifice fragments in map device to spawn Vaal areas. Run normal Atziri to get Mortal fragments.'
-            },
-            'Sacrifice': {
-                'method': 'Vaal Side Area Farming',
-                'locations': ['Vaal Side Areas'],
-                'strategy': 'Run maps with "Area contains Vaal Side Areas" sextant. Use Vaal Fragments in map device to spawn additional Vaal Side Areas.'
-            },
-            'Simulacrum': {
-                'method': 'Delirium Mirror Farming',
-                'locations': ['Maps with Delirium passives'],
-                'strategy': 'Spec into Delirium nodes on Atlas Passive Tree. Use Delirium Orbs on maps. Run maps with Delirium scarabs.'
-            },
-            'Timeless': {
-                'method': 'Legion Farming',
-                'locations': ['Maps with Legion passives'],
-                'strategy': 'Spec into Legion nodes on Atlas Passive Tree. Use "Area contains additional Legion" sextant. Run maps with Legion scarabs.'
-            }
-        }
-        
-        # Check for partial matches
-        for key, strategy in strategies.items():
-            if key in fragment_name:
-                return strategy
-        
-        # Default strategy if fragment name not found
-        default_strategy = {
-            'method': 'General Fragment Farming',
-            'locations': ['High-tier Maps', 'Boss Encounters'],
-            'strategy': 'Run high-tier maps with boss-focused Atlas Passive Tree. Focus on completing Maven invitations and endgame boss encounters.'
-        }
-        
-        return default_strategy
+        # Partial match: the first catalog key contained in the fragment name
+        return self.strategy_catalogs[FRAGMENT_CATALOG].match(fragment_name)
     
     def analyze_oil_farming(self, oils):
         """Analyze oil farming opportunities"""
@@ -500,8 +557,8 @@ class AnalysisEngine:
                     'item': name,
                     'chaos_value': chaos_value,
                     'farming_method': 'Targeted Map Farming',
-                    'locations': farming_locations['maps'],
-                    'strategy': farming_locations['strategy'],
+                    'locations': list(farming_locations.get('maps', [])),
+                    'strategy': farming_locations.get('strategy', ''),
                     'opportunity_score': chaos_value * 0.6,  # Weight based on value
                     'league': div_card.get('league', PRIMARY_LEAGUE)
                 }
@@ -515,80 +572,7 @@ class AnalysisEngine:
     
     def get_div_card_farming_locations(self, card_name):
         """Get farming locations for a specific divination card"""
-        locations = {
-            'The Doctor': {
-                'maps': ['Burial Chambers', 'Spider Forest'],
-                'strategy': 'Farm Burial Chambers or Spider Forest maps. Use Divination scarabs and spec into Divination Card nodes on Atlas Passive Tree. Apply "Area contains additional Divination Cards" sextant.'
-            },
-            'The Nurse': {
-                'maps': ['Tower Map'],
-                'strategy': 'Farm Tower maps. Use Divination scarabs and spec into Divination Card nodes on Atlas Passive Tree. Apply "Area contains additional Divination Cards" sextant.'
-            },
-            'The Fiend': {
-                'maps': ['Putrid Cloister'],
-                'strategy': 'Farm Putrid Cloister unique maps. Use Divination scarabs and spec into Divination Card nodes on Atlas Passive Tree.'
-            },
-            'House of Mirrors': {
-                'maps': ['The Mirror of Kalandra (Reflection of Kalandra)'],
-                'strategy': 'Farm Reflection of Kalandra endgame content. This card is extremely rare and not target-farmable in a specific map.'
-            },
-            'The Demon': {
-                'maps': ['Uber Maven', 'Uber Elder'],
-                'strategy': 'Farm Uber Maven and Uber Elder encounters. Spec into Maven and Elder nodes on Atlas Passive Tree.'
-            },
-            'The Immortal': {
-                'maps': ['Hall of Grandmasters'],
-                'strategy': 'Farm Hall of Grandmasters unique map. Use Divination scarabs and spec into Divination Card nodes on Atlas Passive Tree.'
-            },
-            'The Iron Bard': {
-                'maps': ['Conservatory Map'],
-                'strategy': 'Farm Conservatory maps. Use Divination scarabs and spec into Divination Card nodes on Atlas Passive Tree. Apply "Area contains additional Divination Cards" sextant.'
-            },
-            'The Apothecary': {
-                'maps': ['Crimson Temple'],
-                'strategy': 'Farm Crimson Temple maps. Use Divination scarabs and spec into Divination Card nodes on Atlas Passive Tree. Apply "Area contains additional Divination Cards" sextant.'
-            },
-            'Unrequited Love': {
-                'maps': ['Terrace Map'],
-                'strategy': 'Farm Terrace maps. Use Divination scarabs and spec into Divination Card nodes on Atlas Passive Tree. Apply "Area contains additional Divination Cards" sextant.'
-            },
-            'The Enlightened': {
-                'maps': ['Scriptorium Map'],
-                'strategy': 'Farm Scriptorium maps. Use Divination scarabs and spec into Divination Card nodes on Atlas Passive Tree. Apply "Area contains additional Divination Cards" sextant.'
-            },
-            'The Sephirot': {
-                'maps': ['Excavation Map'],
-                'strategy': 'Farm Excavation maps. Use Divination scarabs and spec into Divination Card nodes on Atlas Passive Tree. Apply "Area contains additional Divination Cards" sextant.'
-            },
-            'Seven Years Bad Luck': {
-                'maps': ['Laboratory Map'],
-                'strategy': 'Farm Laboratory maps. Use Divination scarabs and spec into Divination Card nodes on Atlas Passive Tree. Apply "Area contains additional Divination Cards" sextant.'
-            },
-            'The Hoarder': {
-                'maps': ['Arcade Map', 'Burial Chambers Map'],
-                'strategy': 'Farm Arcade or Burial Chambers maps. Use Divination scarabs and spec into Divination Card nodes on Atlas Passive Tree. Apply "Area contains additional Divination Cards" sextant.'
-            },
-            'The Saint\'s Treasure': {
-                'maps': ['Arcade Map'],
-                'strategy': 'Farm Arcade maps. Use Divination scarabs and spec into Divination Card nodes on Atlas Passive Tree. Apply "Area contains additional Divination Cards" sextant.'
-            },
-            'Abandoned Wealth': {
-                'maps': ['Arsenal Map', 'Atoll Map'],
-                'strategy': 'Farm Arsenal or Atoll maps. Use Divination scarabs and spec into Divination Card nodes on Atlas Passive Tree. Apply "Area contains additional Divination Cards" sextant.'
-            }
-        }
-        
-        # Check for exact matches
-        if card_name in locations:
-            return locations[card_name]
-        
-        # Default locations if card name not found
-        default_locations = {
-            'maps': ['Any Map with Divination Card focus'],
-            'strategy': 'Spec into Divination Card nodes on Atlas Passive Tree. Use Divination scarabs on high-tier maps. Apply "Area contains additional Divination Cards" sextant. Check PoE Wiki for specific drop locations for this card.'
-        }
-        
-        return default_locations
+        return self.strategy_catalogs[DIV_CARD_CATALOG].lookup(card_name)
     
     def analyze_crafting_opportunities(self, market_data):
         """Analyze crafting opportunities"""
@@ -705,79 +689,71 @@ class AnalysisEngine:
     
     def analyze_investment_opportunities(self, market_data):
         """Analyze investment opportunities"""
-        investment_opportunities = []
-        
         try:
-            # Get all currencies and items
-            currencies = market_data.get('currencies', [])
-            fragments = market_data.get('fragments', [])
-            scarabs = market_data.get('scarabs', [])
-            oils = market_data.get('oils', [])
-            
-            # Combine all items
-            all_items = currencies + fragments + scarabs + oils
-            
-            # Filter items with price history data
-            items_with_history = [item for item in all_items if 'price_change' in item or 'receive_change' in item]
-            
-            # Calculate investment rating for each item
-            for item in items_with_history:
-                name = item.get('name', '')
-                chaos_value = item.get('chaos_value', 0)
-                
-                # Get price change (use receive_change for currencies, price_change for items)
-                price_change = item.get('receive_change', item.get('price_change', 0))
-                
-                # Skip items with no price data
-                if chaos_value <= 0:
-                    continue
-                
-                # Determine item type
-                if item in currencies:
-                    item_type = 'Currency'
-                elif item in fragments:
-                    item_type = 'Fragment'
-                elif item in scarabs:
-                    item_type = 'Scarab'
-                elif item in oils:
-                    item_type = 'Oil'
-                else:
-                    item_type = 'Other'
-                
-                # Calculate investment rating
-                investment_rating = self.calculate_investment_rating(chaos_value, price_change, item.get('trade_volume', 0))
-                
-                # Only include items with good investment potential
-                if investment_rating > 60:
-                    # Determine investment strategy based on price trend
-                    if price_change > 10:
-                        strategy = f"Short-term investment: {name} is rising in value (+{price_change}%). Buy now and sell within 1-3 days for quick profit. Current price: {chaos_value} chaos."
-                    elif price_change < -10:
-                        strategy = f"Long-term investment: {name} is currently undervalued ({price_change}%). Buy now while price is low and hold for 1-2 weeks until price recovers. Current price: {chaos_value} chaos."
-                    else:
-                        strategy = f"Stable investment: {name} has consistent value with moderate volatility. Good for bulk buying and selling when small price fluctuations occur. Current price: {chaos_value} chaos."
-                    
-                    opportunity = {
-                        'type': item_type,
-                        'item': name,
-                        'chaos_value': chaos_value,
-                        'price_change': price_change,
-                        'investment_rating': investment_rating,
-                        'strategy': strategy,
-                        'league': item.get('league', PRIMARY_LEAGUE)
-                    }
-                    investment_opportunities.append(opportunity)
-            
-            # Sort by investment rating
-            investment_opportunities.sort(key=lambda x: x.get('investment_rating', 0), reverse=True)
-            
-            # Limit to top 20 opportunities
-            return investment_opportunities[:20]
+            # Get all currencies and items from the category-tagged index
+            item_index = self.get_item_index(market_data)
+            all_items = item_index.items_in('currencies', 'fragments', 'scarabs', 'oils')
+            
+            # Rate only items that moved since the last snapshot
+            investment_opportunities = self._refresh_item_results(
+                'investments', item_index, all_items,
+                lambda items: self.find_investments(items, item_index)
+            )
+            
+            # Keep the top 20 opportunities by investment rating
+            return heapq.nlargest(20, investment_opportunities, key=lambda x: x.get('investment_rating', 0))
             
         except Exception as e:
             logger.error(f"Error analyzing investment opportunities: {e}")
             return []
     
+    def find_investments(self, items, item_index):
+        """Find investment opportunities, returning one entry (or None) per item"""
+        opportunities = [None] * len(items)
+        
+        # Only rate items with price history data and a price
+        rated = [
+            i for i, item in enumerate(items)
+            if ('price_change' in item or 'receive_change' in item) and item.get('chaos_value', 0) > 0
+        ]
+        
+        # Get price change (use receive_change for currencies, price_change for items)
+        price_changes = [items[i].get('receive_change', items[i].get('price_change', 0)) for i in rated]
+        
+        # Calculate investment ratings for all items in one pass
+        investment_ratings = self.calculate_investment_ratings(
+            [items[i].get('chaos_value', 0) for i in rated],
+            price_changes,
+            [items[i].get('trade_volume', 0) for i in rated]
+        )
+        
+        for i, price_change, investment_rating in zip(rated, price_changes, investment_ratings.tolist()):
+            item = items[i]
+            name = item.get('name', '')
+            chaos_value = item.get('chaos_value', 0)
+            
+            # Only include items with good investment potential
+            if investment_rating > 60:
+                # Determine investment strategy based on price trend
+                if price_change > 10:
+                    strategy = f"Short-term investment: {name} is rising in value (+{price_change}%). Buy now and sell within 1-3 days for quick profit. Current price: {chaos_value} chaos."
+                elif price_change < -10:
+                    strategy = f"Long-term investment: {name} is currently undervalued ({price_change}%). Buy now while price is low and hold for 1-2 weeks until price recovers. Current price: {chaos_value} chaos."
+                else:
+                    strategy = f"Stable investment: {name} has consistent value with moderate volatility. Good for bulk buying and selling when small price fluctuations occur. Current price: {chaos_value} chaos."
+                
+                opportunities[i] = {
+                    'type': item_index.type_of(item),
+                    'item': name,
+                    'chaos_value': chaos_value,
+                    'price_change': price_change,
+                    'investment_rating': investment_rating,
+                    'strategy': strategy,
+                    'league': item.get('league', PRIMARY_LEAGUE)
+                }
+        
+        return opportunities
+    
     def calculate_investment_rating(self, price, price_change, volume):
         """Calculate an investment rating for items based on price, change, and volume"""
         # Higher volume, higher price change (positive), and moderate price
@@ -793,6 +769,14 @@ class AnalysisEngine:
         
         return round(score, 1)
     
+    def calculate_investment_ratings(self, prices, price_changes, volumes):
+        """Calculate investment ratings for columns of prices, changes, and volumes in one vectorized pass"""
+        return scoring.investment_ratings(prices, price_changes, volumes)
+    
+    def calculate_opportunity_scores(self, profit_ratios, volatilities, volumes):
+        """Calculate opportunity scores for columns of profit ratios, volatilities, and volumes in one vectorized pass"""
+        return scoring.opportunity_scores(profit_ratios, volatilities, volumes)
+    
     def calculate_opportunity_score(self, profit_ratio, volatility, volume):
         """Calculate an opportunity score based on profit ratio, volatility, and volume"""
         # Higher profit ratio, moderate volatility, and higher volume
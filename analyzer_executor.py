@@ -0,0 +1,97 @@
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from config import ANALYZER_MAX_WORKERS, ANALYZER_TIMEOUT
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class AnalyzerExecutor:
+    """
+    Runs independent analyzers concurrently with a per-analyzer timeout
+
+    Analyzers share the in-memory snapshot and the engine's caches, so they
+    run in threads rather than processes. A thread cannot be killed, so an
+    analyzer that times out keeps running in the background while its
+    fallback result is used. The pool is kept between runs so that a stuck
+    analyzer only costs one worker.
+    """
+
+    def __init__(self, max_workers=ANALYZER_MAX_WORKERS, timeout=ANALYZER_TIMEOUT):
+        """Initialize the analyzer executor"""
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analyzer')
+
+    def _timed(self, analyzer, times):
+        """Run one analyzer, recording when it started and finished"""
+        times[0] = time.perf_counter()
+        try:
+            return analyzer()
+        finally:
+            times[1] = time.perf_counter()
+
+    def _wait(self, future, times):
+        """Wait for an analyzer, allowing the full timeout from when it started running"""
+        # An analyzer still queued for a free worker waits at most one timeout
+        queued_deadline = time.perf_counter() + self.timeout
+
+        while True:
+            deadline = times[0] + self.timeout if times[0] is not None else queued_deadline
+            try:
+                return future.result(timeout=max(deadline - time.perf_counter(), 0))
+            except FutureTimeoutError:
+                # It may have started while we waited; give it its own time then
+                if times[0] is None or times[0] + self.timeout <= time.perf_counter():
+                    raise
+
+    def run(self, analyzers, fallbacks=None):
+        """
+        Run analyzers concurrently and collect their results
+
+        Args:
+            analyzers (dict): Analyzer name -> callable taking no arguments
+            fallbacks (dict): Analyzer name -> result to use if it fails or times out
+
+        Returns:
+            tuple: (results by analyzer name, timings by analyzer name as
+                {'seconds': float, 'status': 'ok' | 'timeout' | 'error'})
+        """
+        fallbacks = fallbacks or {}
+        submitted = time.perf_counter()
+
+        futures = {}
+        for name, analyzer in analyzers.items():
+            times = [None, None]
+            futures[name] = (self._executor.submit(self._timed, analyzer, times), times)
+
+        results = {}
+        timings = {}
+        for name, (future, times) in futures.items():
+            try:
+                results[name] = self._wait(future, times)
+                status = 'ok'
+            except FutureTimeoutError:
+                future.cancel()
+                logger.warning(f"Analyzer {name} timed out after {self.timeout} seconds")
+                results[name] = fallbacks.get(name, [])
+                status = 'timeout'
+            except Exception as e:
+                logger.error(f"Analyzer {name} failed: {e}")
+                results[name] = fallbacks.get(name, [])
+                status = 'error'
+
+            # Timed-out analyzers are still running; report the time they were given
+            start = times[0] if times[0] is not None else submitted
+            finish = times[1] if times[1] is not None else time.perf_counter()
+            timings[name] = {
+                'seconds': round(finish - start, 4),
+                'status': status
+            }
+
+        return results, timings
+
+    def shutdown(self):
+        """Stop the worker threads without waiting for running analyzers"""
+        self._executor.shutdown(wait=False)
@@ -5,12 +5,19 @@ from datetime import datetime
 import time
 import threading
 import requests
-from flask import Flask, render_template, jsonify
+from flask import Flask, Response, render_template, jsonify, request
 from data_collector import DataCollector
 from analysis_engine import AnalysisEngine
 from data_integration import DataIntegration
+from poe_api import POETradeAPI
+from quantile_sketch import QuantileSketchStore
+from historical_store import HistoricalStore
+from market_read_cache import get_shared_market_cache
+from serialized_payload import SerializedPayload
+from stash_stream import StashStreamIngester
 from config import (
-    CURRENT_LEAGUES, PRIMARY_LEAGUE, UPDATE_INTERVAL,
+    CURRENT_LEAGUES, PRIMARY_LEAGUE, UPDATE_INTERVAL, CROSS_RATE_PAIRS, LIVE_RATE_CURRENCIES,
+    STASH_STREAM_ENABLED, STASH_STREAM_ACCESS_TOKEN,
     TEMPLATES_DIR, STATIC_DIR, OUTPUT_DIR, get_platform_path, ensure_dir_exists
 )
 
@@ -27,9 +34,20 @@ app = Flask(__name__,
 data_collector = DataCollector()
 analysis_engine = AnalysisEngine()
 data_integration = DataIntegration()
+historical_store = HistoricalStore()
+trade_api = POETradeAPI()
+
+# Parsed snapshots and top-N views for the API, replaced when the collector publishes
+market_cache = get_shared_market_cache()
+data_collector.add_publish_listener(market_cache.invalidate)
+
+# Live listing prices from the stash stream
+quantile_store = QuantileSketchStore()
+data_collector.add_listing_sink(quantile_store.add_listings)
 
 # Global variables
 last_update_time = 0
+last_quantile_version = 0
 opportunities = None
 update_lock = threading.Lock()
 initialization_complete = False
@@ -52,8 +70,29 @@ def get_opportunities():
     if opportunities is None or not initialization_complete:
         initialize_data()
     
-    # Return the opportunities
-    return jsonify(opportunities)
+    # Serve the body serialized and compressed once per refresh
+    if opportunities is analysis_engine.opportunities:
+        payload = analysis_engine.get_payload()
+    else:
+        payload = SerializedPayload(opportunities)
+    
+    return payload_response(payload)
+
+def payload_response(payload):
+    """Build a response for a pre-serialized payload, answering 304 when the client has it"""
+    encoding = payload.choose_encoding(request.accept_encodings)
+    headers = {
+        'ETag': f'"{payload.etags[encoding]}"',
+        'Cache-Control': 'no-cache',
+        'Vary': 'Accept-Encoding'
+    }
+    
+    if payload.matches(request.if_none_match):
+        return Response(status=304, headers=headers)
+    
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    return Response(payload.bodies[encoding], mimetype='application/json', headers=headers)
 
 @app.route('/api/update')
 def trigger_update():
@@ -88,6 +127,7 @@ def get_status():
         'last_update': datetime.fromtimestamp(last_update_time).isoformat() if last_update_time > 0 else None,
         'next_update': int(next_update),
         'update_interval': UPDATE_INTERVAL,
+        'analyzer_timings': analysis_engine.analyzer_timings,
         'status': 'ready'
     }
     
@@ -97,22 +137,10 @@ def get_status():
 def get_currency_data():
     """Get currency data for charts"""
     try:
-        # Get current league data
-        league_dir = get_platform_path(os.path.join(OUTPUT_DIR, 'data', 'current', PRIMARY_LEAGUE.lower()))
-        market_data_file = os.path.join(league_dir, 'market_data.json')
+        # Get top currencies by value, computed once per published snapshot
+        top_currencies = market_cache.top_currencies(PRIMARY_LEAGUE, 10)
         
-        if os.path.exists(market_data_file):
-            with open(market_data_file, 'r') as f:
-                market_data = json.load(f)
-                
-            # Get top currencies by value
-            currencies = market_data.get('currencies', [])
-            top_currencies = sorted(
-                [c for c in currencies if c.get('name') != 'Chaos Orb'],
-                key=lambda x: x.get('chaos_value', 0),
-                reverse=True
-            )[:10]
-            
+        if top_currencies is not None:
             return jsonify({
                 'status': 'success',
                 'currencies': top_currencies
@@ -133,59 +161,42 @@ def get_currency_data():
 def get_historical_data():
     """Get historical data for charts"""
     try:
-        # Get historical data
-        historical_data_file = get_platform_path(os.path.join(OUTPUT_DIR, 'data', 'historical', 'historical_data.json'))
+        # Pick up a rewritten historical data file
+        historical_store.refresh()
         
-        if os.path.exists(historical_data_file):
-            with open(historical_data_file, 'r') as f:
-                historical_data = json.load(f)
-            
-            # Create datasets for the top currencies
-            datasets = []
-            
-            # Get top currencies
-            league_dir = get_platform_path(os.path.join(OUTPUT_DIR, 'data', 'current', PRIMARY_LEAGUE.lower()))
-            market_data_file = os.path.join(league_dir, 'market_data.json')
-            
-            if os.path.exists(market_data_file):
-                with open(market_data_file, 'r') as f:
-                    market_data = json.load(f)
-                
-                currencies = market_data.get('currencies', [])
-                top_currencies = sorted(
-                    [c for c in currencies if c.get('name') != 'Chaos Orb'],
-                    key=lambda x: x.get('chaos_value', 0),
-                    reverse=True
-                )[:2]  # Get top 2 currencies
-                
-                colors = [
-                    {'border': 'rgba(255, 99, 132, 1)', 'background': 'rgba(255, 99, 132, 0.1)'},
-                    {'border': 'rgba(54, 162, 235, 1)', 'background': 'rgba(54, 162, 235, 0.1)'}
-                ]
-                
-                # Create datasets for each currency
-                for i, currency in enumerate(top_currencies):
-                    currency_name = currency.get('name')
-                    if currency_name in historical_data:
-                        datasets.append({
-                            'label': currency_name,
-                            'data': historical_data[currency_name],
-                            'borderColor': colors[i]['border'],
-                            'backgroundColor': colors[i]['background'],
-                            'tension': 0.4,
-                            'fill': True
-                        })
+        # Create datasets for the top currencies
+        datasets = []
+        
+        # Get top 2 currencies
+        top_currencies = market_cache.top_currencies(PRIMARY_LEAGUE, 2)
+        
+        if top_currencies is not None:
+            colors = [
+                {'border': 'rgba(255, 99, 132, 1)', 'background': 'rgba(255, 99, 132, 0.1)'},
+                {'border': 'rgba(54, 162, 235, 1)', 'background': 'rgba(54, 162, 235, 0.1)'}
+            ]
             
-            return jsonify({
-                'status': 'success',
-                'data': datasets
-            })
-        else:
-            # Generate sample historical data if file doesn't exist
-            return jsonify({
-                'status': 'success',
-                'data': []
-            })
+            # Create datasets for each currency
+            for i, currency in enumerate(top_currencies):
+                currency_name = currency.get('name')
+                entries = historical_store.history(currency_name, PRIMARY_LEAGUE,
+                                                   data_collector.get_snapshot_store(PRIMARY_LEAGUE))
+                if entries:
+                    datasets.append({
+                        'label': currency_name,
+                        'data': [entry.get('value') for entry in entries],
+                        'timestamps': [entry.get('timestamp') for entry in entries],
+                        'comparison': historical_store.compare_league_phase(currency_name, PRIMARY_LEAGUE),
+                        'borderColor': colors[i]['border'],
+                        'backgroundColor': colors[i]['background'],
+                        'tension': 0.4,
+                        'fill': True
+                    })
+        
+        return jsonify({
+            'status': 'success',
+            'data': datasets
+        })
     except Exception as e:
         logger.error(f"Error getting historical data: {e}")
         return jsonify({
@@ -209,7 +220,7 @@ def initialize_data():
 
 def update_data():
     """Update the data and analysis"""
-    global last_update_time, opportunities
+    global last_update_time, last_quantile_version, opportunities
     
     # Use a lock to prevent multiple updates at the same time
     if not update_lock.acquire(blocking=False):
@@ -219,15 +230,29 @@ def update_data():
     try:
         logger.info("Starting data update...")
         
-        # Collect data for all leagues
+        # Collect data for all leagues concurrently
         market_data = {}
-        for league in CURRENT_LEAGUES:
+        try:
+            market_data = data_collector.collect_leagues(CURRENT_LEAGUES)
+            logger.info(f"Collected data for {', '.join(market_data)} leagues")
+        except Exception as e:
+            logger.error(f"Error collecting league data: {e}")
+        
+        # Quote direct rates between currency pairs for multi-step flips
+        if CROSS_RATE_PAIRS:
             try:
-                league_data = data_collector.collect_all_data(league)
-                market_data[league] = league_data
-                logger.info(f"Collected data for {league} league")
+                analysis_engine.set_cross_rates(trade_api.get_pair_rates(PRIMARY_LEAGUE, CROSS_RATE_PAIRS))
             except Exception as e:
-                logger.error(f"Error collecting data for {league} league: {e}")
+                logger.error(f"Error getting cross rates: {e}")
+        
+        # poe.ninja answered 304 for every endpoint, no new listings arrived
+        # and trade rates held, so the previous integration and analysis are still current
+        quantile_version = quantile_store.version
+        if (market_data and not data_collector.last_changed_leagues and opportunities is not None
+                and quantile_version == last_quantile_version and not analysis_engine.has_pending_rates()):
+            logger.info("Market data unchanged since last update, skipping analysis")
+            last_update_time = time.time()
+            return
         
         # Integrate data from different leagues
         try:
@@ -237,6 +262,13 @@ def update_data():
             logger.error(f"Error integrating data: {e}")
             integrated_data = market_data.get(PRIMARY_LEAGUE, {})
         
+        # Price items with recent stash listings from their listing quantiles
+        try:
+            apply_listing_prices(integrated_data)
+            last_quantile_version = quantile_version
+        except Exception as e:
+            logger.error(f"Error applying listing prices: {e}")
+        
         # Analyze opportunities
         try:
             opportunities = analysis_engine.analyze_all_opportunities(integrated_data)
@@ -263,6 +295,19 @@ def update_data():
     finally:
         update_lock.release()
 
+def apply_listing_prices(integrated_data):
+    """Overlay stash listing quantiles on the integrated primary league data"""
+    if not len(quantile_store):
+        return
+    
+    # Listings priced in divines are converted at the current poe.ninja rate
+    for currency in integrated_data.get('currencies', []):
+        if currency.get('name') == 'Divine Orb' and currency.get('chaos_value'):
+            quantile_store.set_rates({'divine': currency['chaos_value']})
+    
+    updated = quantile_store.apply(integrated_data, PRIMARY_LEAGUE)
+    logger.info(f"Applied listing prices to {updated} items")
+
 def background_updater():
     """Background thread to update data periodically"""
     while True:
@@ -278,6 +323,16 @@ def background_updater():
             logger.error(f"Error in background updater: {e}")
             time.sleep(30)  # Sleep longer on error
 
+def rate_sweeper():
+    """Background thread sweeping live currency rates for the flipping analyzer"""
+    while True:
+        try:
+            # Each currency reaches the engine as soon as both of its quotes are in
+            trade_api.sweep_currency_rates(PRIMARY_LEAGUE, LIVE_RATE_CURRENCIES, callback=analysis_engine.set_trade_rates)
+        except Exception as e:
+            logger.error(f"Error in currency rate sweep: {e}")
+        time.sleep(UPDATE_INTERVAL)
+
 if __name__ == '__main__':
     # Ensure output directory exists
     ensure_dir_exists(get_platform_path(os.path.join(OUTPUT_DIR, 'data')))
@@ -286,5 +341,17 @@ if __name__ == '__main__':
     updater_thread = threading.Thread(target=background_updater, daemon=True)
     updater_thread.start()
     
+    # Sweep live currency rates outside the update, so a slow trade API never holds it up
+    if LIVE_RATE_CURRENCIES:
+        threading.Thread(target=rate_sweeper, daemon=True).start()
+    
+    # Follow the public stash stream for live listing prices
+    if STASH_STREAM_ENABLED and not STASH_STREAM_ACCESS_TOKEN:
+        logger.error("Stash stream enabled but POE_ACCESS_TOKEN is not set, not starting it")
+    elif STASH_STREAM_ENABLED:
+        ingester = StashStreamIngester(data_collector.publish_listings, leagues=CURRENT_LEAGUES,
+                                       access_token=STASH_STREAM_ACCESS_TOKEN)
+        threading.Thread(target=ingester.run, daemon=True).start()
+    
     # Start the Flask app
     app.run(host='0.0.0.0', port=5000, debug=False)
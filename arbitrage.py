@@ -0,0 +1,259 @@
+import math
+import logging
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Name of the currency every poe.ninja and trade API rate is quoted against
+CHAOS_ORB = 'Chaos Orb'
+
+# Loss per trade assumed when only a mid price (chaos_value) is known. Both
+# legs of a hub round trip pay it, so mid prices alone never form a cycle;
+# profitable cycles need a real quote on at least one leg
+DEFAULT_SPREAD = 0.01
+
+# poe.ninja names of trade API currency ids, so bulk exchange quotes join the
+# same graph nodes as poe.ninja rows
+TRADE_CURRENCY_NAMES = {
+    'chaos': 'Chaos Orb', 'divine': 'Divine Orb', 'exalted': 'Exalted Orb',
+    'ancient': 'Ancient Orb', 'annulment': 'Orb of Annulment', 'awakener': "Awakener's Orb",
+    'blessing-chayula': "Blessing of Chayula", 'blessing-esh': "Blessing of Esh",
+    'blessing-tul': "Blessing of Tul", 'blessing-uul': "Blessing of Uul-Netol",
+    'blessing-xoph': "Blessing of Xoph", 'crusader': "Crusader's Exalted Orb",
+    'elder': "Elder's Exalted Orb", 'hunter': "Hunter's Exalted Orb",
+    'redeemer': "Redeemer's Exalted Orb", 'shaper': "Shaper's Exalted Orb",
+    'warlord': "Warlord's Exalted Orb", 'veiled-chaos': 'Veiled Chaos Orb',
+    'vaal': 'Vaal Orb', 'regal': 'Regal Orb', 'orb-of-regret': 'Orb of Regret',
+    'orb-of-scouring': 'Orb of Scouring', 'orb-of-alchemy': 'Orb of Alchemy',
+    'orb-of-alteration': 'Orb of Alteration', 'orb-of-chance': 'Orb of Chance',
+    'orb-of-fusing': 'Orb of Fusing', 'jewellers-orb': "Jeweller's Orb",
+    'chromatic-orb': 'Chromatic Orb', 'orb-of-horizons': 'Orb of Horizons',
+    'harbinger-orb': "Harbinger's Orb", 'gemcutters-prism': "Gemcutter's Prism",
+    'glassblowers-bauble': "Glassblower's Bauble", 'blessed-orb': 'Blessed Orb',
+    'orb-of-binding': 'Orb of Binding', 'orb-of-engineering': "Engineer's Orb",
+    'orb-of-transmutation': 'Orb of Transmutation', 'mirror': 'Mirror of Kalandra',
+}
+
+class ExchangeGraph:
+    """
+    Directed graph of exchange rates between currencies
+
+    An edge ``source -> target`` with rate ``r`` means one unit of ``source``
+    buys ``r`` units of ``target``. A cycle is profitable when the product of
+    its rates is above 1, i.e. when the sum of ``-log(rate)`` along it is
+    negative, so arbitrage detection is negative-cycle detection.
+    """
+
+    def __init__(self):
+        """Initialize an empty exchange graph"""
+        self.nodes = []
+        self._node_ids = {}
+        self.rates = {}
+        self.volumes = {}
+
+    def _node(self, name):
+        """Get the index of a currency, adding it if needed"""
+        if name not in self._node_ids:
+            self._node_ids[name] = len(self.nodes)
+            self.nodes.append(name)
+        return self._node_ids[name]
+
+    def add_rate(self, source, target, rate, volume=0):
+        """Add an exchange rate, keeping the best rate if the edge already exists"""
+        if not rate or rate <= 0 or source == target or not math.isfinite(rate):
+            return
+
+        edge = (self._node(source), self._node(target))
+        if rate > self.rates.get(edge, 0):
+            self.rates[edge] = rate
+            self.volumes[edge] = volume
+
+    def add_market_rows(self, rows, hub=CHAOS_ORB):
+        """
+        Add edges to and from the hub currency for poe.ninja currency rows
+
+        Uses the pay/receive values when present, which include the real
+        spread, and falls back to ``chaos_value`` with an assumed spread.
+        """
+        for row in rows:
+            name = row.get('name')
+            if not name or name == hub:
+                continue
+
+            volume = row.get('trade_volume', 0)
+            receive_value = row.get('receive_value')
+            pay_value = row.get('pay_value')
+            chaos_value = row.get('chaos_value')
+
+            # receive_value: chaos paid for one unit; pay_value: units paid per chaos
+            if receive_value and receive_value > 0:
+                self.add_rate(hub, name, 1 / receive_value, volume)
+            elif chaos_value and chaos_value > 0:
+                self.add_rate(hub, name, (1 - DEFAULT_SPREAD) / chaos_value, volume)
+
+            if pay_value and pay_value > 0:
+                self.add_rate(name, hub, 1 / pay_value, volume)
+            elif chaos_value and chaos_value > 0:
+                self.add_rate(name, hub, chaos_value * (1 - DEFAULT_SPREAD), volume)
+
+    def add_trade_rates(self, currency_rates, hub='chaos', names=TRADE_CURRENCY_NAMES):
+        """Add edges from POETradeAPI.get_currency_rates results"""
+        hub_name = names.get(hub, hub)
+        for currency, rates in currency_rates.items():
+            if currency == hub or not rates:
+                continue
+
+            # buy_rate: units received per chaos; sell_rate: chaos received per unit
+            name = names.get(currency, currency)
+            if rates.get('buy_rate'):
+                self.add_rate(hub_name, name, rates['buy_rate'])
+            if rates.get('sell_rate'):
+                self.add_rate(name, hub_name, rates['sell_rate'])
+
+    def add_pair_rates(self, pair_rates, names=TRADE_CURRENCY_NAMES):
+        """
+        Add direct cross-rate edges from POETradeAPI.get_pair_rates results
+
+        Args:
+            pair_rates (dict): (have, want) trade currency ids -> units of want received per unit of have
+            names (dict): Node name of each trade currency id
+        """
+        for (have, want), rate in pair_rates.items():
+            self.add_rate(names.get(have, have), names.get(want, want), rate)
+
+    def _edge_arrays(self, disabled):
+        """Get the source, target and weight arrays for all enabled edges"""
+        edges = [edge for edge in self.rates if edge not in disabled]
+        if not edges:
+            return None, None, None
+
+        sources = np.fromiter((edge[0] for edge in edges), dtype=np.intp, count=len(edges))
+        targets = np.fromiter((edge[1] for edge in edges), dtype=np.intp, count=len(edges))
+        weights = -np.log(np.fromiter((self.rates[edge] for edge in edges), dtype=float, count=len(edges)))
+        return sources, targets, weights
+
+    def _find_negative_cycle(self, disabled):
+        """
+        Run vectorized Bellman-Ford from a virtual source and return one negative cycle
+
+        Every pass relaxes all edges at once with NumPy. A cycle in the
+        predecessor graph is always negative, so the predecessor graph is
+        checked periodically and the search stops as soon as one appears.
+        """
+        sources, targets, weights = self._edge_arrays(disabled)
+        if sources is None:
+            return None
+
+        node_count = len(self.nodes)
+        distances = np.zeros(node_count)
+        predecessors = np.full(node_count, -1, dtype=np.intp)
+        check_interval = max(1, int(math.sqrt(node_count)))
+
+        for iteration in range(1, node_count + 1):
+            candidates = distances[sources] + weights
+            improving = np.nonzero(candidates < distances[targets] - 1e-12)[0]
+            if len(improving) == 0:
+                return None
+
+            # Several edges may improve the same target; keep the best one
+            order = np.lexsort((candidates[improving], targets[improving]))
+            improving = improving[order]
+            _, first = np.unique(targets[improving], return_index=True)
+            improving = improving[first]
+
+            distances[targets[improving]] = candidates[improving]
+            predecessors[targets[improving]] = sources[improving]
+
+            if iteration % check_interval == 0 or iteration == node_count:
+                cycle = self._predecessor_cycle(predecessors)
+                if cycle:
+                    return cycle
+
+        return self._predecessor_cycle(predecessors)
+
+    def _predecessor_cycle(self, predecessors):
+        """Find a cycle in the predecessor graph, returned in trade order"""
+        predecessors = predecessors.tolist()
+        visited_by = [-1] * len(predecessors)
+
+        for start in range(len(predecessors)):
+            node = start
+            while node != -1 and visited_by[node] == -1:
+                visited_by[node] = start
+                node = predecessors[node]
+
+            if node != -1 and visited_by[node] == start:
+                # Walk the loop once more to collect it; predecessors point
+                # backwards, so reverse to get the direction of trade
+                cycle = [node]
+                current = predecessors[node]
+                while current != node:
+                    cycle.append(current)
+                    current = predecessors[current]
+                cycle.reverse()
+                return cycle
+
+        return None
+
+    def _canonical_cycle(self, cycle, hub):
+        """Rotate a cycle to start at the hub, or at its first currency by name"""
+        names = [self.nodes[node] for node in cycle]
+        start = names.index(hub) if hub in names else names.index(min(names))
+        return cycle[start:] + cycle[:start]
+
+    def find_cycles(self, min_profit_percent=0.0, max_cycles=10, hub=CHAOS_ORB):
+        """
+        Find profitable exchange cycles of any length
+
+        Each search finds one negative cycle; its first edge is then disabled
+        so the next search can surface a different one.
+
+        Args:
+            min_profit_percent (float): Minimum profit of a full cycle, in percent
+            max_cycles (int): Maximum number of cycles to return
+            hub (str): Currency cycles are rotated to start from when present
+
+        Returns:
+            list: Cycles as dicts with the currency path, rate product and profit
+        """
+        cycles = []
+        disabled = set()
+        seen = set()
+
+        # Each search disables one edge, so this bounds the number of searches
+        for _ in range(max(max_cycles, 1) * 4):
+            if len(cycles) >= max_cycles:
+                break
+
+            cycle = self._find_negative_cycle(disabled)
+            if not cycle:
+                break
+
+            cycle = self._canonical_cycle(cycle, hub)
+            disabled.add((cycle[0], cycle[1]))
+
+            key = tuple(cycle)
+            if key in seen:
+                continue
+            seen.add(key)
+
+            steps = list(zip(cycle, cycle[1:] + cycle[:1]))
+            product = 1.0
+            for step in steps:
+                product *= self.rates[step]
+
+            profit_percent = (product - 1) * 100
+            if profit_percent < min_profit_percent:
+                continue
+
+            cycles.append({
+                'path': [self.nodes[node] for node in cycle] + [self.nodes[cycle[0]]],
+                'rate_product': product,
+                'profit_percent': profit_percent,
+                'min_volume': min(self.volumes.get(step, 0) for step in steps)
+            })
+
+        cycles.sort(key=lambda x: x['profit_percent'], reverse=True)
+        return cycles
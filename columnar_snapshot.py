@@ -0,0 +1,338 @@
+import os
+import json
+import mmap
+import struct
+import logging
+import numpy as np
+from config import is_windows, get_platform_path
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b'POECOL1\n'
+SNAPSHOT_FILE_NAME = 'market_data.col'
+JSON_SNAPSHOT_FILE_NAME = 'market_data.json'
+
+# Column kinds and the dtype each one is stored as
+COLUMN_DTYPES = {
+    'float': np.dtype('<f8'),
+    'int': np.dtype('<i8'),
+    'bool': np.dtype('u1'),
+    'str': np.dtype('<i4'),
+    'json': np.dtype('<i4'),
+}
+
+def _column_kind(values):
+    """Pick the narrowest column kind that can hold every non-missing value"""
+    present = [v for v in values if v is not None]
+    if not present:
+        return 'str'
+    if all(isinstance(v, bool) for v in present):
+        return 'bool'
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in present):
+        return 'int'
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        return 'float'
+    if all(isinstance(v, str) for v in present):
+        return 'str'
+    return 'json'
+
+def write_snapshot(path, market_data, league=None):
+    """
+    Write market data in the columnar snapshot format
+
+    Each category is stored as one little-endian array per field. Text fields
+    hold indexes into a shared string table, so names, leagues and timestamps
+    repeated on every row are stored once. A per-column mask marks rows where
+    a field is absent or None, so records can be rebuilt exactly.
+
+    Args:
+        path (str): Destination file
+        market_data (dict): Market data as produced by DataCollector
+        league (str): League the data belongs to
+    """
+    strings = []
+    string_ids = {}
+
+    def intern(value):
+        if value not in string_ids:
+            string_ids[value] = len(strings)
+            strings.append(value)
+        return string_ids[value]
+
+    categories = {}
+    blobs = []
+    position = 0
+
+    def add_blob(array):
+        nonlocal position
+        data = array.tobytes()
+        # Keep every array 8-byte aligned so it can be viewed in place
+        padding = (-len(data)) % 8
+        blobs.append(data + b'\0' * padding)
+        offset = position
+        position += len(data) + padding
+        return offset
+
+    for category, rows in market_data.items():
+        if not isinstance(rows, list):
+            continue
+
+        # Union of keys in first-seen order so rebuilt records keep key order
+        keys = []
+        seen = set()
+        for row in rows:
+            for key in row:
+                if key not in seen:
+                    seen.add(key)
+                    keys.append(key)
+
+        columns = {}
+        for key in keys:
+            values = [row.get(key) for row in rows]
+            kind = _column_kind(values)
+            missing = np.array([key not in row for row in rows], dtype='u1')
+            nulls = np.array([value is None for value in values], dtype='u1')
+
+            if kind in ('str', 'json'):
+                encoded = [
+                    -1 if value is None else intern(value if kind == 'str' else json.dumps(value))
+                    for value in values
+                ]
+            else:
+                encoded = [0 if value is None else value for value in values]
+
+            # poe.ninja mixes ints and floats in the same field (25 vs 25.0);
+            # remember which rows were ints so JSON export is unchanged
+            ints = None
+            if kind == 'float':
+                ints = np.array([isinstance(value, int) for value in values], dtype='u1')
+
+            column = {
+                'kind': kind,
+                'offset': add_blob(np.array(encoded, dtype=COLUMN_DTYPES[kind])),
+                'missing': add_blob(missing) if missing.any() else None,
+                'nulls': add_blob(nulls) if nulls.any() else None,
+                'ints': add_blob(ints) if ints is not None and ints.any() else None,
+            }
+            columns[key] = column
+
+        categories[category] = {'rows': len(rows), 'keys': keys, 'columns': columns}
+
+    header = json.dumps({
+        'league': league,
+        'timestamp': market_data.get('timestamp'),
+        'strings': strings,
+        'categories': categories,
+    }).encode('utf-8')
+    header += b' ' * ((-len(header) - len(SNAPSHOT_MAGIC) - 8) % 8)
+
+    # Write beside the destination and swap in, so readers never see a partial file
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(temp_path, path)
+
+class CategoryColumns:
+    """Column access to one category of a columnar snapshot"""
+
+    def __init__(self, snapshot, name, meta):
+        """Initialize the category view"""
+        self.snapshot = snapshot
+        self.name = name
+        self.rows = meta['rows']
+        self.keys = meta['keys']
+        self._columns = meta['columns']
+
+    def __len__(self):
+        return self.rows
+
+    def has_column(self, key):
+        """Check whether the category has a field"""
+        return key in self._columns
+
+    def _array(self, offset, dtype):
+        """View a stored array in place without copying"""
+        return np.frombuffer(self.snapshot.buffer, dtype=dtype, count=self.rows,
+                             offset=self.snapshot.data_offset + offset)
+
+    def column(self, key):
+        """
+        Get a field as an array
+
+        Numeric fields are returned as stored, with NaN for missing float
+        values. Text fields are returned as int32 indexes into the snapshot's
+        string table (-1 for missing); use ``strings`` to decode them.
+        """
+        meta = self._columns.get(key)
+        if meta is None:
+            return np.full(self.rows, np.nan)
+
+        array = self._array(meta['offset'], COLUMN_DTYPES[meta['kind']])
+        if meta['kind'] == 'float' and (meta['missing'] is not None or meta['nulls'] is not None):
+            array = np.where(self.present(key), array, np.nan)
+        return array
+
+    def present(self, key):
+        """Get a boolean mask of rows where a field is set and not None"""
+        meta = self._columns.get(key)
+        if meta is None:
+            return np.zeros(self.rows, dtype=bool)
+
+        mask = np.ones(self.rows, dtype=bool)
+        if meta['missing'] is not None:
+            mask &= self._array(meta['missing'], COLUMN_DTYPES['bool']) == 0
+        if meta['nulls'] is not None:
+            mask &= self._array(meta['nulls'], COLUMN_DTYPES['bool']) == 0
+        return mask
+
+    def strings(self, key, rows=None):
+        """Decode a text field for all rows, or for the given row indexes"""
+        indexes = self.column(key)
+        if rows is not None:
+            indexes = indexes[rows]
+        table = self.snapshot.strings
+        return [table[i] if i >= 0 else None for i in indexes.tolist()]
+
+    def record(self, row):
+        """Rebuild the original dict for a single row"""
+        return self.records([row])[0]
+
+    def records(self, rows=None):
+        """Rebuild the original dicts for all rows, or for the given row indexes"""
+        rows = np.arange(self.rows) if rows is None else np.asarray(rows, dtype=np.intp)
+        table = self.snapshot.strings
+        count = len(rows)
+
+        # Decode column by column, then assemble rows, so the per-row work is
+        # plain list indexing
+        fields = []
+        for key in self.keys:
+            meta = self._columns[key]
+            values = self._array(meta['offset'], COLUMN_DTYPES[meta['kind']])[rows].tolist()
+
+            if meta['kind'] == 'str':
+                values = [table[i] if i >= 0 else None for i in values]
+            elif meta['kind'] == 'json':
+                values = [json.loads(table[i]) if i >= 0 else None for i in values]
+            elif meta['kind'] == 'bool':
+                values = [bool(v) for v in values]
+            elif meta.get('ints') is not None:
+                ints = self._array(meta['ints'], COLUMN_DTYPES['bool'])[rows].tolist()
+                values = [int(value) if is_int else value for value, is_int in zip(values, ints)]
+
+            if meta['nulls'] is not None:
+                nulls = self._array(meta['nulls'], COLUMN_DTYPES['bool'])[rows].tolist()
+                values = [None if null else value for value, null in zip(values, nulls)]
+
+            missing = None
+            if meta['missing'] is not None:
+                missing = self._array(meta['missing'], COLUMN_DTYPES['bool'])[rows].tolist()
+
+            fields.append((key, values, missing))
+
+        records = [{} for _ in range(count)]
+        for key, values, missing in fields:
+            for index in range(count):
+                if missing is None or not missing[index]:
+                    records[index][key] = values[index]
+
+        return records
+
+    def top_n(self, key='chaos_value', n=10, exclude_names=()):
+        """Get the records with the highest values of a numeric field, highest first"""
+        values = self.column(key).astype(float)
+        values = np.where(np.isnan(values), -np.inf, values)
+
+        if exclude_names:
+            excluded = {self.snapshot.string_id(name) for name in exclude_names} - {None}
+            if excluded:
+                names = self.column('name')
+                values = np.where(np.isin(names, list(excluded)), -np.inf, values)
+
+        # Stable sort on the negated values matches sorted(..., reverse=True)
+        order = np.argsort(-values, kind='stable')
+        order = [row for row in order[:n].tolist() if values[row] != -np.inf]
+        return self.records(order) if order else []
+
+class ColumnarSnapshot:
+    """Read-only, memory-mapped view of a columnar market snapshot"""
+
+    def __init__(self, path):
+        """Open a snapshot file"""
+        self.path = path
+
+        with open(path, 'rb') as f:
+            if is_windows():
+                # A mapped file cannot be replaced on Windows, which would block
+                # the collector from publishing the next snapshot
+                self.buffer = f.read()
+            else:
+                self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.buffer[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise ValueError(f"Not a columnar market snapshot: {path}")
+
+        header_start = len(SNAPSHOT_MAGIC) + 8
+        header_length = struct.unpack('<Q', self.buffer[len(SNAPSHOT_MAGIC):header_start])[0]
+        header = json.loads(bytes(self.buffer[header_start:header_start + header_length]))
+
+        self.data_offset = header_start + header_length
+        self.league = header.get('league')
+        self.timestamp = header.get('timestamp')
+        self.strings = header['strings']
+        self._string_ids = None
+        self._categories = header['categories']
+
+    def string_id(self, value):
+        """Get the string table index of a value, or None if it does not occur"""
+        if self._string_ids is None:
+            self._string_ids = {value: index for index, value in enumerate(self.strings)}
+        return self._string_ids.get(value)
+
+    def categories(self):
+        """Get the category names in the snapshot"""
+        return list(self._categories.keys())
+
+    def category(self, name):
+        """Get column access to a category"""
+        meta = self._categories.get(name, {'rows': 0, 'keys': [], 'columns': {}})
+        return CategoryColumns(self, name, meta)
+
+    def to_market_data(self):
+        """Rebuild the full market data dict, e.g. for JSON export"""
+        market_data = {name: self.category(name).records() for name in self._categories}
+        market_data['timestamp'] = self.timestamp
+        return market_data
+
+def open_league_snapshot(league_dir):
+    """
+    Open the columnar snapshot in a league directory
+
+    If only a JSON snapshot exists, it is converted once so later reads can
+    use the columnar file.
+
+    Returns:
+        ColumnarSnapshot: The snapshot, or None if the league has no data
+    """
+    league_dir = get_platform_path(league_dir)
+    snapshot_file = os.path.join(league_dir, SNAPSHOT_FILE_NAME)
+    json_file = os.path.join(league_dir, JSON_SNAPSHOT_FILE_NAME)
+
+    try:
+        if not os.path.exists(snapshot_file):
+            if not os.path.exists(json_file):
+                return None
+            with open(json_file, 'r') as f:
+                write_snapshot(snapshot_file, json.load(f))
+            logger.info(f"Converted {json_file} to columnar format")
+
+        return ColumnarSnapshot(snapshot_file)
+    except Exception as e:
+        logger.error(f"Error opening market snapshot in {league_dir}: {e}")
+        return None
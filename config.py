@@ -13,26 +13,108 @@ CURRENT_LEAGUES = ['Phrecia', 'Settlers']
 PRIMARY_LEAGUE = 'Phrecia'
 HISTORICAL_LEAGUE = 'Settlers'
 
+# Past leagues the primary league is also compared against, most recent
+# first; their snapshots are read from data/archive/<league>/
+ARCHIVED_LEAGUES = []
+
 # Update interval in seconds (15 minutes)
 UPDATE_INTERVAL = 15 * 60
 
+# Maximum number of concurrent poe.ninja requests during a collection run
+COLLECTION_MAX_WORKERS = 8
+
+# Also export each league snapshot as market_data.json next to the columnar file
+EXPORT_JSON_SNAPSHOT = False
+
+# Only recompute opportunities for items that moved since the previous analysis
+INCREMENTAL_ANALYSIS = True
+
+# Analyzers run concurrently; one that runs longer than the timeout (seconds)
+# is skipped and its previous opportunities are kept
+ANALYZER_MAX_WORKERS = 4
+ANALYZER_TIMEOUT = 60
+
+# Trade API rate limiting: hits kept in reserve in every rate-limit window,
+# and retries after a 429 response
+TRADE_API_RATE_LIMIT_MARGIN = 1
+TRADE_API_MAX_RETRIES = 2
+
+# Bulk exchange pairs (have, want trade currency ids) quoted directly before
+# each analysis, so multi-step flips can route between non-chaos currencies,
+# e.g. [('divine', 'exalted'), ('exalted', 'divine')]. Each pair costs paced
+# trade API calls during every refresh, so this is opt-in; empty uses
+# poe.ninja rates against chaos only
+CROSS_RATE_PAIRS = []
+
+# Trade currency ids whose live bulk exchange buy/sell rates against chaos are
+# swept in the background every UPDATE_INTERVAL and added to the flipping
+# analyzer's exchange graph as each currency completes, e.g. ['divine',
+# 'exalted']. Opt-in for the same reason as CROSS_RATE_PAIRS
+LIVE_RATE_CURRENCIES = []
+
+# Maximum concurrent trade API queries in a currency rate sweep; the rate
+# limiter still paces them to the server's budget
+TRADE_API_MAX_WORKERS = 4
+
+# HTTP connection pooling and timeouts (seconds) shared by the poe.ninja and
+# trade API clients; pools hold one keep-alive connection per worker
+TRADE_API_POOL_SIZE = TRADE_API_MAX_WORKERS
+HTTP_CONNECT_TIMEOUT = 5
+HTTP_READ_TIMEOUT = 30
+
+# Trade API result cache: seconds a result stays fresh per query kind, and the
+# memory bound (bytes) before least recently used results are evicted
+TRADE_CACHE_TTLS = {
+    'search': 300,
+    'exchange': 60,
+}
+TRADE_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# Seconds between checks of a cached market snapshot's file time; snapshots
+# published by this process replace the cache immediately
+MARKET_CACHE_CHECK_INTERVAL = 5
+
+# Seconds to wait between public stash stream pages when the server sends no
+# rate-limit headers, and after a failed page
+STASH_STREAM_POLL_INTERVAL = 1
+
+# Follow the public stash stream in the background and price items from its listings
+STASH_STREAM_ENABLED = False
+
+# OAuth access token with the service:psapi scope, required by the stash stream
+STASH_STREAM_ACCESS_TOKEN = os.environ.get('POE_ACCESS_TOKEN')
+
+# Listing price sketches: seconds after which a listing counts half as much,
+# t-digest compression (about the centroids kept per item), and the decayed
+# listing weight an item needs before its quantiles replace chaos_value
+QUANTILE_HALF_LIFE = 6 * 60 * 60
+QUANTILE_COMPRESSION = 100
+QUANTILE_MIN_WEIGHT = 5
+
 # Directory paths - using relative paths for cross-platform compatibility
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, 'data')
 CURRENT_DATA_DIR = os.path.join(DATA_DIR, 'current')
 HISTORICAL_DATA_DIR = os.path.join(DATA_DIR, 'historical')
+SNAPSHOT_DATA_DIR = os.path.join(DATA_DIR, 'snapshots')
+ARCHIVE_DATA_DIR = os.path.join(DATA_DIR, 'archive')
 REFERENCE_DATA_DIR = os.path.join(DATA_DIR, 'reference')
+CACHE_DIR = os.path.join(DATA_DIR, 'cache')
+HTTP_CACHE_DIR = os.path.join(CACHE_DIR, 'http')
+STASH_STREAM_DIR = os.path.join(DATA_DIR, 'stream')
 OUTPUT_DIR = os.path.join(BASE_DIR, 'output')
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 STATIC_DIR = os.path.join(BASE_DIR, 'static')
 
 # File paths
 REFERENCE_DATA_FILE = os.path.join(REFERENCE_DATA_DIR, 'reference_data.json')
+HISTORICAL_DATA_FILE = os.path.join(HISTORICAL_DATA_DIR, 'historical_data.json')
 
 # API URLs
 POE_NINJA_API_BASE = 'https://poe.ninja/api/data'
 POE_NINJA_CURRENCY_URL = f'{POE_NINJA_API_BASE}/currencyoverview'
 POE_NINJA_ITEM_URL = f'{POE_NINJA_API_BASE}/itemoverview'
+PUBLIC_STASH_API_URL = 'https://api.pathofexile.com/public-stash-tabs'
 
 # Currency types
 CURRENCY_TYPES = ['Currency']
@@ -100,7 +182,12 @@ def initialize_directories():
         DATA_DIR,
         CURRENT_DATA_DIR,
         HISTORICAL_DATA_DIR,
+        SNAPSHOT_DATA_DIR,
+        ARCHIVE_DATA_DIR,
         REFERENCE_DATA_DIR,
+        CACHE_DIR,
+        HTTP_CACHE_DIR,
+        STASH_STREAM_DIR,
         OUTPUT_DIR,
         os.path.join(OUTPUT_DIR, 'data'),
     ]
@@ -1,10 +1,16 @@
 import os
 import json
 import logging
-import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from http_session import create_session
+from http_cache import HTTPCache
+from snapshot_store import SnapshotStore
+from scoring import investment_ratings
+from columnar_snapshot import write_snapshot, SNAPSHOT_FILE_NAME, JSON_SNAPSHOT_FILE_NAME
 from config import (
-    POE_NINJA_API_BASE, DATA_DIR, CURRENT_LEAGUES,
+    POE_NINJA_API_BASE, DATA_DIR, CURRENT_LEAGUES, COLLECTION_MAX_WORKERS, EXPORT_JSON_SNAPSHOT,
     CURRENCY_TYPES, FRAGMENT_TYPES, OIL_TYPES, INCUBATOR_TYPES,
     ARTIFACT_TYPES, DIVINATION_CARD_TYPES, SCARAB_TYPES,
     CURRENCY_TYPE_URLS, ITEM_TYPE_URLS,
@@ -18,111 +24,186 @@ logger = logging.getLogger(__name__)
 class DataCollector:
     """Class for collecting data from poe.ninja API"""
     
-    def __init__(self):
+    def __init__(self, max_workers=COLLECTION_MAX_WORKERS):
         """Initialize the data collector"""
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.max_workers = max_workers
+        # Size the connection pool so concurrent fetches reuse keep-alive
+        # connections instead of discarding them
+        self.session = create_session(max_workers, headers={
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
-    
-    def collect_all_data(self, league):
-        """Collect all data for a specific league"""
-        logger.info(f"Starting collection of all data for {league} league...")
         
-        # Create directory for league data
-        league_dir = get_platform_path(os.path.join(DATA_DIR, 'current', league.lower()))
-        ensure_dir_exists(league_dir)
+        # Conditional GET state: validators and bodies on disk, parsed rows in memory
+        self.http_cache = HTTPCache()
+        self._parsed_overviews = {}
+        self._changed_leagues = set()
+        self._changed_lock = threading.Lock()
+        self.last_changed_leagues = set()
         
-        # Initialize data structure
-        market_data = {
-            'currencies': [],
-            'fragments': [],
-            'oils': [],
-            'incubators': [],
-            'artifacts': [],
-            'divination_cards': [],
-            'scarabs': [],
-            'timestamp': datetime.now().isoformat()
-        }
+        # Append-only history per league
+        self.snapshot_stores = {}
         
-        # Collect currency data
-        for currency_type in CURRENCY_TYPES:
-            try:
-                logger.info(f"Fetching {currency_type} data for {league}...")
-                currency_data = self._fetch_currency_data(league, currency_type)
-                market_data['currencies'].extend(currency_data)
-                logger.info(f"Processed {len(currency_data)} {currency_type} entries for {league}")
-            except Exception as e:
-                logger.error(f"Error fetching {currency_type} data for {league}: {e}")
+        # Consumers of listings from the public stash stream
+        self.listing_sinks = []
         
-        # Collect fragment data
-        for fragment_type in FRAGMENT_TYPES:
+        # Called with the league name after a league snapshot is published
+        self.publish_listeners = []
+    
+    def add_listing_sink(self, sink):
+        """Register a callable that receives each batch of stash stream listings"""
+        self.listing_sinks.append(sink)
+    
+    def add_publish_listener(self, listener):
+        """Register a callable that is told when a league's saved market data changes"""
+        self.publish_listeners.append(listener)
+    
+    def publish_listings(self, listings):
+        """Pass a batch of normalized listings to every registered sink"""
+        for sink in self.listing_sinks:
             try:
-                logger.info(f"Fetching {fragment_type} data for {league}...")
-                fragment_data = self._fetch_currency_data(league, fragment_type)
-                market_data['fragments'].extend(fragment_data)
-                logger.info(f"Processed {len(fragment_data)} {fragment_type} entries for {league}")
+                sink(listings)
             except Exception as e:
-                logger.error(f"Error fetching {fragment_type} data for {league}: {e}")
+                logger.error(f"Error in listing sink {sink}: {e}")
+    
+    def collect_all_data(self, league, max_workers=None):
+        """Collect all data for a specific league"""
+        return self.collect_leagues([league], max_workers=max_workers)[league]
+    
+    def collect_leagues(self, leagues, max_workers=None):
+        """Collect all data for several leagues, fetching every (league, category) pair concurrently"""
+        if max_workers is None:
+            max_workers = self.max_workers
         
-        # Collect oil data
-        for oil_type in OIL_TYPES:
-            try:
-                logger.info(f"Fetching {oil_type} data for {league}...")
-                oil_data = self._fetch_item_data(league, oil_type)
-                market_data['oils'].extend(oil_data)
-                logger.info(f"Processed {len(oil_data)} {oil_type} entries for {league}")
-            except Exception as e:
-                logger.error(f"Error fetching {oil_type} data for {league}: {e}")
+        logger.info(f"Starting collection of all data for {', '.join(leagues)} with up to {max_workers} concurrent requests...")
         
-        # Collect scarab data
-        for scarab_type in SCARAB_TYPES:
-            try:
-                logger.info(f"Fetching {scarab_type} data for {league}...")
-                scarab_data = self._fetch_item_data(league, scarab_type)
-                market_data['scarabs'].extend(scarab_data)
-                logger.info(f"Processed {len(scarab_data)} {scarab_type} entries for {league}")
-            except Exception as e:
-                logger.error(f"Error fetching {scarab_type} data for {league}: {e}")
+        with self._changed_lock:
+            self._changed_leagues = set()
         
-        # Collect incubator data
-        for incubator_type in INCUBATOR_TYPES:
-            try:
-                logger.info(f"Fetching {incubator_type} data for {league}...")
-                incubator_data = self._fetch_item_data(league, incubator_type)
-                market_data['incubators'].extend(incubator_data)
-                logger.info(f"Processed {len(incubator_data)} {incubator_type} entries for {league}")
-            except Exception as e:
-                logger.error(f"Error fetching {incubator_type} data for {league}: {e}")
+        tasks = self._collection_tasks()
+        jobs = [(league, category, fetch_type, fetcher) for league in leagues for category, fetch_type, fetcher in tasks]
         
-        # Collect artifact data
-        for artifact_type in ARTIFACT_TYPES:
-            try:
-                logger.info(f"Fetching {artifact_type} data for {league}...")
-                artifact_data = self._fetch_item_data(league, artifact_type)
-                market_data['artifacts'].extend(artifact_data)
-                logger.info(f"Processed {len(artifact_data)} {artifact_type} entries for {league}")
-            except Exception as e:
-                logger.error(f"Error fetching {artifact_type} data for {league}: {e}")
+        # Fan out over the shared session; results are keyed by job so the
+        # assembled snapshot keeps the same ordering as a sequential run
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {
+                executor.submit(self._collect_category, league, fetch_type, fetcher): index
+                for index, (league, category, fetch_type, fetcher) in enumerate(jobs)
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        
+        all_market_data = {}
+        for league in leagues:
+            all_market_data[league] = {
+                'currencies': [],
+                'fragments': [],
+                'oils': [],
+                'incubators': [],
+                'artifacts': [],
+                'divination_cards': [],
+                'scarabs': [],
+                'timestamp': datetime.now().isoformat()
+            }
+        
+        for index, (league, category, fetch_type, fetcher) in enumerate(jobs):
+            all_market_data[league][category].extend(results.get(index, []))
+        
+        # Leagues where every endpoint answered 304 are already on disk, unless
+        # the snapshot file is missing (e.g. the first run after an upgrade)
+        self.last_changed_leagues = set(self._changed_leagues)
+        for league in leagues:
+            if league in self.last_changed_leagues:
+                self._save_market_data(league, all_market_data[league])
+                self.get_snapshot_store(league).append(all_market_data[league])
+            elif not os.path.exists(self._market_data_file(league)):
+                logger.info(f"No changes published for {league}, but it has no saved snapshot yet")
+                self._save_market_data(league, all_market_data[league])
+            else:
+                logger.info(f"No changes published for {league}, keeping saved market data")
+        
+        return all_market_data
+    
+    def get_snapshot_store(self, league):
+        """Get the append-only snapshot store for a league"""
+        if league not in self.snapshot_stores:
+            self.snapshot_stores[league] = SnapshotStore(league)
+        return self.snapshot_stores[league]
+    
+    def _collection_tasks(self):
+        """Get the (market data key, poe.ninja type, fetcher) triples that make up a league snapshot"""
+        tasks = []
+        tasks.extend(('currencies', currency_type, self._fetch_currency_data) for currency_type in CURRENCY_TYPES)
+        tasks.extend(('fragments', fragment_type, self._fetch_currency_data) for fragment_type in FRAGMENT_TYPES)
+        tasks.extend(('oils', oil_type, self._fetch_item_data) for oil_type in OIL_TYPES)
+        tasks.extend(('scarabs', scarab_type, self._fetch_item_data) for scarab_type in SCARAB_TYPES)
+        tasks.extend(('incubators', incubator_type, self._fetch_item_data) for incubator_type in INCUBATOR_TYPES)
+        tasks.extend(('artifacts', artifact_type, self._fetch_item_data) for artifact_type in ARTIFACT_TYPES)
+        tasks.extend(('divination_cards', div_card_type, self._fetch_item_data) for div_card_type in DIVINATION_CARD_TYPES)
+        return tasks
+    
+    def _collect_category(self, league, fetch_type, fetcher):
+        """Fetch a single category for a league, logging and swallowing errors"""
+        try:
+            logger.info(f"Fetching {fetch_type} data for {league}...")
+            data = fetcher(league, fetch_type)
+            logger.info(f"Processed {len(data)} {fetch_type} entries for {league}")
+            return data
+        except Exception as e:
+            logger.error(f"Error fetching {fetch_type} data for {league}: {e}")
+            return []
+    
+    def _market_data_file(self, league):
+        """Get the path of a league's saved columnar snapshot"""
+        return get_platform_path(os.path.join(DATA_DIR, 'current', league.lower(), SNAPSHOT_FILE_NAME))
+    
+    def _save_market_data(self, league, market_data):
+        """Save the collected market data for a league to file"""
+        # Create directory for league data
+        league_dir = get_platform_path(os.path.join(DATA_DIR, 'current', league.lower()))
+        ensure_dir_exists(league_dir)
+        
+        market_data_file = self._market_data_file(league)
+        write_snapshot(market_data_file, market_data, league=league)
+        
+        if EXPORT_JSON_SNAPSHOT:
+            json_file = get_platform_path(os.path.join(league_dir, JSON_SNAPSHOT_FILE_NAME))
+            with open(json_file, 'w') as f:
+                json.dump(market_data, f, indent=4)
         
-        # Collect divination card data
-        for div_card_type in DIVINATION_CARD_TYPES:
+        logger.info(f"Saved market data for {league} to {market_data_file}")
+        
+        for listener in self.publish_listeners:
             try:
-                logger.info(f"Fetching {div_card_type} data for {league}...")
-                div_card_data = self._fetch_item_data(league, div_card_type)
-                market_data['divination_cards'].extend(div_card_data)
-                logger.info(f"Processed {len(div_card_data)} {div_card_type} entries for {league}")
+                listener(league)
             except Exception as e:
-                logger.error(f"Error fetching {div_card_type} data for {league}: {e}")
+                logger.error(f"Error in publish listener {listener}: {e}")
+    
+    def _fetch_overview(self, league, url, parse):
+        """Fetch a poe.ninja overview with a conditional GET, reusing the previous parse on 304"""
+        response = self.session.get(url, headers=self.http_cache.conditional_headers(url))
         
-        # Save data to file
-        market_data_file = get_platform_path(os.path.join(league_dir, 'market_data.json'))
-        with open(market_data_file, 'w') as f:
-            json.dump(market_data, f, indent=4)
+        if response.status_code == 304:
+            rows = self._parsed_overviews.get(url)
+            if rows is None:
+                # First 304 since startup, parse the body from the disk cache once
+                rows = parse(json.loads(self.http_cache.get(url)['body']))
+                self._parsed_overviews[url] = rows
+            logger.info(f"{url} not modified, reusing cached data")
+            return rows
         
-        logger.info(f"Saved market data for {league} to {market_data_file}")
+        response.raise_for_status()
+        self.http_cache.store(url, response)
         
-        return market_data
+        rows = parse(response.json())
+        self._parsed_overviews[url] = rows
+        self._mark_changed(league)
+        return rows
+    
+    def _mark_changed(self, league):
+        """Record that a league's data changed during the current collection"""
+        with self._changed_lock:
+            self._changed_leagues.add(league)
     
     def _fetch_currency_data(self, league, currency_type):
         """Fetch currency data from poe.ninja API"""
@@ -130,98 +211,107 @@ class DataCollector:
         logger.info(f"Fetching data from {url}")
         
         try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            # Process currency data
-            currencies = []
-            for line in data.get('lines', []):
-                currency = {
-                    'name': line.get('currencyTypeName'),
-                    'chaos_value': line.get('chaosEquivalent'),
-                    'trade_volume': line.get('receive', {}).get('count', 0),
-                    'receive_change': line.get('receiveSparkLine', {}).get('totalChange', 0),
-                    'pay_change': line.get('paySparkLine', {}).get('totalChange', 0),
-                    'volatility': abs(line.get('receiveSparkLine', {}).get('totalChange', 0)) / 100 if line.get('receiveSparkLine', {}).get('totalChange') is not None else 0,
-                    'details_id': line.get('detailsId'),
-                    'currency_type': currency_type,
-                    'league': league,
-                    'timestamp': datetime.now().isoformat()
-                }
-                currencies.append(currency)
-            
-            return currencies
+            return self._fetch_overview(league, url, lambda data: self._parse_currency_lines(data, league, currency_type))
         except Exception as e:
             logger.error(f"Error fetching currency data from poe.ninja: {e}")
+            self._mark_changed(league)
             return []
     
+    def _parse_currency_lines(self, data, league, currency_type):
+        """Parse a poe.ninja currency overview payload into currency entries"""
+        # Process currency data
+        currencies = []
+        for line in data.get('lines', []):
+            currency = {
+                'name': line.get('currencyTypeName'),
+                'chaos_value': line.get('chaosEquivalent'),
+                'trade_volume': line.get('receive', {}).get('count', 0),
+                'receive_change': line.get('receiveSparkLine', {}).get('totalChange', 0),
+                'pay_change': line.get('paySparkLine', {}).get('totalChange', 0),
+                'receive_value': (line.get('receive') or {}).get('value'),
+                'pay_value': (line.get('pay') or {}).get('value'),
+                'volatility': abs(line.get('receiveSparkLine', {}).get('totalChange', 0)) / 100 if line.get('receiveSparkLine', {}).get('totalChange') is not None else 0,
+                'details_id': line.get('detailsId'),
+                'currency_type': currency_type,
+                'league': league,
+                'timestamp': datetime.now().isoformat()
+            }
+            currencies.append(currency)
+        
+        return currencies
+    
     def _fetch_item_data(self, league, item_type):
         """Fetch item data from poe.ninja API"""
         url = ITEM_TYPE_URLS.get(item_type, "").format(league=league)
         logger.info(f"Fetching data from {url}")
         
         try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            # Process item data
-            items = []
-            for line in data.get('lines', []):
-                item = {
-                    'name': line.get('name'),
-                    'base_type': line.get('baseType'),
-                    'item_type': item_type,
-                    'chaos_value': line.get('chaosValue'),
-                    'exalted_value': line.get('exaltedValue'),
-                    'divine_value': line.get('divineValue'),
-                    'trade_volume': line.get('count', 0),
-                    'price_change': line.get('sparkline', {}).get('totalChange', 0),
-                    'volatility': abs(line.get('sparkline', {}).get('totalChange', 0)) / 100 if line.get('sparkline', {}).get('totalChange') is not None else 0,
-                    'details_id': line.get('detailsId'),
-                    'league': league,
-                    'timestamp': datetime.now().isoformat()
-                }
-                
-                # Add additional fields based on item type
-                if item_type == 'DivinationCard':
-                    # Try to get farming locations from wiki or reference data
-                    item['farming_locations'] = self._get_divination_card_locations(line.get('name'))
-                
-                if item_type == 'Scarab':
-                    # Add scarab-specific information
-                    item['effect'] = self._extract_scarab_effect(line.get('explicitModifiers', []))
-                    item['investment_rating'] = self._calculate_investment_rating(
-                        line.get('chaosValue', 0), 
-                        line.get('sparkline', {}).get('totalChange', 0),
-                        line.get('count', 0)
-                    )
-                
-                if 'stackSize' in line:
-                    item['stack_size'] = line.get('stackSize')
-                
-                if 'levelRequired' in line:
-                    item['level'] = line.get('levelRequired')
-                
-                if 'links' in line:
-                    item['links'] = line.get('links')
-                
-                if 'gemQuality' in line:
-                    item['quality'] = line.get('gemQuality')
-                
-                if 'corrupted' in line:
-                    item['corrupted'] = line.get('corrupted', False)
-                
-                items.append(item)
-            
-            return items
+            return self._fetch_overview(league, url, lambda data: self._parse_item_lines(data, league, item_type))
         except Exception as e:
             logger.error(f"Error fetching item data from poe.ninja: {e}")
+            self._mark_changed(league)
             return []
     
+    def _parse_item_lines(self, data, league, item_type):
+        """Parse a poe.ninja item overview payload into item entries"""
+        # Process item data
+        items = []
+        for line in data.get('lines', []):
+            item = {
+                'name': line.get('name'),
+                'base_type': line.get('baseType'),
+                'item_type': item_type,
+                'chaos_value': line.get('chaosValue'),
+                'exalted_value': line.get('exaltedValue'),
+                'divine_value': line.get('divineValue'),
+                'trade_volume': line.get('count', 0),
+                'price_change': line.get('sparkline', {}).get('totalChange', 0),
+                'volatility': abs(line.get('sparkline', {}).get('totalChange', 0)) / 100 if line.get('sparkline', {}).get('totalChange') is not None else 0,
+                'details_id': line.get('detailsId'),
+                'league': league,
+                'timestamp': datetime.now().isoformat()
+            }
+            
+            # Add additional fields based on item type
+            if item_type == 'DivinationCard':
+                # Try to get farming locations from wiki or reference data
+                item['farming_locations'] = self._get_divination_card_locations(line.get('name'))
+            
+            if item_type == 'Scarab':
+                # Add scarab-specific information
+                item['effect'] = self._extract_scarab_effect(line.get('explicitModifiers', []))
+                item['investment_rating'] = None  # Filled in for all scarabs below
+            
+            if 'stackSize' in line:
+                item['stack_size'] = line.get('stackSize')
+            
+            if 'levelRequired' in line:
+                item['level'] = line.get('levelRequired')
+            
+            if 'links' in line:
+                item['links'] = line.get('links')
+            
+            if 'gemQuality' in line:
+                item['quality'] = line.get('gemQuality')
+            
+            if 'corrupted' in line:
+                item['corrupted'] = line.get('corrupted', False)
+            
+            items.append(item)
+        
+        if item_type == 'Scarab':
+            # Rate all scarabs in one vectorized pass
+            lines = data.get('lines', [])
+            ratings = investment_ratings(
+                [line.get('chaosValue', 0) for line in lines],
+                [line.get('sparkline', {}).get('totalChange', 0) for line in lines],
+                [line.get('count', 0) for line in lines]
+            )
+            for item, rating in zip(items, ratings.tolist()):
+                item['investment_rating'] = rating
+        
+        return items
+    
     def _extract_scarab_effect(self, modifiers):
         """Extract the effect description from scarab modifiers"""
         if not modifiers:
@@ -233,21 +323,6 @@ class DataCollector:
         
         return "Unknown effect"
     
-    def _calculate_investment_rating(self, price, price_change, volume):
-        """Calculate an investment rating for items based on price, change, and volume"""
-        # Higher volume, higher price change (positive), and moderate price
-        # result in a better investment rating
-        
-        # Normalize values
-        price_factor = min(1.0, 50 / max(1, price))  # Lower prices get higher factor
-        change_factor = (price_change / 100) + 0.5  # Normalize to 0-1 range, 0.5 is neutral
-        volume_factor = min(1.0, volume / 200)  # Higher volume is better
-        
-        # Calculate weighted score (0-100)
-        score = (price_factor * 0.3 + change_factor * 0.5 + volume_factor * 0.2) * 100
-        
-        return round(score, 1)
-    
     def _get_divination_card_locations(self, card_name):
         """Get farming locations for a divination card from reference data"""
         # In a real implementation, we would fetch this data from the PoE wiki
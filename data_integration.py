@@ -2,8 +2,12 @@ import os
 import json
 import logging
 from datetime import datetime
+from league_join import LeagueTable, join_history
+from integrated_record import IntegratedRecord
+from columnar_snapshot import open_league_snapshot
 from config import (
     DATA_DIR, REFERENCE_DATA_FILE, PRIMARY_LEAGUE, HISTORICAL_LEAGUE,
+    CURRENT_LEAGUES, ARCHIVED_LEAGUES, ARCHIVE_DATA_DIR,
     get_platform_path, ensure_dir_exists
 )
 
@@ -11,12 +15,19 @@ from config import (
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Item categories joined against historical leagues, besides currencies
+ITEM_CATEGORIES = ['fragments', 'oils', 'scarabs', 'incubators', 'artifacts', 'divination_cards']
+
 class DataIntegration:
     """Class for integrating data from different sources and leagues"""
     
     def __init__(self):
         """Initialize the data integration"""
         self.reference_data = self.load_reference_data()
+        
+        # Archived leagues never change, so their tables are built once
+        self._archived_snapshots = {}
+        self._archived_tables = {}
     
     def load_reference_data(self):
         """Load reference data from file"""
@@ -72,52 +83,23 @@ class DataIntegration:
             # Get primary league data
             primary_data = market_data.get(PRIMARY_LEAGUE, {})
             
-            # Get historical league data
-            historical_data = market_data.get(HISTORICAL_LEAGUE, {})
+            # Compare against the other current leagues, then archived leagues
+            historical_leagues = self.get_historical_leagues()
             
             # Integrate currencies
             integrated_data['currencies'] = self.integrate_currencies(
                 primary_data.get('currencies', []),
-                historical_data.get('currencies', [])
-            )
-            
-            # Integrate fragments
-            integrated_data['fragments'] = self.integrate_items(
-                primary_data.get('fragments', []),
-                historical_data.get('fragments', [])
+                self.get_league_tables(market_data, historical_leagues, 'currencies')
             )
             
-            # Integrate oils
-            integrated_data['oils'] = self.integrate_items(
-                primary_data.get('oils', []),
-                historical_data.get('oils', [])
-            )
+            # Integrate items
+            for category in ITEM_CATEGORIES:
+                integrated_data[category] = self.integrate_items(
+                    primary_data.get(category, []),
+                    self.get_league_tables(market_data, historical_leagues, category)
+                )
             
-            # Integrate scarabs
-            integrated_data['scarabs'] = self.integrate_items(
-                primary_data.get('scarabs', []),
-                historical_data.get('scarabs', [])
-            )
-            
-            # Integrate incubators
-            integrated_data['incubators'] = self.integrate_items(
-                primary_data.get('incubators', []),
-                historical_data.get('incubators', [])
-            )
-            
-            # Integrate artifacts
-            integrated_data['artifacts'] = self.integrate_items(
-                primary_data.get('artifacts', []),
-                historical_data.get('artifacts', [])
-            )
-            
-            # Integrate divination cards
-            integrated_data['divination_cards'] = self.integrate_items(
-                primary_data.get('divination_cards', []),
-                historical_data.get('divination_cards', [])
-            )
-            
-            logger.info("Data integration completed successfully")
+            logger.info(f"Data integration completed successfully against {len(historical_leagues)} leagues")
             
             return integrated_data
             
@@ -134,124 +116,113 @@ class DataIntegration:
                 'timestamp': datetime.now().isoformat()
             }
     
+    def get_historical_leagues(self):
+        """Get the leagues the primary league is compared against, most recent first"""
+        leagues = [league for league in CURRENT_LEAGUES if league != PRIMARY_LEAGUE]
+        leagues += [league for league in ARCHIVED_LEAGUES if league not in leagues and league != PRIMARY_LEAGUE]
+        return leagues
+    
+    def get_league_tables(self, market_data, leagues, category):
+        """Get a name-indexed table of a category for every league that has data"""
+        tables = []
+        for league in leagues:
+            if league in market_data:
+                tables.append(LeagueTable.from_records(league, market_data[league].get(category, [])))
+            else:
+                table = self.get_archived_table(league, category)
+                if table is not None:
+                    tables.append(table)
+        return tables
+    
+    def get_archived_table(self, league, category):
+        """Get a category of an archived league, read once from data/archive/<league>"""
+        key = (league, category)
+        if key not in self._archived_tables:
+            if league not in self._archived_snapshots:
+                league_dir = os.path.join(ARCHIVE_DATA_DIR, league.lower())
+                self._archived_snapshots[league] = open_league_snapshot(league_dir)
+            
+            snapshot = self._archived_snapshots[league]
+            table = None
+            if snapshot is not None and category in snapshot.categories():
+                table = LeagueTable.from_columns(league, snapshot.category(category))
+            self._archived_tables[key] = table
+        
+        return self._archived_tables[key]
+    
+    def _as_tables(self, historical):
+        """Accept a single league's item list as well as a list of LeagueTables"""
+        if historical and not isinstance(historical[0], LeagueTable):
+            return [LeagueTable.from_records(HISTORICAL_LEAGUE, historical)]
+        return historical or []
+    
+    def _join(self, primary_items, historical, add_locations):
+        """Join primary league items against historical leagues"""
+        items = [item for item in primary_items if 'name' in item]
+        names = [item['name'] for item in items]
+        joined = join_history(
+            names,
+            [item.get('chaos_value', 0) for item in items],
+            [item.get('volatility', 0) for item in items],
+            self._as_tables(historical),
+            reference_league=HISTORICAL_LEAGUE
+        )
+        
+        # Convert the result columns to lists once instead of indexing arrays per row
+        matched = joined['matched'].tolist()
+        reference_matched = joined['reference_matched'].tolist()
+        historical_values = joined['historical_value'].tolist()
+        historical_changes = joined['historical_change'].tolist()
+        trends = joined['price_trend'].tolist()
+        mean_values = joined['mean_historical_value'].tolist()
+        mean_changes = joined['mean_historical_change'].tolist()
+        volatilities = joined['volatility'].tolist()
+        
+        # Records overlay the added fields on the raw items instead of copying them
+        integrated_items = []
+        for row, item in enumerate(items):
+            fields = {}
+            
+            # Add historical data if available
+            if reference_matched[row]:
+                fields['historical_value'] = historical_values[row]
+                fields['historical_change'] = historical_changes[row]
+                fields['price_trend'] = trends[row]
+            if matched[row]:
+                fields['mean_historical_value'] = mean_values[row]
+                fields['mean_historical_change'] = mean_changes[row]
+                fields['volatility'] = volatilities[row]
+            
+            # Add reference data if available
+            if add_locations and item.get('item_type') == 'DivinationCard':
+                fields['farming_locations'] = self.get_divination_card_locations(names[row])
+            
+            integrated_items.append(IntegratedRecord(item, fields))
+        
+        return integrated_items
+    
     def integrate_currencies(self, primary_currencies, historical_currencies):
-        """Integrate currency data from different leagues"""
-        integrated_currencies = []
+        """
+        Integrate currency data from different leagues
         
+        ``historical_currencies`` is a list of LeagueTables, or the currency
+        list of a single historical league.
+        """
         try:
-            # Create a dictionary of historical currencies by name
-            historical_dict = {c['name']: c for c in historical_currencies if 'name' in c}
-            
-            # Process primary currencies
-            for currency in primary_currencies:
-                if 'name' not in currency:
-                    continue
-                
-                name = currency['name']
-                
-                # Get historical data for this currency
-                historical = historical_dict.get(name)
-                
-                # Create integrated currency
-                integrated_currency = currency.copy()
-                
-                # Add historical data if available
-                if historical:
-                    # Calculate historical price change
-                    current_value = currency.get('chaos_value', 0)
-                    historical_value = historical.get('chaos_value', 0)
-                    
-                    if historical_value > 0:
-                        historical_change = ((current_value - historical_value) / historical_value) * 100
-                    else:
-                        historical_change = 0
-                    
-                    integrated_currency['historical_value'] = historical_value
-                    integrated_currency['historical_change'] = historical_change
-                    
-                    # Calculate price trend
-                    if historical_change > 10:
-                        trend = 'rising'
-                    elif historical_change < -10:
-                        trend = 'falling'
-                    else:
-                        trend = 'stable'
-                    
-                    integrated_currency['price_trend'] = trend
-                    
-                    # Calculate volatility
-                    current_volatility = currency.get('volatility', 0)
-                    historical_volatility = historical.get('volatility', 0)
-                    
-                    integrated_currency['volatility'] = max(current_volatility, historical_volatility)
-                
-                integrated_currencies.append(integrated_currency)
-            
-            return integrated_currencies
-            
+            return self._join(primary_currencies, historical_currencies, add_locations=False)
         except Exception as e:
             logger.error(f"Error integrating currencies: {e}")
             return primary_currencies
     
     def integrate_items(self, primary_items, historical_items):
-        """Integrate item data from different leagues"""
-        integrated_items = []
+        """
+        Integrate item data from different leagues
         
+        ``historical_items`` is a list of LeagueTables, or the item list of a
+        single historical league.
+        """
         try:
-            # Create a dictionary of historical items by name
-            historical_dict = {i['name']: i for i in historical_items if 'name' in i}
-            
-            # Process primary items
-            for item in primary_items:
-                if 'name' not in item:
-                    continue
-                
-                name = item['name']
-                
-                # Get historical data for this item
-                historical = historical_dict.get(name)
-                
-                # Create integrated item
-                integrated_item = item.copy()
-                
-                # Add historical data if available
-                if historical:
-                    # Calculate historical price change
-                    current_value = item.get('chaos_value', 0)
-                    historical_value = historical.get('chaos_value', 0)
-                    
-                    if historical_value > 0:
-                        historical_change = ((current_value - historical_value) / historical_value) * 100
-                    else:
-                        historical_change = 0
-                    
-                    integrated_item['historical_value'] = historical_value
-                    integrated_item['historical_change'] = historical_change
-                    
-                    # Calculate price trend
-                    if historical_change > 10:
-                        trend = 'rising'
-                    elif historical_change < -10:
-                        trend = 'falling'
-                    else:
-                        trend = 'stable'
-                    
-                    integrated_item['price_trend'] = trend
-                    
-                    # Calculate volatility
-                    current_volatility = item.get('volatility', 0)
-                    historical_volatility = historical.get('volatility', 0)
-                    
-                    integrated_item['volatility'] = max(current_volatility, historical_volatility)
-                
-                # Add reference data if available
-                if item.get('item_type') == 'DivinationCard':
-                    integrated_item['farming_locations'] = self.get_divination_card_locations(name)
-                
-                integrated_items.append(integrated_item)
-            
-            return integrated_items
-            
+            return self._join(primary_items, historical_items, add_locations=True)
         except Exception as e:
             logger.error(f"Error integrating items: {e}")
             return primary_items
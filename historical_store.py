@@ -0,0 +1,273 @@
+import os
+import json
+import bisect
+import logging
+import threading
+from datetime import datetime
+from config import HISTORICAL_DATA_FILE, get_platform_path
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def to_seconds(moment):
+    """Convert a datetime, ISO timestamp string or epoch seconds to epoch seconds"""
+    if moment is None:
+        return None
+    if isinstance(moment, (int, float)):
+        return float(moment)
+    if isinstance(moment, str):
+        moment = datetime.fromisoformat(moment)
+    return moment.timestamp()
+
+class PriceSeries:
+    """Time-sorted prices of one item in one league"""
+
+    def __init__(self, item, league, category):
+        """Initialize an empty series"""
+        self.item = item
+        self.league = league
+        self.category = category
+        self.times = []
+        self.entries = []
+        self.phases = {}
+
+    def add(self, entry):
+        """Add an entry, keeping the series sorted by time"""
+        moment = to_seconds(entry['timestamp'])
+        position = bisect.bisect_right(self.times, moment)
+        self.times.insert(position, moment)
+        self.entries.insert(position, entry)
+
+    def index_phases(self):
+        """Index entry positions by league phase (call after the last add)"""
+        self.phases = {}
+        for position, entry in enumerate(self.entries):
+            self.phases.setdefault(entry.get('phase'), []).append(position)
+
+    def __len__(self):
+        return len(self.times)
+
+    def range(self, start=None, end=None):
+        """Get the entries from start to end (inclusive)"""
+        low = 0 if start is None else bisect.bisect_left(self.times, to_seconds(start))
+        high = len(self.times) if end is None else bisect.bisect_right(self.times, to_seconds(end))
+        return self.entries[low:high]
+
+    def at(self, moment):
+        """Get the latest entry at or before a time, or None"""
+        position = bisect.bisect_right(self.times, to_seconds(moment))
+        return self.entries[position - 1] if position else None
+
+class HistoricalStore:
+    """
+    Historical prices indexed by (item, league)
+
+    ``historical_data.json`` nests per-item entry lists under ``currencies``
+    and ``items`` -> item type. They are loaded once into time-sorted
+    series, so range, phase and point-in-league queries are binary searches.
+    The file is reloaded when it changes on disk.
+    """
+
+    def __init__(self, path=HISTORICAL_DATA_FILE):
+        """Initialize the store and load the file if it exists"""
+        self.path = get_platform_path(path)
+        self._series = {}
+        self._leagues = {}
+        self._league_starts = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self):
+        """Reload the file if it changed since it was loaded"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return
+
+        with self._lock:
+            if mtime == self._mtime:
+                return
+
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                self._build_index(data)
+                self._mtime = mtime
+                logger.info(f"Loaded {len(self._series)} historical price series from {self.path}")
+            except Exception as e:
+                logger.error(f"Error loading historical data: {e}")
+
+    def _build_index(self, data):
+        """Index every entry list in the file (lock must be held)"""
+        series = {}
+        for category, section in data.items():
+            if isinstance(section, dict):
+                self._index_section(series, category, section)
+
+        leagues = {}
+        starts = {}
+        for (item, league), item_series in series.items():
+            item_series.index_phases()
+            leagues.setdefault(item, []).append(league)
+            if item_series.times:
+                starts[league] = min(starts.get(league, item_series.times[0]), item_series.times[0])
+
+        self._series = series
+        self._leagues = {item: sorted(names, key=lambda league: starts.get(league, 0)) for item, names in leagues.items()}
+        self._league_starts = starts
+
+    def _index_section(self, series, category, section):
+        """Index item entry lists, descending into nested item type sections"""
+        for name, value in section.items():
+            if isinstance(value, dict):
+                self._index_section(series, name, value)
+                continue
+            if not isinstance(value, list):
+                continue
+
+            for entry in value:
+                if not isinstance(entry, dict) or 'timestamp' not in entry:
+                    continue
+                key = (name, entry.get('league'))
+                if key not in series:
+                    series[key] = PriceSeries(name, entry.get('league'), category)
+                series[key].add(entry)
+
+    def series(self, item, league):
+        """Get the price series of an item in a league, or None"""
+        return self._series.get((item, league))
+
+    def leagues(self, item=None):
+        """Get the leagues with data (for an item), oldest first"""
+        if item is not None:
+            return list(self._leagues.get(item, []))
+        return sorted(self._league_starts, key=self._league_starts.get)
+
+    def league_start(self, league):
+        """Get the earliest recorded time of a league, in epoch seconds"""
+        return self._league_starts.get(league)
+
+    def range(self, item, league, start=None, end=None):
+        """
+        Get an item's entries in a league between two times
+
+        Args:
+            item (str): Item name
+            league (str): League name
+            start: Earliest time (datetime, ISO string or epoch seconds), or None
+            end: Latest time, or None
+
+        Returns:
+            list: Entries sorted by time
+        """
+        item_series = self._series.get((item, league))
+        return item_series.range(start, end) if item_series else []
+
+    def history(self, item, league, snapshot_store=None, start=None, end=None):
+        """
+        Get an item's entries in a league, continued by the collected snapshot log
+
+        The historical file holds curated entries; snapshots collected after
+        its last entry are appended from the league's ``SnapshotStore`` so
+        charts reach the latest collection.
+
+        Args:
+            item (str): Item name
+            league (str): League name
+            snapshot_store (SnapshotStore): Collected snapshots of the league, or None
+            start: Earliest time (datetime, ISO string or epoch seconds), or None
+            end: Latest time, or None
+
+        Returns:
+            list: Entries with 'timestamp' and 'value', sorted by time
+        """
+        entries = self.range(item, league, start, end)
+        if snapshot_store is None:
+            return entries
+
+        # Only snapshots after the last curated entry (range entries are at or after start)
+        last = to_seconds(entries[-1]['timestamp']) if entries else None
+        start = to_seconds(start) if last is None else last
+        end = to_seconds(end)
+        recorded = snapshot_store.read_range(
+            item,
+            start=datetime.fromtimestamp(start) if start is not None else None,
+            end=datetime.fromtimestamp(end) if end is not None else None
+        )
+
+        for record in recorded:
+            if record.get('chaos_value') is None:
+                continue
+            if last is not None and to_seconds(record['timestamp']) <= last:
+                continue
+            entries.append({'value': record['chaos_value'], 'league': league, 'timestamp': record['timestamp']})
+        return entries
+
+    def phase(self, item, league, phase):
+        """Get an item's entries in a league phase (e.g., 'early'), sorted by time"""
+        item_series = self._series.get((item, league))
+        if item_series is None:
+            return []
+        return [item_series.entries[position] for position in item_series.phases.get(phase, [])]
+
+    def value_at(self, item, league, moment):
+        """Get an item's latest value at or before a time, or None"""
+        item_series = self._series.get((item, league))
+        entry = item_series.at(moment) if item_series else None
+        return entry.get('value') if entry else None
+
+    def previous_league(self, league):
+        """Get the league that started before a league, or None"""
+        leagues = self.leagues()
+        if league not in leagues:
+            return None
+        position = leagues.index(league)
+        return leagues[position - 1] if position else None
+
+    def compare_league_phase(self, item, league, previous_league=None, moment=None):
+        """
+        Compare an item's price with its price at the same point of a previous league
+
+        The point is the time elapsed since each league's first record, e.g.
+        "Divine Orb 14 days into this league vs 14 days into the last one".
+
+        Args:
+            item (str): Item name
+            league (str): Current league
+            previous_league (str): League to compare with (default: the one before)
+            moment: Time in the current league (default: its latest record)
+
+        Returns:
+            dict: Current and previous values, change percent and elapsed days, or None
+        """
+        previous_league = previous_league or self.previous_league(league)
+        current_series = self._series.get((item, league))
+        previous_series = self._series.get((item, previous_league))
+        if not current_series or not previous_series:
+            return None
+
+        moment = current_series.times[-1] if moment is None else to_seconds(moment)
+        current = current_series.at(moment)
+        if current is None:
+            return None
+
+        elapsed = moment - self._league_starts[league]
+        previous = previous_series.at(self._league_starts[previous_league] + elapsed)
+        if previous is None:
+            return None
+
+        current_value = current.get('value', 0)
+        previous_value = previous.get('value', 0)
+        return {
+            'item': item,
+            'league': league,
+            'previous_league': previous_league,
+            'elapsed_days': elapsed / 86400,
+            'value': current_value,
+            'previous_value': previous_value,
+            'phase': current.get('phase'),
+            'previous_phase': previous.get('phase'),
+            'change_percent': (current_value - previous_value) / previous_value * 100 if previous_value else 0
+        }
@@ -0,0 +1,102 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from config import HTTP_CACHE_DIR, get_platform_path, ensure_dir_exists
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class HTTPCache:
+    """
+    On-disk cache of HTTP responses keyed by URL, used to send conditional GETs
+
+    Only the validators (ETag and Last-Modified) are kept in memory; bodies
+    stay on disk and are read back when the server answers 304.
+    """
+
+    def __init__(self, cache_dir=HTTP_CACHE_DIR):
+        """Initialize the HTTP cache"""
+        self.cache_dir = get_platform_path(cache_dir)
+        ensure_dir_exists(self.cache_dir)
+        # url -> (etag, last_modified), or None when nothing is stored
+        self._validators = {}
+        self._lock = threading.Lock()
+
+    def _entry_file(self, url):
+        """Get the cache file path for a URL"""
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, url):
+        """Get the cached entry for a URL from disk, or None if it has never been stored"""
+        entry = None
+        entry_file = self._entry_file(url)
+        try:
+            if os.path.exists(entry_file):
+                with open(entry_file, 'r') as f:
+                    entry = json.load(f)
+        except Exception as e:
+            logger.error(f"Error reading HTTP cache entry for {url}: {e}")
+
+        with self._lock:
+            self._validators[url] = (entry.get('etag'), entry.get('last_modified')) if entry else None
+        return entry
+
+    def conditional_headers(self, url):
+        """Get the If-None-Match/If-Modified-Since headers for a URL"""
+        with self._lock:
+            known = url in self._validators
+            validators = self._validators.get(url)
+
+        # The first request for a URL reads its validators from disk once
+        if not known:
+            self.get(url)
+            with self._lock:
+                validators = self._validators.get(url)
+
+        headers = {}
+        if validators:
+            etag, last_modified = validators
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def store(self, url, response):
+        """Store a successful response so later requests can be made conditional"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+
+        # Without a validator the server can never answer 304, so there is
+        # nothing to gain from keeping the body around
+        if not etag and not last_modified:
+            return
+
+        entry = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'body': response.text,
+            'timestamp': datetime.now().isoformat()
+        }
+
+        entry_file = self._entry_file(url)
+        try:
+            # Write to a temporary file first so a crash never leaves a
+            # truncated entry behind
+            temp_file = f"{entry_file}.tmp"
+            with open(temp_file, 'w') as f:
+                json.dump(entry, f)
+            os.replace(temp_file, entry_file)
+        except Exception as e:
+            # Without the body on disk a 304 could not be answered, so send unconditional requests
+            logger.error(f"Error writing HTTP cache entry for {url}: {e}")
+            etag = last_modified = None
+
+        with self._lock:
+            self._validators[url] = (etag, last_modified) if etag or last_modified else None
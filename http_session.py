@@ -0,0 +1,48 @@
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from config import HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class PooledSession(requests.Session):
+    """requests.Session with a default timeout on every request"""
+
+    def __init__(self, timeout):
+        """Initialize the session with a (connect, read) timeout"""
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        """Send a request, applying the default timeout unless one is given"""
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+def create_session(pool_maxsize, headers=None, connect_timeout=HTTP_CONNECT_TIMEOUT, read_timeout=HTTP_READ_TIMEOUT):
+    """
+    Create a keep-alive session that can be shared across threads
+
+    The pool keeps up to ``pool_maxsize`` connections per host, so that many
+    threads can send requests at once and reuse connections instead of
+    opening a new TCP and TLS connection each time.
+
+    Args:
+        pool_maxsize (int): Connections kept per host (one per concurrent worker)
+        headers (dict): Default headers for every request
+        connect_timeout (float): Seconds to wait for a connection
+        read_timeout (float): Seconds to wait for response data
+
+    Returns:
+        PooledSession: The configured session
+    """
+    session = PooledSession((connect_timeout, read_timeout))
+    if headers:
+        session.headers.update(headers)
+
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, pool_maxsize))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    return session
@@ -0,0 +1,119 @@
+from collections.abc import KeysView, ValuesView, ItemsView, Mapping
+
+class IntegratedRecord(dict):
+    """
+    Integrated item that overlays added fields on the raw primary league record
+
+    Instead of copying every raw record to add a handful of fields, the
+    record keeps a reference to the raw dict in a slot and stores only the
+    added fields (and any assigned later, e.g. listing prices) in its own
+    dict storage. Lookups check the added fields first, then the raw record,
+    so the raw market data is never modified.
+
+    It behaves like the dict that ``raw.copy()`` followed by the same
+    assignments would give: same keys in the same order, same values, same
+    JSON. It subclasses dict so ``isinstance`` checks and ``json`` accept it.
+    Fields cannot be removed; use ``copy()`` to get a plain dict.
+    """
+
+    __slots__ = ('raw',)
+
+    def __init__(self, raw, fields=None):
+        """
+        Initialize the overlay of a raw record
+
+        Args:
+            raw (dict): Raw record, which must not change while the overlay is in use
+            fields (dict): Fields added or replaced on top of the raw record
+        """
+        dict.__init__(self)
+        self.raw = raw
+
+        # json's C encoder writes a dict subclass with empty storage as {}
+        # without asking for its items, so the storage always holds the first
+        # raw field. Storage is never emptied afterwards: assignments only add
+        # or replace keys and removal raises, so a record with any fields
+        # always serializes through its merged items (see
+        # tests/test_integrated_record.py)
+        for key in raw:
+            dict.__setitem__(self, key, raw[key])
+            break
+
+        if fields:
+            dict.update(self, fields)
+
+    def __getitem__(self, key):
+        try:
+            return dict.__getitem__(self, key)
+        except KeyError:
+            return self.raw[key]
+
+    def get(self, key, default=None):
+        """Get a field, or the default if the record does not have it"""
+        try:
+            return dict.__getitem__(self, key)
+        except KeyError:
+            return self.raw.get(key, default)
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self.raw
+
+    def __iter__(self):
+        raw = self.raw
+        yield from raw
+        for key in dict.__iter__(self):
+            if key not in raw:
+                yield key
+
+    def __len__(self):
+        raw = self.raw
+        return len(raw) + sum(1 for key in dict.__iter__(self) if key not in raw)
+
+    def __eq__(self, other):
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        return self.copy() == dict(other.items())
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __repr__(self):
+        return repr(self.copy())
+
+    def __or__(self, other):
+        return self.copy() | other
+
+    def __reduce__(self):
+        # Copies and pickles are plain dicts
+        return (dict, (self.copy(),))
+
+    def keys(self):
+        """Get the field names"""
+        return KeysView(self)
+
+    def values(self):
+        """Get the field values"""
+        return ValuesView(self)
+
+    def items(self):
+        """Get (field, value) pairs"""
+        return ItemsView(self)
+
+    def copy(self):
+        """Get the record as a plain dict"""
+        record = self.raw.copy()
+        record.update(dict.items(self))
+        return record
+
+    def setdefault(self, key, default=None):
+        """Get a field, assigning the default if the record does not have it"""
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def _immutable(self, *args, **kwargs):
+        """Removing fields would need tombstones over the raw record"""
+        raise TypeError("IntegratedRecord fields cannot be removed; use copy() for a plain dict")
+
+    __delitem__ = pop = popitem = clear = _immutable
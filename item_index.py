@@ -0,0 +1,132 @@
+# Market data categories, in classification order, with the item type label
+# the analysis reports for each
+CATEGORY_TYPES = {
+    'currencies': 'Currency',
+    'fragments': 'Fragment',
+    'scarabs': 'Scarab',
+    'oils': 'Oil',
+    'incubators': 'Incubator',
+    'artifacts': 'Artifact',
+    'divination_cards': 'DivinationCard',
+}
+
+# Fields whose movement changes an item's opportunities
+DIFF_FIELDS = (
+    'name', 'chaos_value', 'trade_volume', 'receive_change', 'price_change',
+    'receive_value', 'pay_value'
+)
+
+class ItemIndex:
+    """Category-tagged index over one market snapshot, built once per analysis run"""
+
+    def __init__(self, market_data):
+        """Build the index from integrated or raw market data"""
+        self.market_data = market_data
+        self.timestamp = market_data.get('timestamp')
+
+        self._by_category = {}
+        self._categories = {}
+        self._by_key = {}
+        self._fingerprints = None
+
+        # Set by the analysis engine when the snapshot is diffed against the previous one
+        self.diff = None
+        self.diff_basis = None
+
+        for category, item_type in CATEGORY_TYPES.items():
+            items = market_data.get(category, [])
+            self._by_category[category] = items
+
+            for item in items:
+                # Items are tagged by identity, so lookups never compare dicts
+                self._categories.setdefault(id(item), category)
+                self._by_key.setdefault((category, self.key(item)), item)
+
+    @staticmethod
+    def key(item):
+        """Get the stable identifier of an item (poe.ninja details id, falling back to name)"""
+        return item.get('details_id') or item.get('name')
+
+    def type_of(self, item, default='Other'):
+        """Get the item type label of an indexed item in O(1)"""
+        category = self._categories.get(id(item))
+        return CATEGORY_TYPES[category] if category else default
+
+    def category_of(self, item):
+        """Get the market data category of an indexed item"""
+        return self._categories.get(id(item))
+
+    def item_key(self, item):
+        """Get the (category, identifier) key of an indexed item, stable across snapshots"""
+        return (self._categories.get(id(item)), self.key(item))
+
+    def fingerprints(self):
+        """Get the analysis-relevant values of every item, keyed by (category, identifier)"""
+        if self._fingerprints is None:
+            self._fingerprints = {key: fingerprint(item) for key, item in self._by_key.items()}
+        return self._fingerprints
+
+    def items_in(self, *categories):
+        """Get the items of the given categories, in category order"""
+        items = []
+        for category in categories:
+            items.extend(self._by_category.get(category, []))
+        return items
+
+    def get(self, category, key):
+        """Get an item by category and identifier"""
+        return self._by_key.get((category, key))
+
+    def __len__(self):
+        return len(self._by_key)
+
+class SnapshotDiff:
+    """Items added, removed or moved between two indexed snapshots"""
+
+    def __init__(self, added, removed, changed):
+        """Initialize the diff from sets of (category, identifier) keys"""
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+        self.categories = {category for category, _ in added | removed | changed}
+
+    def is_empty(self):
+        """Check whether nothing moved"""
+        return not (self.added or self.removed or self.changed)
+
+    def touches(self, *categories):
+        """Check whether anything moved in the given categories"""
+        return any(category in self.categories for category in categories)
+
+    def is_dirty(self, key):
+        """Check whether an item must be recomputed"""
+        return key in self.changed or key in self.added
+
+def fingerprint(item):
+    """Get the values of an item that the analysis depends on"""
+    return tuple(item.get(field) for field in DIFF_FIELDS)
+
+def diff_snapshot(previous_fingerprints, current):
+    """
+    Diff an indexed snapshot against the fingerprints of the previous one
+
+    Only fingerprints of the previous snapshot are kept between runs, so the
+    old market data does not have to stay in memory.
+
+    Args:
+        previous_fingerprints (dict): (category, identifier) -> fingerprint
+        current (ItemIndex): The new snapshot
+
+    Returns:
+        SnapshotDiff: Items added, removed or changed by (category, details_id)
+    """
+    current_fingerprints = current.fingerprints()
+
+    added = set(current_fingerprints.keys() - previous_fingerprints.keys())
+    removed = set(previous_fingerprints.keys() - current_fingerprints.keys())
+    changed = {
+        key for key, values in current_fingerprints.items()
+        if key in previous_fingerprints and previous_fingerprints[key] != values
+    }
+
+    return SnapshotDiff(added, removed, changed)
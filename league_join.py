@@ -0,0 +1,131 @@
+import logging
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Historical change (percent) beyond which a price is rising or falling
+TREND_THRESHOLD = 10
+
+def _numbers(values):
+    """Convert values to a float array with missing values as 0"""
+    return np.nan_to_num(np.asarray(values, dtype=float), nan=0.0)
+
+class LeagueTable:
+    """
+    Numeric columns of one league category, indexed by item name
+
+    Built once per league and category, so joining a primary league against
+    any number of leagues is one dict lookup per (item, league) followed by
+    array operations.
+    """
+
+    def __init__(self, league, names, chaos_values, volatilities):
+        """Initialize the table; for duplicate names the last row wins"""
+        self.league = league
+        self.index = {name: row for row, name in enumerate(names) if name is not None}
+        self.chaos_values = _numbers(chaos_values)
+        self.volatilities = _numbers(volatilities)
+
+    @classmethod
+    def from_records(cls, league, items):
+        """Build a table from a category's item dicts"""
+        items = [item for item in items if 'name' in item]
+        return cls(
+            league,
+            [item['name'] for item in items],
+            [item.get('chaos_value', 0) for item in items],
+            [item.get('volatility', 0) for item in items]
+        )
+
+    @classmethod
+    def from_columns(cls, league, category):
+        """Build a table from a category of a columnar snapshot without decoding records"""
+        return cls(league, category.strings('name'), category.column('chaos_value'), category.column('volatility'))
+
+    def __len__(self):
+        return len(self.chaos_values)
+
+    def rows(self, names):
+        """Get the row of each name, or -1 where the league does not have it"""
+        index = self.index
+        return np.fromiter((index.get(name, -1) for name in names), dtype=np.intp, count=len(names))
+
+def _trend(change):
+    """Classify percent changes as 'rising', 'falling' or 'stable'"""
+    return np.where(change > TREND_THRESHOLD, 'rising', np.where(change < -TREND_THRESHOLD, 'falling', 'stable'))
+
+def _change(current, previous):
+    """Get the percent change from previous values, 0 where there is no positive previous value"""
+    return np.divide((current - previous) * 100, previous, out=np.zeros(len(current)), where=previous > 0)
+
+def join_history(names, chaos_values, volatilities, tables, reference_league=None):
+    """
+    Compare items against the same items in other leagues
+
+    The historical value is the item's value in the reference league (the
+    historical league), as a single-league comparison always reported. The
+    mean historical value is the mean of the positive values an item has in
+    all the leagues that list it. Volatility is the maximum across the item
+    and those leagues.
+
+    Args:
+        names (list): Item names of the primary league
+        chaos_values (sequence): Current chaos values
+        volatilities (sequence): Current volatilities
+        tables (list): LeagueTable of each league to compare against
+        reference_league (str): League of the historical value (default: the first table's)
+
+    Returns:
+        dict: Arrays aligned with names: 'matched' (listed in any league),
+            'volatility', 'mean_historical_value' and 'mean_historical_change',
+            and for the reference league 'reference_matched',
+            'historical_value', 'historical_change' and 'price_trend'
+    """
+    count = len(names)
+    current = _numbers(chaos_values)
+    volatility = _numbers(volatilities)
+    matched = np.zeros(count, dtype=bool)
+    reference_matched = np.zeros(count, dtype=bool)
+    reference_value = np.zeros(count)
+    total = np.zeros(count)
+    listed = np.zeros(count)
+
+    if reference_league is None and tables:
+        reference_league = tables[0].league
+
+    for table in tables:
+        if not len(table):
+            continue
+
+        rows = table.rows(names)
+        found = rows >= 0
+        if not found.any():
+            continue
+
+        rows = np.where(found, rows, 0)
+        values = table.chaos_values[rows]
+        if table.league == reference_league and not reference_matched.any():
+            reference_matched = found
+            reference_value = np.where(found, values, 0.0)
+
+        positive = found & (values > 0)
+        total += np.where(positive, values, 0.0)
+        listed += positive
+        matched |= found
+        volatility = np.where(found, np.fmax(volatility, table.volatilities[rows]), volatility)
+
+    mean_value = np.divide(total, listed, out=np.zeros(count), where=listed > 0)
+    historical_change = _change(current, reference_value)
+
+    return {
+        'matched': matched,
+        'reference_matched': reference_matched,
+        'historical_value': reference_value,
+        'historical_change': historical_change,
+        'price_trend': _trend(historical_change),
+        'mean_historical_value': mean_value,
+        'mean_historical_change': _change(current, mean_value),
+        'volatility': volatility
+    }
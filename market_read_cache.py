@@ -0,0 +1,120 @@
+import os
+import time
+import logging
+import threading
+from columnar_snapshot import open_league_snapshot, SNAPSHOT_FILE_NAME
+from config import CURRENT_DATA_DIR, MARKET_CACHE_CHECK_INTERVAL, get_platform_path
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Views computed when a snapshot is loaded: name -> (category, key, n, excluded names)
+PRECOMPUTED_VIEWS = {
+    'top_currencies': ('currencies', 'chaos_value', 10, ('Chaos Orb',)),
+}
+
+class _CachedLeague:
+    """An open league snapshot and the views computed from it"""
+
+    def __init__(self, snapshot, mtime):
+        self.snapshot = snapshot
+        self.mtime = mtime
+        self.checked = time.monotonic()
+        self.views = {}
+
+class MarketReadCache:
+    """
+    Process-wide cache of league snapshots and top-N views for the API
+
+    A league's snapshot is opened once and its views are computed once per
+    published snapshot. The collector's publish event drops the league; as a
+    fallback for snapshots written by another process, the file's mtime is
+    checked at most every ``check_interval`` seconds. Between those, requests
+    are served from memory without touching the disk.
+    """
+
+    def __init__(self, data_dir=CURRENT_DATA_DIR, check_interval=MARKET_CACHE_CHECK_INTERVAL):
+        """Initialize an empty cache"""
+        self.data_dir = data_dir
+        self.check_interval = check_interval
+        self.loads = 0
+        self._leagues = {}
+        self._lock = threading.Lock()
+
+    def _snapshot_file(self, league):
+        """Get the columnar snapshot path of a league"""
+        return get_platform_path(os.path.join(self.data_dir, league.lower(), SNAPSHOT_FILE_NAME))
+
+    def _mtime(self, league):
+        """Get the snapshot file's modification time, or None if it does not exist"""
+        try:
+            return os.stat(self._snapshot_file(league)).st_mtime_ns
+        except OSError:
+            return None
+
+    def _get(self, league):
+        """Get the cached league, (re)loading it when it is missing or stale"""
+        with self._lock:
+            cached = self._leagues.get(league)
+            now = time.monotonic()
+
+            if cached is not None and now - cached.checked < self.check_interval:
+                return cached
+
+            mtime = self._mtime(league)
+            if cached is not None and cached.mtime == mtime:
+                cached.checked = now
+                return cached
+
+            snapshot = open_league_snapshot(os.path.join(self.data_dir, league.lower()))
+            # A JSON-only league is converted on open, so read the mtime afterwards
+            cached = _CachedLeague(snapshot, self._mtime(league) if mtime is None else mtime)
+            if snapshot is not None:
+                for name, (category, key, n, excluded) in PRECOMPUTED_VIEWS.items():
+                    cached.views[name] = snapshot.category(category).top_n(key, n, exclude_names=excluded)
+
+            self._leagues[league] = cached
+            self.loads += 1
+            logger.debug(f"Loaded market snapshot for {league}")
+            return cached
+
+    def snapshot(self, league):
+        """Get the league's columnar snapshot, or None if it has no data"""
+        return self._get(league).snapshot
+
+    def view(self, league, name):
+        """Get a precomputed view (e.g., 'top_currencies'), or None if the league has no data"""
+        return self._get(league).views.get(name)
+
+    def top_currencies(self, league, n=10):
+        """Get the n most valuable currencies other than Chaos Orb, highest first"""
+        currencies = self.view(league, 'top_currencies')
+        if currencies is None:
+            return None
+
+        # Views are computed with stable sorts, so a prefix is the smaller top-N
+        if n <= PRECOMPUTED_VIEWS['top_currencies'][2]:
+            return currencies[:n]
+
+        snapshot = self.snapshot(league)
+        return snapshot.category('currencies').top_n('chaos_value', n, exclude_names=('Chaos Orb',))
+
+    def invalidate(self, league=None):
+        """Drop a league (or every league) so the next read loads the published snapshot"""
+        with self._lock:
+            if league is None:
+                self._leagues.clear()
+            else:
+                self._leagues.pop(league, None)
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_shared_market_cache():
+    """Get the process-wide market read cache shared by the API endpoints"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = MarketReadCache()
+        return _shared_cache
@@ -0,0 +1,295 @@
+import bisect
+import logging
+import itertools
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class BookSide:
+    """
+    Price levels on one side of an order book, best price first
+
+    Levels are kept sorted, so a listing update is a bisect insert.
+    Cumulative stock and cost per level are rebuilt lazily on the first
+    depth query after an update, and each depth query is then a bisect over
+    those prefix sums.
+    """
+
+    def __init__(self, descending=False):
+        """Initialize an empty side; bids are descending, asks ascending"""
+        self.descending = descending
+        self._keys = []
+        self._stock = {}
+        self._cumulative_stock = None
+        self._cumulative_cost = None
+
+    def _key(self, price):
+        """Get the sort key of a price, so the best price always sorts first"""
+        return -price if self.descending else price
+
+    def add(self, price, stock):
+        """Add stock at a price level"""
+        key = self._key(price)
+        if key not in self._stock:
+            bisect.insort(self._keys, key)
+            self._stock[key] = 0
+        self._stock[key] += stock
+        self._cumulative_stock = None
+
+    def remove(self, price, stock):
+        """Remove stock from a price level, dropping the level when it is empty"""
+        key = self._key(price)
+        if key not in self._stock:
+            return
+        self._stock[key] -= stock
+        if self._stock[key] <= 1e-12:
+            del self._stock[key]
+            del self._keys[bisect.bisect_left(self._keys, key)]
+        self._cumulative_stock = None
+
+    def __len__(self):
+        return len(self._keys)
+
+    def best(self):
+        """Get the best price, or None if the side is empty"""
+        return abs(self._keys[0]) if self._keys else None
+
+    def levels(self):
+        """Get (price, stock) levels, best price first"""
+        return [(abs(key), self._stock[key]) for key in self._keys]
+
+    def _prefix_sums(self):
+        """Get cumulative stock and cost per level, rebuilding them after updates"""
+        if self._cumulative_stock is None:
+            self._cumulative_stock = list(itertools.accumulate(self._stock[key] for key in self._keys))
+            self._cumulative_cost = list(itertools.accumulate(abs(key) * self._stock[key] for key in self._keys))
+        return self._cumulative_stock, self._cumulative_cost
+
+    def fill_quantity(self, quantity):
+        """
+        Walk the book to fill a quantity
+
+        Returns:
+            tuple: (quantity filled, total cost in quote currency)
+        """
+        stock, cost = self._prefix_sums()
+        if not stock or quantity <= 0:
+            return 0, 0.0
+
+        # First level whose cumulative stock covers the quantity
+        level = bisect.bisect_left(stock, quantity)
+        if level >= len(stock):
+            return stock[-1], cost[-1]
+
+        before_stock = stock[level - 1] if level else 0
+        before_cost = cost[level - 1] if level else 0.0
+        return quantity, before_cost + (quantity - before_stock) * abs(self._keys[level])
+
+    def fill_budget(self, budget):
+        """
+        Walk the book to spend a budget in quote currency
+
+        Returns:
+            tuple: (quantity bought, total cost in quote currency)
+        """
+        stock, cost = self._prefix_sums()
+        if not cost or budget <= 0:
+            return 0, 0.0
+
+        level = bisect.bisect_left(cost, budget)
+        if level >= len(cost):
+            return stock[-1], cost[-1]
+
+        before_stock = stock[level - 1] if level else 0
+        before_cost = cost[level - 1] if level else 0.0
+        return before_stock + (budget - before_cost) / abs(self._keys[level]), budget
+
+class OrderBook:
+    """
+    Bulk exchange order book for one currency pair
+
+    Prices are in ``quote`` currency per unit of ``base`` (e.g. chaos per
+    divine) and stock is in units of ``base``. Asks are listings selling the
+    base currency and bids are listings buying it. Listings are tracked by id,
+    so a listing seen again replaces its previous offer, and a refreshed
+    fetch drops listings that are no longer listed.
+    """
+
+    def __init__(self, base, quote='chaos'):
+        """Initialize an empty order book"""
+        self.base = base
+        self.quote = quote
+        self.asks = BookSide(descending=False)
+        self.bids = BookSide(descending=True)
+        self._listings = {}
+        self._anonymous_ids = itertools.count()
+
+        # Listing ids from the latest fetch of each side, replaced by the next fetch
+        self._fetched = {}
+
+    def _side(self, side):
+        """Get the book side for 'ask' or 'bid'"""
+        return self.asks if side == 'ask' else self.bids
+
+    def update(self, listing_id, side, price, stock):
+        """
+        Add or replace a listing
+
+        Args:
+            listing_id (str): Listing id (None for a listing without one)
+            side (str): 'ask' (selling base) or 'bid' (buying base)
+            price (float): Quote currency per unit of base
+            stock (float): Units of base available
+        """
+        if listing_id is None:
+            listing_id = f"anonymous-{next(self._anonymous_ids)}"
+
+        self.remove(listing_id)
+        if not price or price <= 0 or not stock or stock <= 0:
+            return
+
+        self._side(side).add(price, stock)
+        self._listings[listing_id] = (side, price, stock)
+
+    def remove(self, listing_id):
+        """Remove a listing, e.g. when it has sold or gone offline"""
+        previous = self._listings.pop(listing_id, None)
+        if previous:
+            side, price, stock = previous
+            self._side(side).remove(price, stock)
+
+    def __len__(self):
+        return len(self._listings)
+
+    def best_ask(self):
+        """Get the lowest price a seller asks"""
+        return self.asks.best()
+
+    def best_bid(self):
+        """Get the highest price a buyer bids"""
+        return self.bids.best()
+
+    def spread(self):
+        """Get the gap between best ask and best bid"""
+        ask, bid = self.best_ask(), self.best_bid()
+        return ask - bid if ask is not None and bid is not None else None
+
+    def buy_cost(self, quantity):
+        """
+        Get the real cost of buying a quantity of base at current depth
+
+        Returns:
+            dict: quantity filled, total cost, average price and whether the book had enough stock
+        """
+        filled, cost = self.asks.fill_quantity(quantity)
+        return self._fill(filled, cost, filled >= quantity)
+
+    def buy_with(self, budget):
+        """
+        Get how much base a budget in quote currency buys at current depth
+
+        Answers "what is the real price of buying 500 chaos worth of X".
+        """
+        filled, cost = self.asks.fill_budget(budget)
+        return self._fill(filled, cost, cost >= budget)
+
+    def sell_proceeds(self, quantity):
+        """Get the real proceeds of selling a quantity of base at current depth"""
+        filled, proceeds = self.bids.fill_quantity(quantity)
+        return self._fill(filled, proceeds, filled >= quantity)
+
+    def _fill(self, quantity, total, complete):
+        """Describe a fill"""
+        return {
+            'quantity': quantity,
+            'total': total,
+            'average_price': total / quantity if quantity else None,
+            'complete': complete
+        }
+
+    def add_exchange_listings(self, listings, side):
+        """
+        Add listings fetched for a bulk exchange search
+
+        Accepts listings with an ``offers`` list (exchange pays, item is
+        received, item stock in units) and the ``price`` form read by
+        POETradeAPI.process_exchange_results (amount in quote per
+        exchange amount of base).
+
+        Args:
+            listings (list): Fetched listings
+            side (str): Side for ``price`` form listings ('ask' or 'bid')
+
+        Returns:
+            int: Number of offers added
+        """
+        return len(self._add_exchange_listings(listings, side))
+
+    def refresh_exchange_listings(self, listings, side):
+        """
+        Replace the listings of an earlier fetch for the same side with a new fetch
+
+        Listings of the previous fetch that are missing from this one have
+        sold or gone offline and are removed, so depth never includes stale
+        stock. Listings without an id are keyed by position and replaced too.
+
+        Returns:
+            int: Number of offers in the book from this fetch
+        """
+        listing_ids = self._add_exchange_listings(listings, side)
+        for listing_id in self._fetched.get(side, set()) - listing_ids:
+            self.remove(listing_id)
+        self._fetched[side] = listing_ids
+        return len(listing_ids)
+
+    def _add_exchange_listings(self, listings, side):
+        """Add fetched listings, returning the ids of the offers added"""
+        added = set()
+        for position, result in enumerate(listings or []):
+            if not result:
+                continue
+
+            listing = result.get('listing', result)
+            listing_id = result.get('id') or f"{side}-anonymous-{position}"
+
+            offers = listing.get('offers')
+            if offers:
+                for index, offer in enumerate(offers):
+                    offer_id = f"{listing_id}:{index}"
+                    if self._add_offer(offer_id, offer):
+                        added.add(offer_id)
+                continue
+
+            price = listing.get('price') or {}
+            amount = price.get('amount')
+            exchange_amount = (price.get('exchange') or {}).get('amount')
+            if not amount or not exchange_amount or amount <= 0 or exchange_amount <= 0:
+                continue
+
+            stock = price.get('stock') or listing.get('stock') or exchange_amount
+            self.update(listing_id, side, amount / exchange_amount, stock)
+            added.add(listing_id)
+
+        return added
+
+    def _add_offer(self, offer_id, offer):
+        """Add one offer of a bulk exchange listing"""
+        pay = offer.get('exchange') or {}
+        receive = offer.get('item') or {}
+        if not pay.get('amount') or not receive.get('amount'):
+            return 0
+
+        if pay.get('currency') == self.quote and receive.get('currency') == self.base:
+            # Seller gives base for quote
+            price = pay['amount'] / receive['amount']
+            self.update(offer_id, 'ask', price, receive.get('stock') or receive['amount'])
+            return 1
+
+        if pay.get('currency') == self.base and receive.get('currency') == self.quote:
+            # Buyer gives quote for base; their stock is in quote currency
+            price = receive['amount'] / pay['amount']
+            self.update(offer_id, 'bid', price, (receive.get('stock') or receive['amount']) / price)
+            return 1
+
+        return 0
@@ -1,9 +1,15 @@
 import requests
 import json
-import time
 import logging
-import random
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http_session import create_session
+from rate_limiter import get_shared_governor
+from trade_cache import get_shared_cache, query_key
+from single_flight import get_shared_single_flight
+from order_book import OrderBook
+import price_stats
+from config import TRADE_API_MAX_RETRIES, TRADE_API_MAX_WORKERS, TRADE_API_POOL_SIZE
 
 # Configure logging
 logging.basicConfig(
@@ -16,22 +22,110 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Maximum number of result ids the trade API returns per /fetch request
+FETCH_BATCH_SIZE = 10
+
+# Currency types to check for exchange rates (common currencies)
+EXCHANGE_CURRENCIES = [
+    "divine", "exalted", "chaos", "ancient", "annulment", "awakener", 
+    "blessing-chayula", "blessing-esh", "blessing-tul", "blessing-uul", "blessing-xoph",
+    "crusader", "elder", "hunter", "redeemer", "shaper", "warlord",
+    "veiled-chaos", "vaal", "regal", "orb-of-regret", "orb-of-scouring",
+    "orb-of-alchemy", "orb-of-alteration", "orb-of-chance", "orb-of-fusing",
+    "jewellers-orb", "chromatic-orb", "orb-of-horizons", "harbinger-orb",
+    "gemcutters-prism", "glassblowers-bauble", "blessed-orb", "orb-of-binding",
+    "orb-of-engineering", "orb-of-transmutation", "mirror"
+]
+
 class POETradeAPI:
     """
     Class to interact with the official Path of Exile Trade API
     https://www.pathofexile.com/developer/docs/api-resources
     """
     
-    def __init__(self):
-        """Initialize the POE Trade API client"""
-        self.base_url = "https://www.pathofexile.com/api"
+    def __init__(self, base_url=None, rate_limiter=None, session=None, result_cache=None, single_flight=None):
+        """
+        Initialize the POE Trade API client
+        
+        Args:
+            base_url (str): API root (default: the official API; override for a local stub server)
+            rate_limiter (RateLimitGovernor): Governor to throttle requests (default: the shared one)
+            session (requests.Session): Transport to send requests on (default: a new pooled session)
+            result_cache (TradeResultCache): Cache of query results (default: the shared one)
+            single_flight (SingleFlight): Coalescer for concurrent identical queries (default: the shared one)
+        """
+        self.base_url = base_url or "https://www.pathofexile.com/api"
         self.trade_url = f"{self.base_url}/trade"
         self.headers = {
             'User-Agent': 'POE-Economy-Analysis-Tool/1.0 (contact@example.com)',
             'Accept': 'application/json',
             'Content-Type': 'application/json',
         }
-        self.rate_limit_delay = 1.0  # Seconds between requests to avoid rate limiting
+        self.rate_limit_delay = 1.0  # Seconds between requests until the server reports its rate limits
+        self.max_retries = TRADE_API_MAX_RETRIES
+        self.rate_limiter = rate_limiter or get_shared_governor(self.rate_limit_delay)
+        
+        # Keep-alive connection pool shared by all threads using this client, so
+        # search-then-fetch pairs reuse connections to the trade API
+        self.session = session or create_session(TRADE_API_POOL_SIZE, headers=self.headers)
+        
+        # Identical queries within their TTL are answered without a request
+        self.result_cache = result_cache or get_shared_cache()
+        
+        # Concurrent callers of the same query wait on one request
+        self.single_flight = single_flight or get_shared_single_flight()
+    
+    def _request(self, method, endpoint, url, **kwargs):
+        """
+        Send a request under the rate-limit governor
+        
+        Waits for the endpoint's rate-limit budget, updates the budget from the
+        X-Rate-Limit headers of the response and retries after a 429.
+        
+        Args:
+            method (str): HTTP method
+            endpoint (str): Endpoint key the server limits separately ('leagues', 'search', 'fetch', 'exchange')
+            url (str): Request URL
+            
+        Returns:
+            requests.Response: The successful response
+        """
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire(endpoint)
+            response = self.session.request(method, url, **kwargs)
+            self.rate_limiter.update(endpoint, response.headers, response.status_code)
+            
+            if response.status_code != 429 or attempt == self.max_retries:
+                break
+            logger.warning(f"Rate limited on {endpoint}, retrying ({attempt + 1}/{self.max_retries})")
+        
+        response.raise_for_status()
+        return response
+    
+    def _cached(self, kind, key, fetch):
+        """
+        Get a query result from the result cache, or fetch and cache it
+        
+        Concurrent misses for the same key are coalesced into one fetch.
+        
+        Args:
+            kind (str): Query kind, selects the TTL ('search', 'exchange')
+            key (str): Canonical query key
+            fetch (callable): Fetches the result; raises on failure so failures are not cached
+            
+        Returns:
+            dict: The query result
+        """
+        result = self.result_cache.get(key)
+        if result is None:
+            result = self.single_flight.do(key, lambda: self._fetch_and_cache(kind, key, fetch))
+        return result
+    
+    def _fetch_and_cache(self, kind, key, fetch):
+        """Fetch a query result and cache it"""
+        result = fetch()
+        self.result_cache.put(key, kind, result)
+        return result
         
     def get_leagues(self):
         """
@@ -43,11 +137,7 @@ class POETradeAPI:
         url = f"{self.base_url}/leagues"
         
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            
-            # Add delay to avoid rate limiting
-            time.sleep(self.rate_limit_delay)
+            response = self._request('GET', 'leagues', url)
             
             leagues = response.json()
             return leagues
@@ -68,110 +158,227 @@ class POETradeAPI:
         Returns:
             dict: Search results
         """
-        search_url = f"{self.trade_url}/search/{league}"
+        payload = self._search_payload(query, limit)
         
-        # Prepare the search payload
-        payload = {
+        try:
+            key = query_key('search', league, payload, sort, limit)
+            return self._cached('search', key, lambda: self._search_items(league, payload, limit, key))
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error searching items: {e}")
+            return {"items": [], "total": 0}
+    
+    def _search_payload(self, query, limit):
+        """Prepare the search payload"""
+        return {
             "query": query,
             "sort": {"price": "asc"},
             "limit": limit
         }
+    
+    def _fetch_url(self, result_ids):
+        """Get the URL fetching listing details for up to FETCH_BATCH_SIZE result ids"""
+        return f"{self.trade_url}/fetch/{','.join(result_ids)}"
+    
+    def _search(self, league, payload, key):
+        """
+        Run a search and get the listed ids, raising on request errors
         
-        try:
-            # Step 1: Get search results
-            search_response = requests.post(search_url, headers=self.headers, json=payload)
-            search_response.raise_for_status()
-            
-            # Add delay to avoid rate limiting
-            time.sleep(self.rate_limit_delay)
-            
-            search_data = search_response.json()
-            
-            if not search_data.get('result'):
-                logger.warning(f"No results found for query in {league}")
-                return {"items": [], "total": 0}
-            
-            # Step 2: Fetch item details
-            result_ids = search_data['result'][:limit]
-            fetch_url = f"{self.trade_url}/fetch/{','.join(result_ids)}"
-            
-            fetch_response = requests.get(fetch_url, headers=self.headers)
-            fetch_response.raise_for_status()
-            
-            # Add delay to avoid rate limiting
-            time.sleep(self.rate_limit_delay)
-            
-            fetch_data = fetch_response.json()
-            
-            return {
-                "items": fetch_data.get('result', []),
-                "total": search_data.get('total', 0)
-            }
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error searching items: {e}")
+        Searches are coalesced by query key, so a single price check and a
+        bulk price check of the same item share one request.
+        """
+        search_url = f"{self.trade_url}/search/{league}"
+        return self.single_flight.do(f"{key}:search",
+                                     lambda: self._request('POST', 'search', search_url, json=payload).json())
+    
+    def _fetch_listings(self, result_ids):
+        """Fetch the details of up to FETCH_BATCH_SIZE listings, raising on request errors"""
+        fetch_url = self._fetch_url(result_ids)
+        return self.single_flight.do(fetch_url, lambda: self._request('GET', 'fetch', fetch_url).json())
+    
+    def _search_items(self, league, payload, limit, key):
+        """Run an item search and fetch the listed items, raising on request errors"""
+        # Step 1: Get search results
+        search_data = self._search(league, payload, key)
+        
+        if not search_data.get('result'):
+            logger.warning(f"No results found for query in {league}")
             return {"items": [], "total": 0}
+        
+        # Step 2: Fetch item details
+        result_ids = search_data['result'][:limit]
+        fetch_data = self._fetch_listings(result_ids)
+        
+        return {
+            "items": fetch_data.get('result', []),
+            "total": search_data.get('total', 0)
+        }
     
-    def get_currency_rates(self, league):
+    def get_currency_rates(self, league, currencies=EXCHANGE_CURRENCIES):
         """
         Get current currency exchange rates
         
         Args:
             league (str): League name (e.g., 'Phrecia', 'Settlers')
+            currencies (list): Currency ids to check (default: common currencies)
             
         Returns:
             dict: Currency exchange rates
         """
-        # Currency types to check (common currencies)
-        currencies = [
-            "divine", "exalted", "chaos", "ancient", "annulment", "awakener", 
-            "blessing-chayula", "blessing-esh", "blessing-tul", "blessing-uul", "blessing-xoph",
-            "crusader", "elder", "hunter", "redeemer", "shaper", "warlord",
-            "veiled-chaos", "vaal", "regal", "orb-of-regret", "orb-of-scouring",
-            "orb-of-alchemy", "orb-of-alteration", "orb-of-chance", "orb-of-fusing",
-            "jewellers-orb", "chromatic-orb", "orb-of-horizons", "harbinger-orb",
-            "gemcutters-prism", "glassblowers-bauble", "blessed-orb", "orb-of-binding",
-            "orb-of-engineering", "orb-of-transmutation", "mirror"
-        ]
-        
-        currency_rates = {}
-        
-        for currency in currencies:
-            # Query for selling chaos orbs for the target currency
-            chaos_to_currency_query = {
-                "query": {
-                    "status": {"option": "online"},
-                    "have": ["chaos"],
-                    "want": [currency]
-                }
-            }
-            
-            # Query for selling the target currency for chaos orbs
-            currency_to_chaos_query = {
-                "query": {
-                    "status": {"option": "online"},
-                    "have": [currency],
-                    "want": ["chaos"]
-                }
-            }
+        results = self.sweep_currency_rates(league, currencies)
+        
+        # Report currencies in the order they were requested
+        return {currency: results[currency] for currency in currencies if currency in results}
+    
+    def sweep_currency_rates(self, league, currencies=EXCHANGE_CURRENCIES, callback=None, max_workers=None):
+        """
+        Sweep exchange rates for many currencies concurrently
+        
+        Runs the whole sweep before returning; the callback is called as each
+        currency completes, so callers can start on partial data. Use
+        ``iter_currency_rates`` to consume the rates as a generator instead.
+        
+        Args:
+            league (str): League name (e.g., 'Phrecia', 'Settlers')
+            currencies (list): Currency ids to check (default: common currencies)
+            callback (callable): Called with (currency, rates) as each currency completes
+            max_workers (int): Maximum concurrent queries (default: TRADE_API_MAX_WORKERS)
             
-            # Get exchange rates
-            chaos_to_currency_results = self.search_currency_exchange(league, chaos_to_currency_query)
-            time.sleep(self.rate_limit_delay + random.uniform(0.5, 1.5))  # Add random delay
+        Returns:
+            dict: Currency id -> rates, in completion order
+        """
+        results = {}
+        for currency, rates in self.iter_currency_rates(league, currencies, max_workers):
+            results[currency] = rates
+            if callback:
+                try:
+                    callback(currency, rates)
+                except Exception as e:
+                    logger.error(f"Error in currency sweep callback for {currency}: {e}")
+        
+        return results
+    
+    def iter_currency_rates(self, league, currencies=EXCHANGE_CURRENCIES, max_workers=None):
+        """
+        Sweep exchange rates for many currencies concurrently, as a generator
+        
+        Both exchange queries of every currency are queued at once and run on
+        a thread pool, paced by the rate-limit governor, so the sweep runs as
+        fast as the rate-limit budget allows. Rates are yielded as soon as both
+        directions of a currency are in. Queries are queued when the generator
+        is first advanced; closing it early cancels those that have not started.
+        
+        Args:
+            league (str): League name (e.g., 'Phrecia', 'Settlers')
+            currencies (list): Currency ids to check (default: common currencies)
+            max_workers (int): Maximum concurrent queries (default: TRADE_API_MAX_WORKERS)
             
-            currency_to_chaos_results = self.search_currency_exchange(league, currency_to_chaos_query)
-            time.sleep(self.rate_limit_delay + random.uniform(0.5, 1.5))  # Add random delay
+        Yields:
+            tuple: (currency, rates) in completion order
+        """
+        executor = ThreadPoolExecutor(max_workers=max_workers or TRADE_API_MAX_WORKERS,
+                                      thread_name_prefix='currency-sweep')
+        futures = {}
+        
+        try:
+            for currency in currencies:
+                # Selling chaos orbs for the target currency, and the target currency for chaos orbs
+                futures[executor.submit(self.search_currency_exchange, league, self._exchange_query("chaos", currency))] = (currency, 'buy')
+                futures[executor.submit(self.search_currency_exchange, league, self._exchange_query(currency, "chaos"))] = (currency, 'sell')
+            
+            pending = {}
+            for future in as_completed(futures):
+                currency, direction = futures[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    logger.error(f"Error sweeping {direction} rate for {currency}: {e}")
+                    results = None
+                
+                pending.setdefault(currency, {})[direction] = results
+                if len(pending[currency]) < 2:
+                    continue
+                
+                # Process results
+                exchange_results = pending.pop(currency)
+                buy_rate = self.process_exchange_results(exchange_results['buy'])
+                sell_rate = self.process_exchange_results(exchange_results['sell'], invert=True)
+                
+                rates = {
+                    "buy_rate": buy_rate,  # How many of this currency you get for 1 chaos
+                    "sell_rate": sell_rate,  # How many chaos you get for 1 of this currency
+                    "spread": sell_rate - buy_rate if buy_rate and sell_rate else None
+                }
+                
+                yield currency, rates
+        finally:
+            # Stopping early (or failing) drops the queries that have not started
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+    
+    def get_pair_rates(self, league, pairs, max_workers=None):
+        """
+        Get direct bulk exchange rates between currency pairs
+        
+        Cross rates such as divine -> exalted let the arbitrage graph find
+        cycles through more than one non-chaos currency.
+        
+        Args:
+            league (str): League name (e.g., 'Phrecia', 'Settlers')
+            pairs (list): (have, want) currency ids
+            max_workers (int): Maximum concurrent queries (default: TRADE_API_MAX_WORKERS)
             
-            # Process results
-            buy_rate = self.process_exchange_results(chaos_to_currency_results)
-            sell_rate = self.process_exchange_results(currency_to_chaos_results, invert=True)
+        Returns:
+            dict: (have, want) -> units of want received per unit of have, for pairs with listings
+        """
+        pairs = list(dict.fromkeys(tuple(pair) for pair in pairs))
+        if not pairs:
+            return {}
+        
+        with ThreadPoolExecutor(max_workers=max_workers or TRADE_API_MAX_WORKERS,
+                                thread_name_prefix='pair-rates') as executor:
+            results = executor.map(
+                lambda pair: self.search_currency_exchange(league, self._exchange_query(*pair)), pairs
+            )
+            rates = {pair: self.process_exchange_results(result) for pair, result in zip(pairs, results)}
+        
+        return {pair: rate for pair, rate in rates.items() if rate}
+    
+    def get_order_book(self, league, currency, quote="chaos", book=None):
+        """
+        Get the bulk exchange order book of a currency against chaos
+        
+        Args:
+            league (str): League name (e.g., 'Phrecia', 'Settlers')
+            currency (str): Currency id (e.g., 'divine')
+            quote (str): Currency prices are quoted in
+            book (OrderBook): Existing book to refresh with the latest listings
             
-            currency_rates[currency] = {
-                "buy_rate": buy_rate,  # How many of this currency you get for 1 chaos
-                "sell_rate": sell_rate,  # How many chaos you get for 1 of this currency
-                "spread": sell_rate - buy_rate if buy_rate and sell_rate else None
-            }
+        Returns:
+            OrderBook: Asks and bids with stock, for fill prices at size
+        """
+        if book is None:
+            book = OrderBook(currency, quote)
+        
+        # Sellers of the currency for chaos, and buyers of it paying chaos
+        asks = self.search_currency_exchange(league, self._exchange_query(quote, currency))
+        bids = self.search_currency_exchange(league, self._exchange_query(currency, quote))
+        
+        # Each fetch replaces the previous one, dropping sold and delisted offers
+        book.refresh_exchange_listings(asks.get('listings'), 'ask')
+        book.refresh_exchange_listings(bids.get('listings'), 'bid')
         
-        return currency_rates
+        return book
+    
+    def _exchange_query(self, have, want):
+        """Build a bulk exchange query for online listings"""
+        return {
+            "query": {
+                "status": {"option": "online"},
+                "have": [have],
+                "want": [want]
+            }
+        }
     
     def search_currency_exchange(self, league, query):
         """
@@ -184,40 +391,35 @@ class POETradeAPI:
         Returns:
             dict: Exchange listings
         """
-        exchange_url = f"{self.trade_url}/exchange/{league}"
-        
         try:
-            response = requests.post(exchange_url, headers=self.headers, json=query)
-            response.raise_for_status()
-            
-            # Add delay to avoid rate limiting
-            time.sleep(self.rate_limit_delay)
-            
-            exchange_data = response.json()
-            
-            if not exchange_data.get('result'):
-                return {"listings": [], "total": 0}
-            
-            # Fetch first 10 exchange listings
-            result_ids = exchange_data['result'][:10]
-            fetch_url = f"{self.trade_url}/fetch/{','.join(result_ids)}"
-            
-            fetch_response = requests.get(fetch_url, headers=self.headers)
-            fetch_response.raise_for_status()
-            
-            # Add delay to avoid rate limiting
-            time.sleep(self.rate_limit_delay)
-            
-            fetch_data = fetch_response.json()
-            
-            return {
-                "listings": fetch_data.get('result', []),
-                "total": exchange_data.get('total', 0)
-            }
+            key = query_key('exchange', league, query)
+            return self._cached('exchange', key, lambda: self._search_currency_exchange(league, query))
         except requests.exceptions.RequestException as e:
             logger.error(f"Error searching currency exchange: {e}")
             return {"listings": [], "total": 0}
     
+    def _search_currency_exchange(self, league, query):
+        """Run an exchange search and fetch the first listings, raising on request errors"""
+        exchange_url = f"{self.trade_url}/exchange/{league}"
+        
+        response = self._request('POST', 'exchange', exchange_url, json=query)
+        
+        exchange_data = response.json()
+        
+        if not exchange_data.get('result'):
+            return {"listings": [], "total": 0}
+        
+        # Fetch first 10 exchange listings
+        result_ids = exchange_data['result'][:FETCH_BATCH_SIZE]
+        fetch_response = self._request('GET', 'fetch', self._fetch_url(result_ids))
+        
+        fetch_data = fetch_response.json()
+        
+        return {
+            "listings": fetch_data.get('result', []),
+            "total": exchange_data.get('total', 0)
+        }
+    
     def process_exchange_results(self, results, invert=False):
         """
         Process currency exchange results to get average rate
@@ -253,18 +455,8 @@ class POETradeAPI:
             rate = exchange_amount / amount if not invert else amount / exchange_amount
             rates.append(rate)
         
-        # Return average rate if we have data
-        if rates:
-            # Filter out outliers (values more than 2 standard deviations from mean)
-            if len(rates) > 5:
-                mean = sum(rates) / len(rates)
-                std_dev = (sum((x - mean) ** 2 for x in rates) / len(rates)) ** 0.5
-                filtered_rates = [r for r in rates if abs(r - mean) <= 2 * std_dev]
-                return sum(filtered_rates) / len(filtered_rates) if filtered_rates else None
-            else:
-                return sum(rates) / len(rates)
-        else:
-            return None
+        # Return average rate if we have data, without price-fixed outliers (MAD based)
+        return price_stats.robust_mean(rates)
     
     def get_item_price_check(self, league, item_type, item_name, additional_filters=None):
         """
@@ -279,6 +471,101 @@ class POETradeAPI:
         Returns:
             dict: Price check results
         """
+        # Search for the item
+        results = self.search_items(league, self._price_query(item_type, item_name, additional_filters))
+        
+        return self._summarize_price_check(league, item_type, item_name, results)
+    
+    def bulk_price_check(self, league, items, additional_filters=None, limit=10):
+        """
+        Price check many items in one scheduled pass
+        
+        Identical item queries are searched once. Searches not answered by the
+        result cache run concurrently under the rate limiter, coalesced with
+        identical searches already in flight. The listed ids of all searches
+        are then deduplicated and packed into full /fetch batches.
+        
+        Args:
+            league (str): League name (e.g., 'Phrecia', 'Settlers')
+            items (iterable): (item_type, item_name) pairs
+            additional_filters (dict): Additional filters applied to every search
+            limit (int): Maximum number of listings per item
+            
+        Returns:
+            dict: (item_type, item_name) -> price check results, as from get_item_price_check
+        """
+        # Deduplicate identical item queries
+        queries = {}
+        for item_type, item_name in items:
+            payload = self._search_payload(self._price_query(item_type, item_name, additional_filters), limit)
+            key = query_key('search', league, payload, "price", limit)
+            queries.setdefault(key, (payload, []))[1].append((item_type, item_name))
+        
+        search_results = {}
+        for key in queries:
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                search_results[key] = cached
+        
+        # Step 1: Run the remaining searches, paced by the rate limiter
+        pending = [key for key in queries if key not in search_results]
+        search_data = {}
+        
+        with ThreadPoolExecutor(max_workers=TRADE_API_MAX_WORKERS, thread_name_prefix='price-check') as executor:
+            futures = {
+                executor.submit(self._search, league, queries[key][0], key): key
+                for key in pending
+            }
+            for future in as_completed(futures):
+                try:
+                    search_data[futures[future]] = future.result()
+                except requests.exceptions.RequestException as e:
+                    logger.error(f"Error searching items: {e}")
+            
+            # Step 2: Fetch every listed id once, in full batches
+            listed = {key: (data.get('result') or [])[:limit] for key, data in search_data.items()}
+            result_ids = list(dict.fromkeys(result_id for ids in listed.values() for result_id in ids))
+            batches = [result_ids[i:i + FETCH_BATCH_SIZE] for i in range(0, len(result_ids), FETCH_BATCH_SIZE)]
+            
+            futures = {executor.submit(self._fetch_listings, batch): batch for batch in batches}
+            fetched = {}
+            failed_ids = set()
+            for future in as_completed(futures):
+                try:
+                    for listing in future.result().get('result', []):
+                        if listing and 'id' in listing:
+                            fetched[listing['id']] = listing
+                except requests.exceptions.RequestException as e:
+                    logger.error(f"Error fetching listings: {e}")
+                    failed_ids.update(futures[future])
+        
+        logger.info(f"Price checked {len(queries)} unique queries with {len(pending)} searches and {len(batches)} fetches")
+        
+        for key, ids in listed.items():
+            if not ids:
+                logger.warning(f"No results found for query in {league}")
+                search_results[key] = {"items": [], "total": 0}
+                continue
+            
+            search_results[key] = {
+                "items": [fetched[result_id] for result_id in ids if result_id in fetched],
+                "total": search_data[key].get('total', 0)
+            }
+            
+            # Only complete results are cached
+            if not failed_ids.intersection(ids):
+                self.result_cache.put(key, 'search', search_results[key])
+        
+        price_checks = {}
+        for key, (payload, requested) in queries.items():
+            results = search_results.get(key, {"items": [], "total": 0})
+            for item_type, item_name in requested:
+                price_checks[(item_type, item_name)] = self._summarize_price_check(league, item_type, item_name, results)
+        
+        return price_checks
+    
+    def _price_query(self, item_type, item_name, additional_filters=None):
+        """Build the search query for a price check"""
         # Build query based on item type
         query = {
             "query": {
@@ -292,9 +579,10 @@ class POETradeAPI:
         if additional_filters:
             query["query"].update(additional_filters)
         
-        # Search for the item
-        results = self.search_items(league, query)
-        
+        return query
+    
+    def _summarize_price_check(self, league, item_type, item_name, results):
+        """Summarize search results into price statistics"""
         # Process results to get price statistics
         prices = []
         for item in results.get('items', []):
@@ -327,23 +615,11 @@ class POETradeAPI:
             
             stats = {}
             
-            if chaos_prices:
-                stats['chaos'] = {
-                    'min': min(chaos_prices),
-                    'max': max(chaos_prices),
-                    'mean': sum(chaos_prices) / len(chaos_prices),
-                    'median': sorted(chaos_prices)[len(chaos_prices) // 2],
-                    'count': len(chaos_prices)
-                }
-            
-            if divine_prices:
-                stats['divine'] = {
-                    'min': min(divine_prices),
-                    'max': max(divine_prices),
-                    'mean': sum(divine_prices) / len(divine_prices),
-                    'median': sorted(divine_prices)[len(divine_prices) // 2],
-                    'count': len(divine_prices)
-                }
+            # summarize() gives None when no price is positive
+            for currency, currency_prices in (('chaos', chaos_prices), ('divine', divine_prices)):
+                summary = price_stats.summarize(currency_prices)
+                if summary is not None:
+                    stats[currency] = summary
             
             return {
                 'item_name': item_name,
@@ -0,0 +1,104 @@
+import numpy as np
+
+# Listing prices are skewed and often price-fixed (many listings at one
+# price, a few far above or below), which breaks mean and standard deviation
+# based filters. These statistics are median based instead: outliers are
+# rejected by their distance from the median in units of the median absolute
+# deviation (MAD), and everything is computed from one sorted copy.
+
+# Modified z-score above which a value is an outlier (Iglewicz and Hoaglin)
+MAD_THRESHOLD = 3.5
+
+# Scale that makes the MAD comparable to a standard deviation for normal data
+MAD_SCALE = 1.4826
+
+# Scale that makes the mean absolute deviation comparable to a standard
+# deviation for normal data (sqrt(pi / 2))
+MEAN_AD_SCALE = 1.2533
+
+# Fraction cut from each end for the trimmed mean
+TRIM_FRACTION = 0.1
+
+def _as_array(values):
+    """Convert prices to a float array, dropping missing and non-positive values"""
+    values = np.asarray(values, dtype=float)
+    return values[np.isfinite(values) & (values > 0)]
+
+def _percentile(sorted_values, q):
+    """Linear-interpolated percentile of an already sorted array (numpy's default method)"""
+    position = (len(sorted_values) - 1) * q / 100
+    low = int(np.floor(position))
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+def inlier_mask(values, threshold=MAD_THRESHOLD):
+    """
+    Get a mask of values that are not outliers by MAD
+
+    When more than half of the values are identical (a fixed price) the MAD
+    is zero. The spread is then the smaller of the MAD of the values off the
+    fixed price and the mean absolute deviation, so a few far outliers cannot
+    widen it. If all values are equal, every value is kept.
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) < 3:
+        return np.ones(len(values), dtype=bool)
+
+    median = np.median(values)
+    deviations = np.abs(values - median)
+    spread = MAD_SCALE * np.median(deviations)
+    if spread == 0:
+        off_median = deviations[deviations > 0]
+        if len(off_median) == 0:
+            return np.ones(len(values), dtype=bool)
+        spread = min(MAD_SCALE * np.median(off_median), MEAN_AD_SCALE * np.mean(deviations))
+
+    return deviations / spread <= threshold
+
+def reject_outliers(values, threshold=MAD_THRESHOLD):
+    """Get the values that are not outliers by MAD"""
+    values = _as_array(values)
+    return values[inlier_mask(values, threshold)]
+
+def robust_mean(values, threshold=MAD_THRESHOLD):
+    """Get the mean after MAD outlier rejection, or None if there are no values"""
+    inliers = reject_outliers(values, threshold)
+    return float(inliers.mean()) if len(inliers) else None
+
+def summarize(values, trim=TRIM_FRACTION, threshold=MAD_THRESHOLD):
+    """
+    Get robust price statistics
+
+    Args:
+        values (sequence): Prices
+        trim (float): Fraction cut from each end for the trimmed mean
+        threshold (float): Modified z-score above which a price is an outlier
+
+    Returns:
+        dict: min, max, mean, median, trimmed mean, percentiles, MAD and
+            outlier count, or None if there are no prices
+    """
+    values = np.sort(_as_array(values))
+    count = len(values)
+    if count == 0:
+        return None
+
+    median = _percentile(values, 50)
+    deviations = np.abs(values - median)
+    cut = int(count * trim)
+    trimmed = values[cut:count - cut] if count - 2 * cut > 0 else values
+
+    return {
+        'min': float(values[0]),
+        'max': float(values[-1]),
+        'mean': float(values.mean()),
+        'median': float(median),
+        'trimmed_mean': float(trimmed.mean()),
+        'p10': float(_percentile(values, 10)),
+        'p25': float(_percentile(values, 25)),
+        'p75': float(_percentile(values, 75)),
+        'p90': float(_percentile(values, 90)),
+        'mad': float(MAD_SCALE * np.median(deviations)),
+        'outliers': int(count - inlier_mask(values, threshold).sum()),
+        'count': count
+    }
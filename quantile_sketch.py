@@ -0,0 +1,317 @@
+import math
+import time
+import logging
+import threading
+from integrated_record import IntegratedRecord
+from config import QUANTILE_HALF_LIFE, QUANTILE_COMPRESSION, QUANTILE_MIN_WEIGHT
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Quantiles reported for every item
+REPORTED_QUANTILES = {'p10': 0.1, 'p50': 0.5, 'p90': 0.9}
+
+# Rescale weights before forward-decay factors can overflow a float
+MAX_DECAY_EXPONENT = 50.0
+
+class TDigest:
+    """
+    Merging t-digest of weighted values
+
+    Values are buffered and merged into at most about ``compression``
+    centroids, which are small near the tails and large near the median, so
+    extreme quantiles stay accurate in constant memory. Digests are mergeable:
+    merging two digests gives the digest of both inputs.
+    """
+
+    def __init__(self, compression=QUANTILE_COMPRESSION):
+        """Initialize an empty digest"""
+        self.compression = compression
+        self.means = []
+        self.weights = []
+        self.total_weight = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer = []
+        self._buffer_size = 5 * compression
+
+    def add(self, value, weight=1.0):
+        """Add a value with a weight"""
+        self._buffer.append((value, weight))
+        self.total_weight += weight
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if len(self._buffer) >= self._buffer_size:
+            self._compress()
+
+    def merge(self, other):
+        """Add all values of another digest"""
+        other._compress()
+        self._buffer.extend(zip(other.means, other.weights))
+        self.total_weight += other.total_weight
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    def scale(self, factor):
+        """Multiply every weight by a factor"""
+        self._compress()
+        self.weights = [weight * factor for weight in self.weights]
+        self.total_weight *= factor
+
+    def _k(self, q):
+        """Scale function k1: centroid index at quantile q"""
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _q(self, k):
+        """Inverse of the scale function"""
+        if k >= self.compression / 4:
+            return 1.0
+        return (math.sin(2 * math.pi * k / self.compression) + 1) / 2
+
+    def _compress(self):
+        """Merge buffered values into the centroids"""
+        if not self._buffer:
+            return
+
+        points = sorted(list(zip(self.means, self.weights)) + self._buffer)
+        self._buffer = []
+        total = sum(weight for _, weight in points)
+
+        means, weights = [], []
+        mean, weight = points[0]
+        before = 0.0
+        limit = total * self._q(self._k(0) + 1)
+        for value, value_weight in points[1:]:
+            if before + weight + value_weight <= limit:
+                weight += value_weight
+                mean += (value - mean) * value_weight / weight
+            else:
+                means.append(mean)
+                weights.append(weight)
+                before += weight
+                limit = total * self._q(self._k(min(before / total, 1.0)) + 1)
+                mean, weight = value, value_weight
+        means.append(mean)
+        weights.append(weight)
+
+        self.means = means
+        self.weights = weights
+        self.total_weight = total
+
+    def quantile(self, q):
+        """Get the value at quantile q (0-1), or None if the digest is empty"""
+        self._compress()
+        if not self.means:
+            return None
+        if len(self.means) == 1:
+            return self.means[0]
+
+        target = q * self.total_weight
+        if target <= self.weights[0] / 2:
+            # Between the minimum and the first centroid's center
+            return self.min + (self.means[0] - self.min) * target / (self.weights[0] / 2)
+
+        cumulative = self.weights[0] / 2
+        for i in range(1, len(self.means)):
+            step = (self.weights[i - 1] + self.weights[i]) / 2
+            if cumulative + step >= target:
+                fraction = (target - cumulative) / step
+                return self.means[i - 1] + (self.means[i] - self.means[i - 1]) * fraction
+            cumulative += step
+
+        # Between the last centroid's center and the maximum
+        last = self.weights[-1] / 2
+        fraction = min((target - cumulative) / last, 1.0)
+        return self.means[-1] + (self.max - self.means[-1]) * fraction
+
+    def __len__(self):
+        self._compress()
+        return len(self.means)
+
+class QuantileSketchStore:
+    """
+    Time-decayed price quantiles per (league, item) from listing streams
+
+    Uses forward decay: a listing seen at time t gets weight
+    exp(lambda * (t - landmark)), so newer listings count more and old
+    centroids never have to be revisited. Quantiles only depend on relative
+    weights, and weights are rescaled to a new landmark before they overflow.
+    """
+
+    def __init__(self, half_life=QUANTILE_HALF_LIFE, compression=QUANTILE_COMPRESSION, rates=None, clock=time.time):
+        """
+        Initialize the store
+
+        Args:
+            half_life (float): Seconds after which a listing counts half as much
+            compression (int): t-digest compression (about the centroids kept per item)
+            rates (dict): Chaos value of each listing currency (e.g., {'divine': 180})
+            clock (callable): Current time in seconds
+        """
+        self.decay = math.log(2) / half_life
+        self.compression = compression
+        self.clock = clock
+        self.landmark = clock()
+        self.rates = {'chaos': 1.0}
+        self.rates.update(rates or {})
+        self.version = 0
+        self.skipped = 0
+        self._digests = {}
+        self._lock = threading.Lock()
+
+    def set_rates(self, rates):
+        """Update the chaos value of listing currencies"""
+        with self._lock:
+            self.rates.update(rates)
+
+    def _weight(self, timestamp):
+        """Forward-decay weight of a listing seen at a time (lock must be held)"""
+        exponent = self.decay * (timestamp - self.landmark)
+        if exponent > MAX_DECAY_EXPONENT:
+            self._move_landmark(timestamp)
+            exponent = 0.0
+        return math.exp(exponent)
+
+    def _move_landmark(self, landmark):
+        """Rescale all weights to a new landmark (lock must be held)"""
+        factor = math.exp(-self.decay * (landmark - self.landmark))
+        for digest in self._digests.values():
+            digest.scale(factor)
+        self.landmark = landmark
+
+    def add(self, league, item, price, timestamp=None):
+        """Add one chaos price for an item"""
+        if not price or price <= 0:
+            return
+
+        timestamp = self.clock() if timestamp is None else timestamp
+        key = (league, item)
+        with self._lock:
+            digest = self._digests.get(key)
+            if digest is None:
+                digest = self._digests[key] = TDigest(self.compression)
+            digest.add(price, self._weight(timestamp))
+            self.version += 1
+
+    def add_listings(self, listings):
+        """
+        Add normalized listings (e.g., from the stash stream)
+
+        Listing prices are converted to chaos per unit. Listings priced in a
+        currency without a known rate are skipped.
+        """
+        timestamp = self.clock()
+        with self._lock:
+            for listing in listings:
+                rate = self.rates.get(listing.get('currency'))
+                price = listing.get('unit_price')
+                if rate is None or not price or price <= 0:
+                    self.skipped += 1
+                    continue
+
+                key = (listing.get('league'), listing.get('item'))
+                digest = self._digests.get(key)
+                if digest is None:
+                    digest = self._digests[key] = TDigest(self.compression)
+                digest.add(price * rate, self._weight(timestamp))
+            self.version += 1
+
+    def merge(self, other):
+        """Merge the sketches of another store into this one"""
+        # Copy the other store under its own lock, so the two locks are never
+        # held together and stores merging into each other cannot deadlock
+        with other._lock:
+            other_landmark = other.landmark
+            copies = {}
+            for key, other_digest in other._digests.items():
+                copy = TDigest(other_digest.compression)
+                copy.merge(other_digest)
+                copies[key] = copy
+
+        with self._lock:
+            if other_landmark > self.landmark:
+                self._move_landmark(other_landmark)
+            factor = math.exp(-self.decay * (self.landmark - other_landmark))
+
+            for key, copy in copies.items():
+                digest = self._digests.get(key)
+                if digest is None:
+                    digest = self._digests[key] = TDigest(self.compression)
+                copy.scale(factor)
+                digest.merge(copy)
+            self.version += 1
+
+    def effective_weight(self, league, item):
+        """Get the decayed number of listings behind an item's quantiles"""
+        with self._lock:
+            digest = self._digests.get((league, item))
+            if digest is None:
+                return 0.0
+            return digest.total_weight * math.exp(-self.decay * (self.clock() - self.landmark))
+
+    def quantiles(self, league, item):
+        """
+        Get the p10/p50/p90 chaos prices of an item
+
+        Returns:
+            dict: p10, p50, p90 and the decayed listing weight, or None if the item has no listings
+        """
+        with self._lock:
+            digest = self._digests.get((league, item))
+            if digest is None:
+                return None
+
+            result = {name: digest.quantile(q) for name, q in REPORTED_QUANTILES.items()}
+            result['weight'] = digest.total_weight * math.exp(-self.decay * (self.clock() - self.landmark))
+            return result
+
+    def apply(self, market_data, league, min_weight=QUANTILE_MIN_WEIGHT):
+        """
+        Overlay listing quantiles on market data
+
+        Items with enough recent listings get ``price_p10``, ``price_p50`` and
+        ``price_p90`` fields, and their ``chaos_value`` becomes the p50 (the
+        poe.ninja value is kept as ``ninja_chaos_value``), so the analysis
+        engine uses live listing prices without any change. Raw rows are
+        replaced with an ``IntegratedRecord`` overlay rather than modified, as
+        they may be shared with the collector's cache.
+
+        Returns:
+            int: Number of items updated
+        """
+        updated = 0
+        for items in market_data.values():
+            if not isinstance(items, list):
+                continue
+
+            for index, item in enumerate(items):
+                if not isinstance(item, dict) or 'name' not in item:
+                    continue
+
+                quantiles = self.quantiles(league, item['name'])
+                if quantiles is None or quantiles['weight'] < min_weight:
+                    continue
+
+                fields = {}
+                if 'ninja_chaos_value' not in item and 'chaos_value' in item:
+                    fields['ninja_chaos_value'] = item['chaos_value']
+                fields['price_p10'] = quantiles['p10']
+                fields['price_p50'] = quantiles['p50']
+                fields['price_p90'] = quantiles['p90']
+                fields['chaos_value'] = quantiles['p50']
+
+                if isinstance(item, IntegratedRecord):
+                    item.update(fields)
+                else:
+                    # Raw rows may be shared with the collector's parsed response cache
+                    items[index] = IntegratedRecord(item, fields)
+                updated += 1
+
+        return updated
+
+    def __len__(self):
+        return len(self._digests)
@@ -0,0 +1,254 @@
+import time
+import logging
+import threading
+from collections import deque
+from config import TRADE_API_RATE_LIMIT_MARGIN
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class RateLimitWindow:
+    """
+    One window of a rate-limit rule, e.g. ``8:10:60`` (8 hits per 10 seconds, 60 second penalty)
+
+    Works as a token bucket holding ``hits`` tokens. A token is returned when
+    the request that spent it leaves the window, not at a constant rate. A
+    constant-rate bucket can burst a full bucket and then refill it within
+    the same period, which would send twice the limit in one window.
+    """
+
+    def __init__(self, hits, period, penalty=0, margin=TRADE_API_RATE_LIMIT_MARGIN):
+        """Initialize the window, keeping ``margin`` hits in reserve"""
+        self.hits = hits
+        self.period = period
+        self.penalty = penalty
+        self.capacity = max(1, hits - margin)
+        self._sent = deque()
+
+    def _expire(self, now):
+        """Return tokens of requests that left the window"""
+        while self._sent and self._sent[0] <= now - self.period:
+            self._sent.popleft()
+
+    def tokens(self, now):
+        """Get the number of requests that can be sent now"""
+        self._expire(now)
+        return self.capacity - len(self._sent)
+
+    def wait_time(self, now):
+        """Get the seconds until a token is available"""
+        if self.tokens(now) > 0:
+            return 0
+        # The request that frees the next token is the one `capacity` requests back
+        return self._sent[len(self._sent) - self.capacity] + self.period - now
+
+    def consume(self, now):
+        """Spend a token"""
+        self._sent.append(now)
+
+    def sync(self, server_hits, now):
+        """Count requests the server has seen but this window has not (other clients, clock skew)"""
+        self._expire(now)
+        for _ in range(server_hits - len(self._sent)):
+            self._sent.append(now)
+
+class RateLimitPolicy:
+    """Rate-limit policy shared by one or more endpoints, made of rule windows"""
+
+    def __init__(self, name):
+        """Initialize an empty policy"""
+        self.name = name
+        self.windows = {}
+        self.blocked_until = 0
+
+    def wait_time(self, now):
+        """Get the seconds until every window allows a request"""
+        wait = self.blocked_until - now
+        for window in self.windows.values():
+            wait = max(wait, window.wait_time(now))
+        return max(wait, 0)
+
+    def consume(self, now):
+        """Spend a token in every window"""
+        for window in self.windows.values():
+            window.consume(now)
+
+    def update(self, rules, now):
+        """
+        Update the windows from parsed rate-limit headers
+
+        Args:
+            rules (dict): Rule name -> list of ((hits, period, penalty), (hits, period, restricted))
+            now (float): Current monotonic time
+        """
+        for rule, windows in rules.items():
+            for (hits, period, penalty), (state_hits, _, restricted) in windows:
+                key = (rule, period)
+                window = self.windows.get(key)
+                if window is None or window.hits != hits:
+                    window = self.windows[key] = RateLimitWindow(hits, period, penalty)
+                window.sync(state_hits, now)
+
+                if restricted > 0:
+                    self.blocked_until = max(self.blocked_until, now + restricted)
+
+def _parse_windows(value):
+    """Parse a rule header value like ``8:10:60,15:60:120`` into (hits, period, third) tuples"""
+    windows = []
+    for part in (value or '').split(','):
+        fields = part.strip().split(':')
+        if len(fields) != 3:
+            continue
+        try:
+            windows.append(tuple(int(field) for field in fields))
+        except ValueError:
+            continue
+    return windows
+
+def parse_rate_limit_headers(headers):
+    """
+    Parse GGG's rate-limit headers
+
+    Args:
+        headers (Mapping): Response headers (case-insensitive)
+
+    Returns:
+        tuple: (policy name or None, rule name -> list of (limit, state) window pairs)
+    """
+    policy = headers.get('X-Rate-Limit-Policy')
+    rules = {}
+
+    for rule in (headers.get('X-Rate-Limit-Rules') or '').split(','):
+        rule = rule.strip()
+        if not rule:
+            continue
+
+        limits = _parse_windows(headers.get(f'X-Rate-Limit-{rule}'))
+        states = {state[1]: state for state in _parse_windows(headers.get(f'X-Rate-Limit-{rule}-State'))}
+        rules[rule] = [(limit, states.get(limit[1], (0, limit[1], 0))) for limit in limits]
+
+    return policy, rules
+
+def parse_retry_after(value):
+    """Parse a Retry-After header given in seconds"""
+    try:
+        return max(float(value), 0) if value is not None else None
+    except ValueError:
+        return None
+
+class RateLimitGovernor:
+    """
+    Shared rate-limit governor for the trade API
+
+    Endpoints are throttled by the policy the server reports for them in the
+    ``X-Rate-Limit-*`` headers. Until an endpoint's policy is known, its
+    requests are spaced by ``default_interval`` seconds. One governor should
+    be shared by every client and thread, since GGG limits are per IP and
+    account.
+    """
+
+    def __init__(self, default_interval=1.0):
+        """Initialize the governor"""
+        self.default_interval = default_interval
+        self._policies = {}
+        self._endpoint_policies = {}
+        self._endpoint_last_sent = {}
+        self._endpoint_blocked_until = {}
+        self._lock = threading.Lock()
+
+    def _policy_for(self, endpoint):
+        """Get the known policy of an endpoint, or None"""
+        name = self._endpoint_policies.get(endpoint)
+        return self._policies.get(name) if name else None
+
+    def _wait_time(self, endpoint, now):
+        """Get the seconds until an endpoint may send"""
+        wait = self._endpoint_blocked_until.get(endpoint, 0) - now
+        policy = self._policy_for(endpoint)
+        if policy is not None and policy.windows:
+            wait = max(wait, policy.wait_time(now))
+        else:
+            wait = max(wait, self._endpoint_last_sent.get(endpoint, -self.default_interval) + self.default_interval - now)
+        return max(wait, 0)
+
+    def acquire(self, endpoint):
+        """
+        Block until a request to an endpoint is allowed, then count it
+
+        Args:
+            endpoint (str): Endpoint key (e.g., 'search', 'fetch', 'exchange')
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._wait_time(endpoint, now)
+                if wait <= 0:
+                    policy = self._policy_for(endpoint)
+                    if policy is not None:
+                        policy.consume(now)
+                    self._endpoint_last_sent[endpoint] = now
+                    return waited
+            time.sleep(wait)
+            waited += wait
+
+    def wait_time(self, endpoint):
+        """Get the seconds until a request to an endpoint would be allowed"""
+        with self._lock:
+            return self._wait_time(endpoint, time.monotonic())
+
+    def update(self, endpoint, headers, status_code=None):
+        """
+        Update limits from a response
+
+        Args:
+            endpoint (str): Endpoint key the request was sent to
+            headers (Mapping): Response headers
+            status_code (int): Response status code
+
+        Returns:
+            float: Seconds the endpoint is blocked for, if the server asked to back off
+        """
+        policy_name, rules = parse_rate_limit_headers(headers)
+        retry_after = parse_retry_after(headers.get('Retry-After'))
+
+        with self._lock:
+            now = time.monotonic()
+
+            policy = None
+            if policy_name:
+                policy = self._policies.get(policy_name)
+                if policy is None:
+                    policy = self._policies[policy_name] = RateLimitPolicy(policy_name)
+                    logger.info(f"Learned rate-limit policy {policy_name} for {endpoint}")
+                self._endpoint_policies[endpoint] = policy_name
+                policy.update(rules, now)
+
+            if retry_after is None and status_code == 429:
+                # Rate limited without a Retry-After: back off for the longest window penalty
+                penalties = [window.penalty for window in policy.windows.values()] if policy else []
+                retry_after = max(penalties, default=0) or self.default_interval * 10
+
+            if retry_after:
+                blocked_until = now + retry_after
+                if policy is not None:
+                    policy.blocked_until = max(policy.blocked_until, blocked_until)
+                self._endpoint_blocked_until[endpoint] = max(self._endpoint_blocked_until.get(endpoint, 0), blocked_until)
+                logger.warning(f"Trade API asked to back off {endpoint} for {retry_after} seconds")
+
+        return retry_after or 0
+
+_shared_governor = None
+_shared_governor_lock = threading.Lock()
+
+def get_shared_governor(default_interval=1.0):
+    """Get the process-wide governor shared by all trade API clients"""
+    global _shared_governor
+    with _shared_governor_lock:
+        if _shared_governor is None:
+            _shared_governor = RateLimitGovernor(default_interval)
+        return _shared_governor
@@ -0,0 +1,67 @@
+import numpy as np
+
+# Batched versions of the per-item scores in AnalysisEngine. The arithmetic is
+# written in the same order as the scalar formulas and fmin/fmax mirror
+# Python's min/max (including their handling of NaN), so every score is
+# bit-for-bit the same before rounding. Rounding is done with Python's round()
+# because np.round rounds differently on some halfway values.
+
+def _as_column(values):
+    """Convert a sequence of numbers to a float array, with None as NaN"""
+    return np.asarray(values, dtype=float)
+
+def _round_scores(scores):
+    """Round scores to one decimal exactly like the scalar path"""
+    return np.array([round(score, 1) for score in scores.tolist()], dtype=float)
+
+def investment_ratings(prices, price_changes, volumes):
+    """
+    Calculate investment ratings for whole columns of items at once
+
+    Args:
+        prices (sequence): Chaos values
+        price_changes (sequence): Price changes in percent
+        volumes (sequence): Trade volumes
+
+    Returns:
+        numpy.ndarray: Ratings, identical to calculate_investment_rating per item
+    """
+    prices = _as_column(prices)
+    price_changes = _as_column(price_changes)
+    volumes = _as_column(volumes)
+
+    # Normalize values
+    price_factor = np.fmin(1.0, 50 / np.fmax(1, prices))  # Lower prices get higher factor
+    change_factor = (price_changes / 100) + 0.5  # Normalize to 0-1 range, 0.5 is neutral
+    volume_factor = np.fmin(1.0, volumes / 200)  # Higher volume is better
+
+    # Calculate weighted score (0-100)
+    scores = (price_factor * 0.3 + change_factor * 0.5 + volume_factor * 0.2) * 100
+
+    return _round_scores(scores)
+
+def opportunity_scores(profit_ratios, volatilities, volumes):
+    """
+    Calculate opportunity scores for whole columns of items at once
+
+    Args:
+        profit_ratios (sequence): Potential profit as a fraction of value
+        volatilities (sequence): Volatility as a fraction
+        volumes (sequence): Trade volumes
+
+    Returns:
+        numpy.ndarray: Scores, identical to calculate_opportunity_score per item
+    """
+    profit_ratios = _as_column(profit_ratios)
+    volatilities = _as_column(volatilities)
+    volumes = _as_column(volumes)
+
+    # Normalize values
+    profit_factor = np.fmin(1.0, profit_ratios)  # Cap at 1.0
+    volatility_factor = np.fmin(1.0, volatilities * 5)  # Scale up, cap at 1.0
+    volume_factor = np.fmin(1.0, volumes / 200)  # Higher volume is better
+
+    # Calculate weighted score (0-100)
+    scores = (profit_factor * 0.6 + volatility_factor * 0.2 + volume_factor * 0.2) * 100
+
+    return _round_scores(scores)
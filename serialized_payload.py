@@ -0,0 +1,61 @@
+import gzip
+import json
+import hashlib
+import logging
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class SerializedPayload:
+    """
+    JSON response body serialized and compressed once, with ETags
+
+    The body matches Flask's ``jsonify`` output (sorted keys, compact,
+    trailing newline). Each encoding gets its own strong ETag derived from
+    the content hash, as a compressed body is a different representation.
+    Brotli is used when the ``brotli`` package is installed.
+    """
+
+    def __init__(self, data):
+        """Serialize and compress data"""
+        self.body = (json.dumps(data, sort_keys=True, separators=(',', ':')) + '\n').encode('utf-8')
+        self.digest = hashlib.sha256(self.body).hexdigest()[:32]
+
+        self.bodies = {
+            'identity': self.body,
+            'gzip': gzip.compress(self.body, compresslevel=9, mtime=0)
+        }
+        if brotli is not None:
+            self.bodies['br'] = brotli.compress(self.body)
+
+        self.etags = {encoding: self.digest if encoding == 'identity' else f"{self.digest}-{encoding}"
+                      for encoding in self.bodies}
+
+    def choose_encoding(self, accept_encodings):
+        """
+        Get the best encoding the client accepts
+
+        Args:
+            accept_encodings: Werkzeug MIMEAccept-like object (``request.accept_encodings``)
+
+        Returns:
+            str: 'br', 'gzip' or 'identity'
+        """
+        for encoding in ('br', 'gzip'):
+            if encoding in self.bodies and accept_encodings[encoding]:
+                return encoding
+        return 'identity'
+
+    def matches(self, if_none_match):
+        """Check whether an If-None-Match header names this content in any encoding"""
+        return any(if_none_match.contains_weak(etag) for etag in self.etags.values())
+
+    def sizes(self):
+        """Get the body size of each encoding in bytes"""
+        return {encoding: len(body) for encoding, body in self.bodies.items()}
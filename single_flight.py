@@ -0,0 +1,84 @@
+import copy
+import logging
+import threading
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class _Call:
+    """A call in flight and its outcome"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one call
+
+    The first caller for a key runs the function. Callers that arrive while
+    it is running wait for it and get a copy of its result, or its exception,
+    instead of sending their own request.
+    """
+
+    def __init__(self):
+        """Initialize with no calls in flight"""
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function):
+        """
+        Run a function once for all concurrent callers with the same key
+
+        Args:
+            key (str): Canonical key of the call
+            function (callable): Function to run if no call for the key is in flight
+
+        Returns:
+            The function's result (callers other than the first get a deep copy)
+        """
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = function()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+
+    def stats(self):
+        """Get the number of calls made and calls saved by coalescing"""
+        with self._lock:
+            return {'calls': self.calls, 'coalesced': self.coalesced, 'in_flight': len(self._in_flight)}
+
+_shared_single_flight = None
+_shared_single_flight_lock = threading.Lock()
+
+def get_shared_single_flight():
+    """Get the process-wide coalescer shared by all trade API clients"""
+    global _shared_single_flight
+    with _shared_single_flight_lock:
+        if _shared_single_flight is None:
+            _shared_single_flight = SingleFlight()
+        return _shared_single_flight
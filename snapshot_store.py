@@ -0,0 +1,170 @@
+import os
+import json
+import bisect
+import logging
+import threading
+from datetime import datetime, timedelta
+from config import SNAPSHOT_DATA_DIR, get_platform_path, ensure_dir_exists
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Market data categories recorded in the snapshot log
+SNAPSHOT_CATEGORIES = [
+    'currencies', 'fragments', 'oils', 'incubators',
+    'artifacts', 'divination_cards', 'scarabs'
+]
+
+class SnapshotStore:
+    """
+    Append-only time series of market snapshots for one league
+
+    Every collection appends one compact JSON line per item to ``records.jsonl``
+    and one ``name, timestamp, offset, length`` line per item to ``index.tsv``.
+    The index is small enough to keep in memory, so a range read for one item
+    seeks straight to its records without touching the rest of the archive.
+    """
+
+    def __init__(self, league, base_dir=SNAPSHOT_DATA_DIR):
+        """Initialize the snapshot store for a league"""
+        self.league = league
+        self.store_dir = get_platform_path(os.path.join(base_dir, league.lower()))
+        ensure_dir_exists(self.store_dir)
+
+        self.records_file = os.path.join(self.store_dir, 'records.jsonl')
+        self.index_file = os.path.join(self.store_dir, 'index.tsv')
+
+        # name -> ([timestamps], [(offset, length)]), both sorted by time
+        self._index = {}
+        self._lock = threading.Lock()
+        self._load_index()
+
+    def _load_index(self):
+        """Load the item index, dropping entries that point past the end of the records file"""
+        records_size = os.path.getsize(self.records_file) if os.path.exists(self.records_file) else 0
+
+        if not os.path.exists(self.index_file):
+            return
+
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    parts = line.rstrip('\n').split('\t')
+                    if len(parts) != 4:
+                        continue
+
+                    name, timestamp, offset, length = parts[0], float(parts[1]), int(parts[2]), int(parts[3])
+
+                    # A crash between writing records and index can leave
+                    # entries for records that never made it to disk
+                    if offset + length > records_size:
+                        continue
+
+                    self._add_to_index(name, timestamp, offset, length)
+        except Exception as e:
+            logger.error(f"Error loading snapshot index for {self.league}: {e}")
+
+    def _add_to_index(self, name, timestamp, offset, length):
+        """Add a single record location to the in-memory index"""
+        timestamps, locations = self._index.setdefault(name, ([], []))
+
+        if not timestamps or timestamp >= timestamps[-1]:
+            timestamps.append(timestamp)
+            locations.append((offset, length))
+        else:
+            position = bisect.bisect_right(timestamps, timestamp)
+            timestamps.insert(position, timestamp)
+            locations.insert(position, (offset, length))
+
+    def append(self, market_data):
+        """Append every item of a collected snapshot to the log"""
+        timestamp = market_data.get('timestamp') or datetime.now().isoformat()
+        epoch = datetime.fromisoformat(timestamp).timestamp()
+
+        records = []
+        for category in SNAPSHOT_CATEGORIES:
+            for item in market_data.get(category, []):
+                name = item.get('name')
+                if not name:
+                    continue
+
+                record = {
+                    'timestamp': timestamp,
+                    'category': category,
+                    'name': name,
+                    'details_id': item.get('details_id'),
+                    'chaos_value': item.get('chaos_value'),
+                    'trade_volume': item.get('trade_volume'),
+                    'change': item.get('receive_change', item.get('price_change')),
+                    'volatility': item.get('volatility')
+                }
+                records.append((name, (json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8')))
+
+        if not records:
+            return 0
+
+        with self._lock:
+            try:
+                with open(self.records_file, 'ab') as f:
+                    offset = f.tell()
+                    f.write(b''.join(line for name, line in records))
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                index_lines = []
+                for name, line in records:
+                    self._add_to_index(name, epoch, offset, len(line))
+                    index_lines.append(f"{name}\t{epoch}\t{offset}\t{len(line)}\n")
+                    offset += len(line)
+
+                with open(self.index_file, 'a', encoding='utf-8') as f:
+                    f.write(''.join(index_lines))
+            except Exception as e:
+                logger.error(f"Error appending snapshot for {self.league}: {e}")
+                return 0
+
+        logger.info(f"Appended {len(records)} records to {self.league} snapshot log")
+        return len(records)
+
+    def read_range(self, name, start=None, end=None):
+        """
+        Read the recorded history of an item within a time range
+
+        Args:
+            name (str): Item name (e.g., 'Divine Orb')
+            start (datetime): Earliest timestamp to include (default: no limit)
+            end (datetime): Latest timestamp to include (default: no limit)
+
+        Returns:
+            list: Records ordered by timestamp
+        """
+        with self._lock:
+            entry = self._index.get(name)
+            if not entry:
+                return []
+
+            timestamps, locations = entry
+            low = bisect.bisect_left(timestamps, start.timestamp()) if start else 0
+            high = bisect.bisect_right(timestamps, end.timestamp()) if end else len(timestamps)
+            selected = locations[low:high]
+
+        records = []
+        try:
+            with open(self.records_file, 'rb') as f:
+                for offset, length in selected:
+                    f.seek(offset)
+                    records.append(json.loads(f.read(length)))
+        except Exception as e:
+            logger.error(f"Error reading snapshot records for {name} in {self.league}: {e}")
+
+        return records
+
+    def read_last(self, name, days=7):
+        """Read the recorded history of an item over the last number of days"""
+        return self.read_range(name, start=datetime.now() - timedelta(days=days))
+
+    def item_names(self):
+        """Get the names of all items with recorded history"""
+        with self._lock:
+            return list(self._index.keys())
@@ -0,0 +1,367 @@
+import os
+import re
+import json
+import time
+import codecs
+import logging
+import threading
+from http_session import create_session
+from rate_limiter import RateLimitGovernor
+from config import (
+    PUBLIC_STASH_API_URL, STASH_STREAM_DIR, STASH_STREAM_POLL_INTERVAL, STASH_STREAM_ACCESS_TOKEN,
+    get_platform_path, ensure_dir_exists
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Price notes look like "~price 5 chaos", "~b/o 1.5 divine" or "~price 1/2 divine"
+PRICE_NOTE = re.compile(r'^~(?:b/o|price)\s+(\d+(?:\.\d+)?)(?:/(\d+(?:\.\d+)?))?\s+(\S+)')
+
+# Bytes read from the response at a time
+CHUNK_SIZE = 64 * 1024
+
+_SEPARATOR = re.compile(r'[\s,]*')
+_NEXT_CHANGE_ID = re.compile(r'"next_change_id"\s*:\s*"([^"]*)"')
+_STASHES = re.compile(r'"stashes"\s*:\s*\[')
+
+def parse_price_note(note):
+    """
+    Parse a price note
+
+    Returns:
+        tuple: (amount, currency), or None if the note is not a price
+    """
+    if not note:
+        return None
+
+    match = PRICE_NOTE.match(note.strip())
+    if not match:
+        return None
+
+    amount = float(match.group(1))
+    if match.group(2):
+        divisor = float(match.group(2))
+        if divisor == 0:
+            return None
+        amount /= divisor
+
+    return (amount, match.group(3)) if amount > 0 else None
+
+def normalize_listings(stash):
+    """
+    Get the priced listings of a public stash
+
+    Items without their own price note use the stash tab's price note.
+
+    Returns:
+        list: Listings as dicts with item, base_type, price, currency, league
+    """
+    if not stash.get('public', True):
+        return []
+
+    league = stash.get('league')
+    stash_price = parse_price_note(stash.get('stash'))
+    listings = []
+
+    for item in stash.get('items') or []:
+        price = parse_price_note(item.get('note')) or stash_price
+        if price is None:
+            continue
+
+        amount, currency = price
+        stack_size = item.get('stackSize') or 1
+        listings.append({
+            'item': item.get('name') or item.get('typeLine'),
+            'base_type': item.get('typeLine'),
+            'price': amount,
+            'currency': currency,
+            'stack_size': stack_size,
+            'unit_price': amount / stack_size,
+            'league': item.get('league') or league,
+            'item_id': item.get('id'),
+            'stash_id': stash.get('id'),
+            'account': stash.get('accountName')
+        })
+
+    return listings
+
+class StashPageParser:
+    """
+    Incremental parser for one public stash tabs page
+
+    Chunks are fed as they arrive. ``next_change_id`` is available as soon as
+    its bytes arrive (it precedes the stashes), and every stash object is
+    decoded as soon as it is complete, so a page is never held in memory as
+    a whole document.
+    """
+
+    def __init__(self):
+        """Initialize the parser for a new page"""
+        self.next_change_id = None
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._position = 0
+        self._in_stashes = False
+        self._done = False
+        self._retry_at = 0
+
+    def feed(self, chunk, final=False):
+        """
+        Feed raw bytes of the page
+
+        Returns:
+            list: Stash objects completed by this chunk
+        """
+        self._buffer += self._text_decoder.decode(chunk, final=final)
+        stashes = []
+
+        if not self._in_stashes and not self._done:
+            match = _STASHES.search(self._buffer)
+            if not match:
+                self._find_next_change_id(len(self._buffer))
+                return stashes
+            self._find_next_change_id(match.start())
+            self._in_stashes = True
+            self._position = match.end()
+
+        # A partial object is retried only once the text after it has doubled,
+        # so a large stash is not re-decoded from its start on every chunk
+        while self._in_stashes and (final or len(self._buffer) >= self._retry_at):
+            self._position = _SEPARATOR.match(self._buffer, self._position).end()
+            if self._position >= len(self._buffer):
+                break
+
+            if self._buffer[self._position] == ']':
+                self._in_stashes = False
+                self._done = True
+                self._position += 1
+                break
+
+            try:
+                stash, end = self._decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                self._retry_at = 2 * len(self._buffer) - self._position
+                break
+
+            stashes.append(stash)
+            self._position = end
+
+        # Drop consumed text so the buffer only holds the current object
+        if self._position > CHUNK_SIZE:
+            self._buffer = self._buffer[self._position:]
+            self._retry_at -= self._position
+            self._position = 0
+
+        if self._done:
+            self._find_next_change_id(len(self._buffer), self._position)
+
+        return stashes
+
+    def _find_next_change_id(self, end, start=0):
+        """Read next_change_id from text outside the stashes array"""
+        if self.next_change_id is None:
+            match = _NEXT_CHANGE_ID.search(self._buffer, start, end)
+            if match:
+                self.next_change_id = match.group(1)
+
+    def close(self):
+        """Finish the page, returning any remaining stashes"""
+        return self.feed(b'', final=True)
+
+class StashStreamIngester:
+    """
+    Consumes the public stash tabs river and emits normalized listings
+
+    The ``next_change_id`` cursor is persisted after each page is processed,
+    so a restart resumes where it stopped without losing or replaying pages.
+    """
+
+    def __init__(self, sink, state_dir=STASH_STREAM_DIR, url=PUBLIC_STASH_API_URL,
+                 access_token=None, leagues=None, record_dir=None):
+        """
+        Initialize the ingester
+
+        Args:
+            sink (callable): Called with each page's list of listings (e.g. DataCollector.publish_listings)
+            state_dir (str): Directory holding the persisted cursor
+            url (str): Public stash tabs endpoint
+            access_token (str): OAuth token with the service:psapi scope
+            leagues (set): Only emit listings for these leagues (default: all)
+            record_dir (str): Save every raw page here for replay benchmarks
+        """
+        self.sink = sink
+        self.url = url
+        self.leagues = set(leagues) if leagues else None
+        self.record_dir = get_platform_path(record_dir) if record_dir else None
+        self.state_dir = get_platform_path(state_dir)
+        self.cursor_file = os.path.join(self.state_dir, 'next_change_id')
+        ensure_dir_exists(self.state_dir)
+        if self.record_dir:
+            ensure_dir_exists(self.record_dir)
+
+        headers = {'User-Agent': 'POE-Economy-Analysis-Tool/1.0 (contact@example.com)'}
+        if access_token:
+            headers['Authorization'] = f'Bearer {access_token}'
+        self.session = create_session(1, headers=headers)
+        self.rate_limiter = RateLimitGovernor(default_interval=STASH_STREAM_POLL_INTERVAL)
+
+        self.next_change_id = self.load_cursor()
+        self.pages = 0
+        self.listings = 0
+
+    def load_cursor(self):
+        """Load the persisted next_change_id, or None to start from the beginning"""
+        try:
+            if os.path.exists(self.cursor_file):
+                with open(self.cursor_file, 'r') as f:
+                    return f.read().strip() or None
+        except Exception as e:
+            logger.error(f"Error loading stash stream cursor: {e}")
+        return None
+
+    def save_cursor(self, next_change_id):
+        """Persist the next_change_id atomically"""
+        temp_file = f"{self.cursor_file}.tmp"
+        with open(temp_file, 'w') as f:
+            f.write(next_change_id)
+        os.replace(temp_file, self.cursor_file)
+
+    def process_page(self, chunks):
+        """
+        Parse a page from byte chunks and emit its listings to the sink
+
+        Returns:
+            tuple: (next_change_id of the page, number of listings emitted)
+        """
+        parser = StashPageParser()
+        listings = []
+
+        for chunk in chunks:
+            for stash in parser.feed(chunk):
+                listings.extend(self._filter(normalize_listings(stash)))
+        for stash in parser.close():
+            listings.extend(self._filter(normalize_listings(stash)))
+
+        if listings:
+            self.sink(listings)
+        return parser.next_change_id, len(listings)
+
+    def _filter(self, listings):
+        """Keep listings of the followed leagues"""
+        if self.leagues is None:
+            return listings
+        return [listing for listing in listings if listing['league'] in self.leagues]
+
+    def fetch_page(self):
+        """Fetch, parse and emit the page at the cursor, then advance the cursor"""
+        params = {'id': self.next_change_id} if self.next_change_id else {}
+
+        self.rate_limiter.acquire('public-stash')
+        with self.session.get(self.url, params=params, stream=True) as response:
+            self.rate_limiter.update('public-stash', response.headers, response.status_code)
+            response.raise_for_status()
+
+            chunks = response.iter_content(CHUNK_SIZE)
+            if self.record_dir:
+                chunks = self._recording(chunks)
+            next_change_id, count = self.process_page(chunks)
+
+        if next_change_id:
+            self.next_change_id = next_change_id
+            self.save_cursor(next_change_id)
+
+        self.pages += 1
+        self.listings += count
+        return count
+
+    def _recording(self, chunks):
+        """Pass chunks through while saving the raw page"""
+        path = os.path.join(self.record_dir, f"page_{int(time.time() * 1000)}.json")
+        with open(path, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                yield chunk
+
+    def run(self, stop_event=None, max_pages=None):
+        """
+        Follow the river until stopped
+
+        Args:
+            stop_event (threading.Event): Set to stop after the current page
+            max_pages (int): Stop after this many pages
+        """
+        stop_event = stop_event or threading.Event()
+        logger.info(f"Following public stash stream from {self.next_change_id or 'the beginning'}")
+
+        while not stop_event.is_set() and (max_pages is None or self.pages < max_pages):
+            try:
+                count = self.fetch_page()
+                logger.debug(f"Stash page {self.pages}: {count} listings, next {self.next_change_id}")
+            except Exception as e:
+                logger.error(f"Error reading public stash stream: {e}")
+                stop_event.wait(STASH_STREAM_POLL_INTERVAL)
+
+def replay_benchmark(replay_dir, chunk_size=CHUNK_SIZE):
+    """
+    Measure parse and normalize throughput on recorded pages
+
+    Returns:
+        dict: Pages, bytes, stashes, listings, seconds and throughput
+    """
+    replay_dir = get_platform_path(replay_dir)
+    paths = sorted(os.path.join(replay_dir, name) for name in os.listdir(replay_dir) if name.endswith('.json'))
+
+    totals = {'pages': 0, 'bytes': 0, 'stashes': 0, 'listings': 0}
+    seconds = 0.0
+    for path in paths:
+        with open(path, 'rb') as f:
+            data = f.read()
+        chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+
+        start = time.perf_counter()
+        parser = StashPageParser()
+        stashes = 0
+        listings = 0
+        for chunk in chunks:
+            for stash in parser.feed(chunk):
+                stashes += 1
+                listings += len(normalize_listings(stash))
+        for stash in parser.close():
+            stashes += 1
+            listings += len(normalize_listings(stash))
+        seconds += time.perf_counter() - start
+
+        totals['pages'] += 1
+        totals['bytes'] += len(data)
+        totals['stashes'] += stashes
+        totals['listings'] += listings
+
+    totals['seconds'] = seconds
+    totals['mb_per_second'] = totals['bytes'] / 1e6 / seconds if seconds else 0.0
+    totals['pages_per_second'] = totals['pages'] / seconds if seconds else 0.0
+    return totals
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Public stash stream ingester')
+    parser.add_argument('--replay', help='Benchmark parsing on recorded pages in this directory')
+    parser.add_argument('--record', help='Save raw pages to this directory while following the stream')
+    parser.add_argument('--pages', type=int, help='Stop after this many pages')
+    parser.add_argument('--token', default=STASH_STREAM_ACCESS_TOKEN, help='OAuth access token')
+    args = parser.parse_args()
+
+    if args.replay:
+        result = replay_benchmark(args.replay)
+        print(f"Parsed {result['pages']} pages ({result['bytes'] / 1e6:.1f} MB, {result['stashes']} stashes, "
+              f"{result['listings']} listings) in {result['seconds']:.2f}s: "
+              f"{result['mb_per_second']:.1f} MB/s, {result['pages_per_second']:.1f} pages/s")
+    else:
+        ingester = StashStreamIngester(lambda listings: None, access_token=args.token, record_dir=args.record)
+        ingester.run(max_pages=args.pages)
+        print(f"Read {ingester.pages} pages, {ingester.listings} listings")
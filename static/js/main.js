@@ -395,14 +395,17 @@ function updateCharts() {
                         dataType: 'json',
                         success: function(histData) {
                             if (histData.status === 'success' && histData.data) {
-                                // Create labels for the last 7 days
-                                const labels = [];
-                                const now = new Date();
-                                for (let i = 6; i >= 0; i--) {
-                                    const date = new Date(now);
-                                    date.setDate(date.getDate() - i);
-                                    labels.push(date.toLocaleDateString());
-                                }
+                                // Label the chart with the recorded times of all datasets
+                                const timestamps = [...new Set(histData.data.flatMap(d => d.timestamps || []))].sort();
+                                const labels = timestamps.map(t => new Date(t).toLocaleDateString());
+                                
+                                // Align each dataset's values to the shared times
+                                histData.data.forEach(d => {
+                                    const values = {};
+                                    (d.timestamps || []).forEach((t, i) => { values[t] = d.data[i]; });
+                                    d.data = timestamps.map(t => t in values ? values[t] : null);
+                                    d.spanGaps = true;
+                                });
                                 
                                 // Update trend chart
                                 trendChart.data.labels = labels;
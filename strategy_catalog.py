@@ -0,0 +1,148 @@
+import json
+import logging
+import threading
+from collections import deque
+from types import MappingProxyType
+from config import REFERENCE_DATA_FILE, get_platform_path
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Reference data sections holding the farming strategy catalogs
+SCARAB_CATALOG = 'scarab_farming_strategies'
+FRAGMENT_CATALOG = 'fragment_farming_strategies'
+DIV_CARD_CATALOG = 'divination_card_farming'
+
+# Used when a catalog is missing from the reference data, in each catalog's entry schema
+FALLBACK_ENTRIES = {
+    SCARAB_CATALOG: {'method': 'General Scarab Farming', 'locations': [], 'strategy': ''},
+    FRAGMENT_CATALOG: {'method': 'General Fragment Farming', 'locations': [], 'strategy': ''},
+    DIV_CARD_CATALOG: {'maps': [], 'strategy': ''}
+}
+
+def _freeze(value):
+    """Make a JSON value read-only (dicts become mapping proxies, lists become tuples)"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+class SubstringMatcher:
+    """
+    Aho-Corasick automaton over a fixed set of patterns
+
+    Finds which patterns occur in a text in one pass over the text,
+    independent of the number of patterns. When several patterns occur, the
+    one listed first wins, matching a linear scan over the patterns in order.
+    """
+
+    def __init__(self, patterns):
+        """Build the automaton; patterns are matched with priority in the given order"""
+        self.patterns = tuple(patterns)
+        self._goto = [{}]
+        self._fail = [0]
+        # Best (lowest) pattern index ending at each state, including via fail links
+        self._best = [None]
+
+        for priority, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(None)
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            if self._best[state] is None:
+                self._best[state] = priority
+
+        # Breadth-first pass to set fail links and inherit matches from suffixes
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, target in self._goto[state].items():
+                if state == 0:
+                    self._fail[target] = 0
+                else:
+                    fail = self._fail[state]
+                    while fail and char not in self._goto[fail]:
+                        fail = self._fail[fail]
+                    self._fail[target] = self._goto[fail].get(char, 0)
+
+                inherited = self._best[self._fail[target]]
+                if inherited is not None and (self._best[target] is None or inherited < self._best[target]):
+                    self._best[target] = inherited
+                queue.append(target)
+
+    def first_match(self, text):
+        """Get the index of the highest-priority pattern occurring in the text, or None"""
+        best = None
+        state = 0
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+
+            priority = self._best[state]
+            if priority is not None and (best is None or priority < best):
+                best = priority
+                if best == 0:
+                    break
+        return best
+
+class StrategyCatalog:
+    """Immutable farming strategy catalog with indexed lookup"""
+
+    def __init__(self, section, fallback=None):
+        """Build the catalog from a reference data section with 'default' and 'strategies'"""
+        section = section or {}
+        self.default = _freeze(section.get('default', fallback or {}))
+        self.strategies = _freeze(section.get('strategies', {}))
+        self._matcher = SubstringMatcher(self.strategies.keys())
+        self._patterns = tuple(self.strategies.keys())
+        self._resolved = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.strategies)
+
+    def lookup(self, key):
+        """Get the entry for an exact key, or the default entry"""
+        return self.strategies.get(key, self.default)
+
+    def match(self, name):
+        """Get the entry of the first catalog key contained in a name, or the default entry"""
+        entry = self._resolved.get(name)
+        if entry is None:
+            priority = self._matcher.first_match(name)
+            entry = self.strategies[self._patterns[priority]] if priority is not None else self.default
+            # Item names repeat on every refresh, so resolve each name once
+            with self._lock:
+                self._resolved[name] = entry
+        return entry
+
+def load_strategy_catalogs(reference_data_file=REFERENCE_DATA_FILE):
+    """
+    Load the farming strategy catalogs from the reference data
+
+    Returns:
+        MappingProxyType: Catalog section name -> StrategyCatalog
+    """
+    reference_data = {}
+    try:
+        with open(get_platform_path(reference_data_file), 'r') as f:
+            reference_data = json.load(f)
+    except Exception as e:
+        logger.error(f"Error loading strategy catalogs: {e}")
+
+    catalogs = {}
+    for section in (SCARAB_CATALOG, FRAGMENT_CATALOG, DIV_CARD_CATALOG):
+        if section not in reference_data:
+            logger.warning(f"Reference data has no {section}, using a generic strategy")
+        catalogs[section] = StrategyCatalog(reference_data.get(section), FALLBACK_ENTRIES[section])
+
+    return MappingProxyType(catalogs)
@@ -0,0 +1,36 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arbitrage import ExchangeGraph
+
+class TestExchangeGraph(unittest.TestCase):
+    """Tests for arbitrage cycle detection"""
+
+    def test_mid_prices_alone_have_no_cycles(self):
+        graph = ExchangeGraph()
+        graph.add_market_rows([
+            {'name': 'Divine Orb', 'chaos_value': 200},
+            {'name': 'Exalted Orb', 'chaos_value': 20},
+        ])
+        self.assertEqual(graph.find_cycles(), [])
+
+    def test_cross_rate_finds_three_hop_cycle(self):
+        graph = ExchangeGraph()
+        graph.add_market_rows([
+            {'name': 'Divine Orb', 'chaos_value': 200},
+            {'name': 'Exalted Orb', 'chaos_value': 20},
+        ])
+        # One divine buys 11 exalted although it is worth 10 through chaos
+        graph.add_pair_rates({('divine', 'exalted'): 11})
+
+        cycles = graph.find_cycles(min_profit_percent=2)
+
+        self.assertEqual(len(cycles), 1)
+        self.assertEqual(cycles[0]['path'], ['Chaos Orb', 'Divine Orb', 'Exalted Orb', 'Chaos Orb'])
+        self.assertAlmostEqual(cycles[0]['rate_product'], 0.99 * 11 / 10 * 0.99)
+
+if __name__ == '__main__':
+    unittest.main()
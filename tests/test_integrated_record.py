@@ -0,0 +1,49 @@
+import os
+import sys
+import json
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrated_record import IntegratedRecord
+from serialized_payload import SerializedPayload
+
+class TestIntegratedRecordJSON(unittest.TestCase):
+    """Tests that records serialize like the plain dict they stand for"""
+
+    def assertSerializesLike(self, record, expected):
+        self.assertEqual(json.dumps(record), json.dumps(expected))
+        self.assertEqual(json.dumps(record, indent=4, sort_keys=True), json.dumps(expected, indent=4, sort_keys=True))
+        self.assertEqual(SerializedPayload([record]).body, SerializedPayload([expected]).body)
+
+    def test_overlay_serializes_like_copy(self):
+        raw = {'name': 'Divine Orb', 'chaos_value': 200}
+        record = IntegratedRecord(raw, {'historical_value': 180})
+        self.assertSerializesLike(record, {'name': 'Divine Orb', 'chaos_value': 200, 'historical_value': 180})
+
+    def test_record_without_added_fields(self):
+        raw = {'name': 'Divine Orb', 'chaos_value': 200}
+        self.assertSerializesLike(IntegratedRecord(raw), dict(raw))
+
+    def test_overwriting_the_seeded_field(self):
+        raw = {'name': 'Divine Orb', 'chaos_value': 200}
+        record = IntegratedRecord(raw)
+        record['name'] = 'Exalted Orb'
+        record['chaos_value'] = 20
+        self.assertSerializesLike(record, {'name': 'Exalted Orb', 'chaos_value': 20})
+        self.assertEqual(raw, {'name': 'Divine Orb', 'chaos_value': 200})
+
+    def test_fields_cannot_be_removed(self):
+        record = IntegratedRecord({'name': 'Divine Orb'})
+        for remove in (lambda: record.pop('name'), lambda: record.clear(), lambda: record.popitem()):
+            self.assertRaises(TypeError, remove)
+        with self.assertRaises(TypeError):
+            del record['name']
+        self.assertSerializesLike(record, {'name': 'Divine Orb'})
+
+    def test_empty_raw_record(self):
+        self.assertSerializesLike(IntegratedRecord({}), {})
+        self.assertSerializesLike(IntegratedRecord({}, {'chaos_value': 1}), {'chaos_value': 1})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+import os
+import sys
+import json
+import time
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from requests.structures import CaseInsensitiveDict
+from rate_limiter import RateLimitWindow, RateLimitGovernor, parse_rate_limit_headers, parse_retry_after
+from trade_cache import TradeResultCache
+from single_flight import SingleFlight
+from poe_api import POETradeAPI
+
+# Headers as sent by the trade API for the search endpoint
+SEARCH_HEADERS = {
+    'X-Rate-Limit-Policy': 'trade-search-request-limit',
+    'X-Rate-Limit-Rules': 'Account,Ip',
+    'X-Rate-Limit-Account': '3:5:60',
+    'X-Rate-Limit-Account-State': '1:5:0',
+    'X-Rate-Limit-Ip': '8:10:60,15:60:120',
+    'X-Rate-Limit-Ip-State': '2:10:0,4:60:0',
+}
+
+class TestRateLimitHeaders(unittest.TestCase):
+    """Tests for parsing the trade API rate-limit headers"""
+
+    def test_parse_rate_limit_headers(self):
+        policy, rules = parse_rate_limit_headers(CaseInsensitiveDict(SEARCH_HEADERS))
+
+        self.assertEqual(policy, 'trade-search-request-limit')
+        self.assertEqual(rules['Account'], [((3, 5, 60), (1, 5, 0))])
+        self.assertEqual(rules['Ip'], [((8, 10, 60), (2, 10, 0)), ((15, 60, 120), (4, 60, 0))])
+
+    def test_missing_state_counts_as_unused(self):
+        headers = {'X-Rate-Limit-Rules': 'Ip', 'X-Rate-Limit-Ip': '8:10:60,bad'}
+        self.assertEqual(parse_rate_limit_headers(headers), (None, {'Ip': [((8, 10, 60), (0, 10, 0))]}))
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after('12'), 12.0)
+        self.assertEqual(parse_retry_after('-1'), 0)
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertIsNone(parse_retry_after(None))
+
+class TestRateLimitWindow(unittest.TestCase):
+    """Tests for a single rule window"""
+
+    def test_margin_is_kept_in_reserve(self):
+        window = RateLimitWindow(3, 10, margin=1)
+        self.assertEqual(window.tokens(0), 2)
+
+    def test_token_returns_when_request_leaves_window(self):
+        window = RateLimitWindow(2, 10, margin=0)
+        window.consume(100)
+        window.consume(101)
+
+        self.assertEqual(window.wait_time(101), 10 - 1)
+        self.assertEqual(window.wait_time(109.5), 0.5)
+        # The first request leaves the window exactly one period after it was sent
+        self.assertEqual(window.wait_time(110), 0)
+
+    def test_sync_counts_requests_from_other_clients(self):
+        window = RateLimitWindow(3, 10, margin=0)
+        window.consume(0)
+        window.sync(3, 1)
+        self.assertEqual(window.tokens(1), 0)
+
+class TestRateLimitGovernor(unittest.TestCase):
+    """Tests for policies learned from responses and 429 backoff"""
+
+    def test_learned_policy_limits_requests(self):
+        governor = RateLimitGovernor(default_interval=0)
+        governor.update('search', CaseInsensitiveDict({
+            'X-Rate-Limit-Policy': 'search-limit',
+            'X-Rate-Limit-Rules': 'Ip',
+            'X-Rate-Limit-Ip': '3:60:60',
+            'X-Rate-Limit-Ip-State': '1:60:0',
+        }))
+
+        # Three hits, one kept in reserve and one already used
+        governor.acquire('search')
+        self.assertGreater(governor.wait_time('search'), 50)
+
+    def test_restricted_state_blocks_policy(self):
+        governor = RateLimitGovernor(default_interval=0)
+        governor.update('search', CaseInsensitiveDict({
+            'X-Rate-Limit-Policy': 'search-limit',
+            'X-Rate-Limit-Rules': 'Ip',
+            'X-Rate-Limit-Ip': '8:10:60',
+            'X-Rate-Limit-Ip-State': '9:10:60',
+        }))
+        self.assertGreater(governor.wait_time('search'), 59)
+
+    def test_429_with_retry_after(self):
+        governor = RateLimitGovernor(default_interval=0)
+        self.assertEqual(governor.update('fetch', {'Retry-After': '30'}, 429), 30)
+        self.assertGreater(governor.wait_time('fetch'), 29)
+        self.assertEqual(governor.wait_time('search'), 0)
+
+    def test_429_without_retry_after_uses_longest_penalty(self):
+        governor = RateLimitGovernor(default_interval=0)
+        headers = CaseInsensitiveDict(SEARCH_HEADERS)
+        self.assertEqual(governor.update('search', headers, 429), 120)
+
+class _StubTradeHandler(BaseHTTPRequestHandler):
+    """Answers the first request with a 429, then with rate-limit headers"""
+
+    def do_GET(self):
+        self.server.hits += 1
+        if self.server.hits == 1:
+            self.send_response(429)
+            self.send_header('Retry-After', '0.2')
+            self.end_headers()
+            return
+
+        body = json.dumps({'result': []}).encode('utf-8')
+        self.send_response(200)
+        for name, value in SEARCH_HEADERS.items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class TestTradeAPIAgainstStubServer(unittest.TestCase):
+    """Tests for the trade API client's backoff against a local stub server"""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _StubTradeHandler)
+        self.server.hits = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.governor = RateLimitGovernor(default_interval=0)
+        self.api = POETradeAPI(base_url=f"http://127.0.0.1:{self.server.server_address[1]}/api",
+                               rate_limiter=self.governor, result_cache=TradeResultCache(),
+                               single_flight=SingleFlight())
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.api.session.close()
+
+    def test_retries_after_429(self):
+        started = time.monotonic()
+        response = self.api._request('GET', 'search', f"{self.api.trade_url}/search/Standard")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.server.hits, 2)
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+
+        # The second response's policy leaves one Account hit in reserve after the one spent
+        self.governor.acquire('search')
+        self.assertGreater(self.governor.wait_time('search'), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from config import TRADE_CACHE_TTLS, TRADE_CACHE_MAX_BYTES
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def query_key(kind, league, payload, sort=None, limit=None):
+    """
+    Get the canonical key of a trade query
+
+    Payloads are serialized with sorted keys, so queries that differ only in
+    dict ordering share a key.
+    """
+    canonical = json.dumps([kind, league, payload, sort, limit], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+class TradeResultCache:
+    """
+    TTL and LRU cache of trade API results, bounded by memory size
+
+    Results are stored serialized, which gives an exact size for the memory
+    bound and hands every caller its own copy, so a caller that edits a
+    result cannot change what later callers see.
+    """
+
+    def __init__(self, ttls=TRADE_CACHE_TTLS, max_bytes=TRADE_CACHE_MAX_BYTES):
+        """
+        Initialize the cache
+
+        Args:
+            ttls (dict): Query kind (e.g., 'search', 'exchange') -> seconds results stay fresh
+            max_bytes (int): Maximum total size of cached results
+        """
+        self.ttls = dict(ttls)
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Get a fresh cached result, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            data = entry[1]
+
+        return json.loads(data)
+
+    def put(self, key, kind, result, ttl=None):
+        """Cache a result for the TTL of its query kind"""
+        ttl = self.ttls.get(kind, 0) if ttl is None else ttl
+        if ttl <= 0:
+            return
+
+        data = json.dumps(result, separators=(',', ':'))
+        if len(data) > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (time.monotonic() + ttl, data)
+            self.size += len(data)
+
+            # Evict least recently used results until the cache fits
+            while self.size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key):
+        """Drop an entry (lock must be held)"""
+        _, data = self._entries.pop(key)
+        self.size -= len(data)
+
+    def clear(self):
+        """Drop all cached results"""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        """Get hit/miss counters and the current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_shared_cache():
+    """Get the process-wide result cache shared by all trade API clients"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = TradeResultCache()
+        return _shared_cache